@@ -0,0 +1,111 @@
+"""
+Measure what gzip compression saves on update bodies and search responses.
+
+For update bodies, the script reports the compressed size and the compression time at
+several levels, i.e. what `compress_updates` and `compression_level` trade. For responses,
+it reports the size of a gzipped result page and the time taken to decompress it, i.e.
+what `accept_compressed` costs the client.
+
+    $ python benchmarks/compression.py
+    $ python benchmarks/compression.py --docs 50000 --levels 1 9
+
+"""
+import argparse
+import gzip
+import json
+import time
+
+from solrcloudpy.collection.search import dthandler
+from solrcloudpy.utils import _compress_body
+
+from javabin_decode import WORDS, _json_default, result_set
+
+
+class _Connection(object):
+    compress_updates = True
+    compression_min_size = 0
+
+    def __init__(self, level):
+        self.compression_level = level
+
+
+def update_docs(count):
+    """
+    :return: documents like the ones a typical ingest job sends
+    :rtype: list
+    """
+    docs = result_set(count, "full")["response"]["docs"]
+    for doc in docs:
+        del doc["score"]
+        doc["category_s"] = WORDS[len(doc["id"]) % len(WORDS)]
+    return docs
+
+
+def timed(func, repeat):
+    """
+    :return: the median duration of `func` in ms, and its result
+    :rtype: tuple
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = func()
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2] * 1000, value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 6, 9])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print("update bodies")
+    print(
+        "%-8s %6s %12s %12s %8s %10s %10s"
+        % ("docs", "level", "raw KB", "gzip KB", "ratio", "gzip ms", "MB/s")
+    )
+    for count in args.docs:
+        body = json.dumps(update_docs(count), default=dthandler)
+        raw = len(body.encode("utf-8"))
+        for level in args.levels:
+            conn = _Connection(level)
+            ms, (compressed, _) = timed(lambda: _compress_body(conn, body), args.repeat)
+            print(
+                "%-8d %6d %12.1f %12.1f %8.2f %10.2f %10.1f"
+                % (
+                    count,
+                    level,
+                    raw / 1024.0,
+                    len(compressed) / 1024.0,
+                    raw / float(len(compressed)),
+                    ms,
+                    raw / 1e6 / (ms / 1000.0),
+                )
+            )
+
+    print("")
+    print("search responses (gzip level 6, as a server would send them)")
+    print(
+        "%-8s %12s %12s %8s %12s" % ("rows", "raw KB", "gzip KB", "ratio", "gunzip ms")
+    )
+    for count in args.docs:
+        page = json.dumps(result_set(count, "full"), default=_json_default)
+        page = page.encode("utf-8")
+        compressed = gzip.compress(page, 6)
+        ms, _ = timed(lambda: gzip.decompress(compressed), args.repeat)
+        print(
+            "%-8d %12.1f %12.1f %8.2f %12.2f"
+            % (
+                count,
+                len(page) / 1024.0,
+                len(compressed) / 1024.0,
+                len(page) / float(len(compressed)),
+                ms,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
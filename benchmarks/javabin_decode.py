@@ -0,0 +1,229 @@
+"""
+Compare the cost of decoding search responses in the `json` and `javabin` formats.
+
+Each result set is encoded once in both formats, then decoded repeatedly with
+:func:`json.loads` and :func:`solrcloudpy.javabin.loads`. The script reports the
+payload sizes, the median decode time, and the peak memory allocated while decoding.
+
+    $ python benchmarks/javabin_decode.py
+    $ python benchmarks/javabin_decode.py --rows 5000 --repeat 20
+
+"""
+import argparse
+import datetime as dt
+import json
+import random
+import statistics
+import struct
+import sys
+import time
+import tracemalloc
+
+from solrcloudpy import javabin
+
+WORDS = (
+    "solr lucene index shard replica leader query facet score field document "
+    "collection cluster cloud node core schema commit search result cursor"
+).split()
+
+
+class _Encoder(object):
+    """
+    A minimal javabin encoder, writing the values Solr writes for search responses
+    """
+
+    def __init__(self):
+        self.out = bytearray([javabin.VERSION])
+        self.strings = {}
+
+    def write_tag(self, kind, size):
+        if size < 0x1F:
+            self.out.append(kind << 5 | size)
+        else:
+            self.out.append(kind << 5 | 0x1F)
+            self.write_vint(size - 0x1F)
+
+    def write_vint(self, value):
+        while value & ~0x7F:
+            self.out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        self.out.append(value)
+
+    def write_str(self, value):
+        data = value.encode("utf-8")
+        self.write_tag(javabin.STR, len(data))
+        self.out += data
+
+    def write_extern_string(self, value):
+        index = self.strings.get(value)
+        if index:
+            self.write_tag(javabin.EXTERN_STRING, index)
+            return
+        self.write_tag(javabin.EXTERN_STRING, 0)
+        self.write_str(value)
+        self.strings[value] = len(self.strings) + 1
+
+    def write_val(self, value):
+        if value is None:
+            self.out.append(javabin.NULL)
+        elif value is True:
+            self.out.append(javabin.BOOL_TRUE)
+        elif value is False:
+            self.out.append(javabin.BOOL_FALSE)
+        elif isinstance(value, int):
+            if 0 < value < 0x7FFFFFFF:
+                self.out.append(
+                    javabin.SINT << 5 | value & 0x0F | (0x10 if value > 0x0F else 0)
+                )
+                if value > 0x0F:
+                    self.write_vint(value >> 4)
+            else:
+                self.out.append(javabin.LONG)
+                self.out += struct.pack(">q", value)
+        elif isinstance(value, float):
+            self.out.append(javabin.FLOAT)
+            self.out += struct.pack(">f", value)
+        elif isinstance(value, dt.datetime):
+            self.out.append(javabin.DATE)
+            millis = int((value - dt.datetime(1970, 1, 1)).total_seconds() * 1000)
+            self.out += struct.pack(">q", millis)
+        elif isinstance(value, str):
+            self.write_str(value)
+        elif isinstance(value, list):
+            self.write_tag(javabin.ARR, len(value))
+            for item in value:
+                self.write_val(item)
+        elif isinstance(value, dict) and "docs" in value:
+            self.out.append(javabin.SOLRDOCLST)
+            self.write_val([value["numFound"], value["start"], value.get("maxScore")])
+            self.write_tag(javabin.ARR, len(value["docs"]))
+            for doc in value["docs"]:
+                self.out.append(javabin.SOLRDOC)
+                self.write_tag(javabin.ORDERED_MAP, len(doc))
+                for name, field in doc.items():
+                    self.write_extern_string(name)
+                    self.write_val(field)
+        elif isinstance(value, dict):
+            self.write_tag(javabin.NAMED_LST, len(value))
+            for name, item in value.items():
+                self.write_extern_string(name)
+                self.write_val(item)
+        else:
+            raise TypeError("Can't encode %r" % value)
+
+
+def _float32(value):
+    # the value Solr returns for a float field
+    return javabin._shortest_float(struct.unpack(">f", struct.pack(">f", value))[0])
+
+
+def result_set(rows, fields):
+    """
+    :return: a search response with `rows` documents, as python objects
+    :rtype: dict
+    """
+    rand = random.Random(rows)
+    docs = []
+    for i in range(rows):
+        doc = {"id": "doc-%08d" % i}
+        if fields == "full":
+            doc.update(
+                {
+                    "title": " ".join(rand.choice(WORDS) for _ in range(8)),
+                    "body": " ".join(rand.choice(WORDS) for _ in range(80)),
+                    "price": _float32(rand.uniform(1, 1000)),
+                    "popularity": rand.randint(0, 100000),
+                    "views": rand.randint(2 ** 33, 2 ** 40),
+                    "last_modified": dt.datetime(2020, 1, 1)
+                    + dt.timedelta(seconds=rand.randint(0, 10 ** 8)),
+                    "tags": [rand.choice(WORDS) for _ in range(5)],
+                    "in_stock": rand.random() < 0.5,
+                }
+            )
+        doc["score"] = _float32(rand.uniform(0, 20))
+        docs.append(doc)
+    return {
+        "responseHeader": {"status": 0, "QTime": 12},
+        "response": {
+            "numFound": rows * 10,
+            "start": 0,
+            "maxScore": max(doc["score"] for doc in docs),
+            "docs": docs,
+        },
+    }
+
+
+def _json_default(value):
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def measure(decode, payload, repeat):
+    """
+    :return: the median decode time in ms, the peak allocation in KB and the decoded value
+    :rtype: tuple
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = decode(payload)
+        timings.append(time.perf_counter() - start)
+    del value
+
+    tracemalloc.start()
+    value = decode(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings) * 1000, peak / 1024.0, value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    print(
+        "%-18s %10s %10s %12s %12s %12s %12s"
+        % (
+            "result set",
+            "json KB",
+            "jbin KB",
+            "json ms",
+            "jbin ms",
+            "json peakKB",
+            "jbin peakKB",
+        )
+    )
+    for fields in ("full", "id,score"):
+        for rows in args.rows:
+            response = result_set(rows, fields)
+            json_payload = json.dumps(response, default=_json_default).encode("utf-8")
+            encoder = _Encoder()
+            encoder.write_val(response)
+            javabin_payload = bytes(encoder.out)
+
+            json_ms, json_peak, from_json = measure(
+                lambda data: json.loads(data.decode("utf-8")), json_payload, args.repeat
+            )
+            javabin_ms, javabin_peak, from_javabin = measure(
+                javabin.loads, javabin_payload, args.repeat
+            )
+            if from_json != from_javabin:
+                sys.exit("javabin and json results differ for %d rows" % rows)
+
+            print(
+                "%-18s %10.1f %10.1f %12.2f %12.2f %12.1f %12.1f"
+                % (
+                    "%d x %s" % (rows, fields),
+                    len(json_payload) / 1024.0,
+                    len(javabin_payload) / 1024.0,
+                    json_ms,
+                    javabin_ms,
+                    json_peak,
+                    javabin_peak,
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
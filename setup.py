@@ -35,4 +35,5 @@ setup(
         "Topic :: Internet :: WWW/HTTP :: Indexing/Search",
     ],
     install_requires=["requests >= 2.11.1", "semver", "pathlib2", "future"],
+    extras_require={"async": ["aiohttp >= 3.0"]},
 )
@@ -0,0 +1,16 @@
+"""
+Asynchronous client for SolrCloud, for use from an asyncio event loop.
+
+This package requires `aiohttp`, which is installed with ``pip install solrcloudpy[async]``.
+
+    >>> from solrcloudpy.aio import AsyncSolrConnection
+    >>> async with AsyncSolrConnection(["localhost:8983", "localhost:7574"]) as conn:
+    ...     response = await conn['collection1'].search({'q': '*:*'})
+    >>> response
+    <SolrResponse [200]>
+
+"""
+from .collection import AsyncSolrCollection
+from .connection import AsyncSolrConnection
+
+__all__ = ["AsyncSolrCollection", "AsyncSolrConnection"]
@@ -0,0 +1,679 @@
+"""
+Manage and search a Solr collection from an asyncio event loop.
+
+The methods of :class:`AsyncSolrCollection` mirror the ones of
+:class:`~solrcloudpy.collection.SolrCollection`, but are coroutines.
+"""
+import asyncio
+import functools
+import json
+import time
+
+from solrcloudpy.collection.admin import (
+    _backup_restore_params,
+    _collection_state,
+    _create_params,
+    _create_shard_params,
+    _delete_replica_params,
+    _index_info,
+    _request_status_params,
+    _split_shard_params,
+)
+from solrcloudpy.collection.documents import compact_response
+from solrcloudpy.collection.realtime import AsyncGetBatcher, _docs_by_id
+from solrcloudpy.collection.routing import AsyncCompositeIdRouter
+from solrcloudpy.collection.search import (
+    ROUTED_CHUNK_SIZE,
+    _chunks,
+    _cursor_params,
+    _delete_query_body,
+    _docs_json,
+    _get_params,
+    _JsonStream,
+    _optimize_params,
+    _SearchBase,
+)
+from solrcloudpy.utils import SolrException, _compress_body
+
+from .utils import AsyncCollectionBase, _run_all
+
+
+class AsyncSolrCollectionSearch(_SearchBase, AsyncCollectionBase):
+    """
+    Performs search-related operations on a collection
+    """
+
+    _batcher_class = AsyncGetBatcher
+    _router_class = AsyncCompositeIdRouter
+
+    async def get_unique_key(self):
+        """
+        Retrieves the name of the uniqueKey field of this collection, once
+        :return: the field name
+        :rtype: str
+        """
+        if self._unique_key is None:
+            response = await self.client.get("%s/schema/uniquekey" % self.name)
+            self._unique_key = response.result.dict.get("uniqueKey", "id")
+        return self._unique_key
+
+    async def _get_response(self, path, params=None, method="GET", body=None):
+        """
+        Retrieves a response from the solr client
+
+        :param path: the URL of the solr endpoint
+        :type path: str
+        :param params: query params
+        :type params: dict
+        :param method: the request method
+        :type method: str
+        :param body: the request body
+        :type body: str
+        :return: the response
+        :rtype: SolrResponse
+        """
+        return await self.client.request(path, params=params, method=method, body=body)
+
+    async def _get_read_response(self, path, params=None, method="GET", body=None):
+        """
+        Retrieves a response from a read-only solr endpoint. If the connection has a
+        `hedge_delay`, slow requests are hedged by sending a copy to another server.
+
+        :param path: the URL of the solr endpoint
+        :type path: str
+        :param params: query params
+        :type params: dict
+        :param method: the request method
+        :type method: str
+        :param body: the request body
+        :type body: str
+        :return: the response
+        :rtype: SolrResponse
+        """
+        params = self._read_params(params)
+        if self.connection.hedge_delay is None:
+            return await self._get_response(path, params, method, body)
+
+        start = time.time()
+        delay = self._hedging_delay()
+        if delay is None:
+            response = await self._get_response(path, params, method, body)
+        else:
+            response = await self.client.hedged_request(
+                path, delay, params, method, body
+            )
+        self._latencies.record(time.time() - start)
+        return response
+
+    async def _update(self, body, params=None):
+        """
+        Sends and update request to the solr collection in JSON format
+        :param body: the update JSON string, or an iterable of the bytes to send
+        :type: str
+        :return: the response from Solr
+        :rtype: SolrResponse
+        :raise: SolrException
+        """
+        path = "%s/update/json" % self.name
+        body, headers = _compress_body(self.connection, body)
+        try:
+            resp = await self.client.request(
+                path, params=params, method="POST", body=body, headers=headers
+            )
+        finally:
+            self._invalidate_cache()
+        return self._update_result(resp)
+
+    async def search(self, params, method="GET", body=None, compact=False):
+        """
+        Search this index
+
+        :param params: query parameters. Here `params` can be a :class:`~solrcloudpy.parameters.SearchOptions` instance, a dictionary or a list of tuples
+        :type params: SearchOptions
+        :type params: dict
+        :type params: list
+        :param method: the request method
+        :type method: str
+        :param body: the request body
+        :type body: str
+        :param compact: whether to return the documents as compact :class:`~solrcloudpy.collection.documents.SolrDocument` instances instead of dicts, which saves memory on large pages
+        :type compact: bool
+        :return: the response from Solr, from the result cache of the connection if it has one
+        :rtype: SolrResponse
+        """
+        key, response, generation = self._cached_search(params, method, body)
+        if response is None:
+            response = await self._get_read_response(
+                "%s/select" % self.name, params, method, body
+            )
+            self._cache_response(key, response, generation)
+        if compact:
+            response = compact_response(response, params)
+        return response
+
+    async def multi_search(
+        self, queries, max_concurrency=None, timeout=None, compact=False
+    ):
+        """
+        Runs searches on this index concurrently, see :meth:`~solrcloudpy.aio.AsyncSolrConnection.multi_search`
+
+        :param queries: the parameters of each search, :class:`~solrcloudpy.parameters.SearchOptions` instances or dictionaries
+        :type queries: list
+        :param max_concurrency: the maximum number of searches sent at the same time. Defaults to the `pool_maxsize` of the connection
+        :type max_concurrency: int
+        :param timeout: the number of seconds each search may take, from the moment it is sent
+        :type timeout: float
+        :param compact: whether to return the documents as compact :class:`~solrcloudpy.collection.documents.SolrDocument` instances
+        :type compact: bool
+        :return: the response of each search, in order, or the exception it raised
+        :rtype: list
+        """
+        calls = [
+            functools.partial(self.search, params, compact=compact)
+            for params in queries
+        ]
+        if max_concurrency is None:
+            max_concurrency = self.connection.pool_maxsize
+        return await _run_all(calls, max_concurrency, timeout)
+
+    async def scan(self, params, rows=None, prefetch=False, compact=False):
+        """
+        Iterates over all the documents matching a query, page by page, with `cursorMark`.
+        See :meth:`solrcloudpy.collection.search.SolrCollectionSearch.scan`
+
+            >>> async for doc in coll.scan({"q": "*:*"}, prefetch=True):
+            ...     print(doc["id"])
+
+        :param params: query parameters. Here `params` can be a :class:`~solrcloudpy.parameters.SearchOptions` instance or a dictionary
+        :type params: SearchOptions
+        :type params: dict
+        :param rows: the number of documents per page. Defaults to the `rows` parameter, or 1000
+        :type rows: int
+        :param prefetch: whether to fetch the next page while the current one is consumed
+        :type prefetch: bool
+        :param compact: whether to return the documents as compact :class:`~solrcloudpy.collection.documents.SolrDocument` instances
+        :type compact: bool
+        :return: an asynchronous generator of documents
+        :rtype: async_generator
+        :raise: SolrException
+        """
+        params = _cursor_params(params, await self.get_unique_key(), rows)
+
+        async def fetch(cursor):
+            page = dict(params)
+            page["cursorMark"] = cursor
+            # pages are not worth caching, and would evict entries that are
+            response = await self._get_read_response("%s/select" % self.name, page)
+            return self._scan_page(response, page, compact)
+
+        task = None
+        try:
+            cursor = "*"
+            docs, next_cursor = await fetch(cursor)
+            while True:
+                more = next_cursor != cursor and len(docs) > 0
+                if more and prefetch:
+                    task = asyncio.ensure_future(fetch(next_cursor))
+                for doc in docs:
+                    yield doc
+                if not more:
+                    return
+                cursor = next_cursor
+                if task is not None:
+                    docs, next_cursor = await task
+                    task = None
+                else:
+                    docs, next_cursor = await fetch(cursor)
+        finally:
+            if task is not None:
+                task.cancel()
+
+    async def clustering(self, params):
+        """
+        Perform clustering on a query
+
+        :param params: query parameters
+        :type params: SearchOptions
+        :type params: dict
+        :return: the response from Solr
+        :rtype: SolrResponse
+        """
+        return await self._get_read_response("%s/clustering" % self.name, params)
+
+    async def mlt(self, params):
+        """
+        Perform MLT on this index
+
+        :param params: query parameters
+        :type params: SearchOptions
+        :type params: dict
+        :return: the response from Solr
+        :rtype: SolrResponse
+        """
+        return await self._get_read_response("%s/mlt" % self.name, params)
+
+    async def get(self, ids, params=None):
+        """
+        Retrieves documents by id with the real-time get handler, which also sees
+        the documents that are not committed yet
+
+        :param ids: the id of a document, or a list of ids
+        :type ids: str
+        :type ids: list
+        :param params: other query parameters, e.g. `fl` or `fq`
+        :type params: dict
+        :return: the response from Solr, whose `response.docs` are the documents found
+        :rtype: SolrResponse
+        """
+        params = _get_params(ids, params)
+        return await self._get_read_response("%s/get" % self.name, params)
+
+    async def _get_docs(self, ids):
+        """
+        :param ids: document ids
+        :type ids: list
+        :return: the documents found, by id
+        :rtype: dict
+        """
+        response = await self.get(ids)
+        return _docs_by_id(response.result, await self.get_unique_key())
+
+    async def lookup(self, doc_id):
+        """
+        Retrieves a document by id with the real-time get handler. Lookups made from other
+        coroutines within the `get_batch_window` of the connection are sent in the same request
+
+        :param doc_id: the id of the document
+        :type doc_id: str
+        :return: the document, or `None` if there is no such document
+        :rtype: dict
+        :raise: SolrException
+        """
+        if self.connection.get_batch_window is None:
+            docs = await self._get_docs([doc_id])
+            return docs.get(str(doc_id))
+        return await self._get_batcher.load(doc_id)
+
+    async def add(self, docs, params=None, stream=False):
+        """
+        Add a list of document to the collection.
+        See :meth:`solrcloudpy.collection.search.SolrCollectionSearch.add` for the routing
+        of updates to shard leaders and the streaming of documents
+
+        :param docs: a list of documents to add
+        :type docs: iterable<dict>
+        :param stream: whether to serialize the documents while sending them
+        :type stream: bool
+        :return: the response from Solr
+        :rtype: SolrResponse
+        :raise: SolrException
+        """
+        if isinstance(docs, dict):
+            docs = [docs]
+        streamed = stream or not isinstance(docs, (list, tuple))
+        if self.connection.route_updates:
+            if not streamed:
+                return await self._routed_add(docs, params)
+            result = None
+            for chunk in _chunks(docs, ROUTED_CHUNK_SIZE):
+                result = await self._routed_add(chunk, params)
+            if result is None:
+                result = await self._routed_add([], params)
+            return result
+        if streamed:
+            return (await self._update(_JsonStream(docs), params)).result
+        return (await self._update(_docs_json(docs), params)).result
+
+    async def _routed_add(self, docs, params=None):
+        """
+        Sends each document to the leader of its shard, waiting for all of them to answer
+
+        :param docs: a list of documents to add
+        :type docs: list<dict>
+        :return: the response from Solr
+        :rtype: SolrResponse
+        :raise: SolrException naming the shards the documents could not be added to
+        """
+        batches = await self.router.partition(docs)
+        if not batches:
+            return (await self._update(_docs_json(docs), params)).result
+
+        leaders = list(batches)
+        calls = [
+            self._update_leader(leader, batches[leader], params) for leader in leaders
+        ]
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        return self._routed_result(leaders, results)
+
+    async def _update_leader(self, leader, docs, params=None):
+        """
+        Sends documents to a shard leader, falling back on any server if the leader fails
+
+        :param leader: the shard, and the base URL and core name of its leader
+        :type leader: tuple
+        :param docs: the documents of that shard
+        :type docs: list<dict>
+        :return: the response from Solr
+        :rtype: SolrResponse
+        :raise: SolrException
+        """
+        body = _docs_json(docs)
+        _, url, core = leader
+        try:
+            compressed, headers = _compress_body(self.connection, body)
+            resp = await self.client.request(
+                "%s/update/json" % core,
+                params=params,
+                method="POST",
+                body=compressed,
+                servers=[url],
+                headers=headers,
+            )
+        except SolrException as e:
+            if not self._leader_failed(url, e):
+                raise
+            return (await self._update(body, params)).result
+
+        self._invalidate_cache()
+        return self._update_result(resp).result
+
+    async def update_fields(self, updates, params=None):
+        """
+        Applies atomic updates, which change some fields of documents without sending them
+        whole, in a single request. See :mod:`solrcloudpy.collection.updates`
+
+        :param updates: the updates
+        :type updates: list<AtomicUpdate>
+        :param params: query parameters, e.g. `commitWithin`
+        :type params: dict
+        :return: the response from Solr
+        :rtype: SolrResponse
+        :raise: SolrException, e.g. if a document does not have the version of its update
+        """
+        unique_key = await self.get_unique_key()
+        return await self.add([update.to_doc(unique_key) for update in updates], params)
+
+    async def delete(self, query, commit=True):
+        """
+        Delete documents in a collection.
+
+        :param query: query parameters. Here `query` can be a :class:`~solrcloudpy.parameters.SearchOptions` instance, or a dictionary
+        :type query: SearchOptions
+        :type query: dict
+        :param commit: whether to commit the change or not
+        :type commit: bool
+        :return: the response
+        :rtype: SolrResponse
+        :raise: SolrException
+        """
+        response = await self._update(_delete_query_body(query))
+        if commit:
+            await self.commit()
+        return response
+
+    async def delete_ids(self, ids, chunk_size=1000, params=None):
+        """
+        Delete documents by id, sending at most `chunk_size` ids per request.
+        Unlike :meth:`delete`, this does not commit
+
+        :param ids: the ids of the documents
+        :type ids: iterable
+        :param chunk_size: the maximum number of ids sent in one request
+        :type chunk_size: int
+        :param params: query parameters, e.g. `commitWithin`
+        :type params: dict
+        :return: the response from Solr to the last request, or `None` if there were no ids
+        :rtype: SolrResponse
+        :raise: SolrException
+        """
+        result = None
+        for chunk in _chunks(ids, chunk_size):
+            result = (await self._update(json.dumps({"delete": chunk}), params)).result
+        return result
+
+    async def optimize(self, wait_searcher=False, soft_commit=False, max_segments=1):
+        """
+        Optimize a collection for searching
+
+        :param wait_searcher: whether to make the changes to the collection visible or not by opening a new searcher
+        :type wait_searcher: bool
+        :param soft_commit: whether to perform a soft commit when optimizing
+        :type soft_commit: bool
+        :param max_segments: the maximum number of segments in the index after optimization
+        :type max_segments: int
+        :return: the solr response
+        :rtype: SolrResponse
+        :raise: SolrException
+        """
+        params = _optimize_params(wait_searcher, soft_commit, max_segments)
+        try:
+            response = await self._get_response("%s/update" % self.name, params=params)
+        finally:
+            self._invalidate_cache()
+        return response.result
+
+    async def commit(self):
+        """
+        Commit changes to a collection
+
+        :return: the solr response
+        :rtype: SolrResponse
+        :raise: SolrException
+        """
+        return (await self._update('{"commit":{}}', {})).result
+
+
+class AsyncSolrCollectionAdmin(AsyncCollectionBase):
+    """
+    Manage and administer a collection
+    """
+
+    async def exists(self):
+        """
+        Finds if a collection exists in the cluster
+        :return: whether a collection exists in the cluster
+        :rtype: bool
+        """
+        return self.name in (await self.connection.cluster_state())["collections"]
+
+    async def create(self, replication_factor=1, force=False, **kwargs):
+        """
+        Create a collection. See :meth:`solrcloudpy.collection.SolrCollection.create` for the parameters.
+
+        The collections API only answers once the cores of the new collection are created.
+
+        :param replication_factor: an integer indicating the number of replcas for this collection
+        :type replication_factor: int
+        :param force: a boolean value indicating whether to force the operation
+        :type force: bool
+        :param kwargs: additional parameters to be passed to this operation
+        :return: the collection
+        :rtype: AsyncSolrCollection
+        :raise: SolrException
+        """
+        params = _create_params(self.name, replication_factor, **kwargs)
+        if force or not await self.exists():
+            res = await self._admin(params)
+            if not hasattr(res, "success"):
+                raise SolrException(str(res))
+
+        return self.connection[self.name]
+
+    async def is_alias(self):
+        """
+        Determines if this collection is an alias for a 'real' collection
+        :rtype: bool
+        """
+        return self.name in (await self.connection.cluster_state()).get("aliases", {})
+
+    async def state(self):
+        """
+        Get the state of this collection
+
+        :return: the state of this collection
+        :rtype: dict
+        """
+        return _collection_state(await self.connection.cluster_state(), self.name)
+
+    async def index_info(self):
+        """
+        Get a high-level overview of this collection's index
+        :return: information about an index
+        :rtype: dict
+        """
+        return _index_info((await self.client.get("%s/admin/luke" % self.name)).result)
+
+    async def _admin(self, params, asynchronous=False):
+        """
+        Sends a request to the collections API. Such requests change the cluster, so the cached cluster state is dropped.
+
+        :param params: the parameters of the collections API request
+        :type params: dict
+        :param asynchronous: whether to perform the action asynchronously
+        :type asynchronous: bool
+        :return: the response of the collections API
+        """
+        response = await self.client.get(
+            "admin/collections", params, asynchronous=asynchronous
+        )
+        self.connection.invalidate_cluster_state()
+        if asynchronous:
+            return response
+        return response.result
+
+    async def drop(self):
+        """
+        Delete a collection
+
+        :return: a response associated with the delete request
+        :rtype: SolrResult
+        """
+        return await self._admin({"action": "DELETE", "name": self.name})
+
+    async def reload(self):
+        """
+        Reload a collection
+
+        :return: a response associated with the reload request
+        :rtype: SolrResult
+        """
+        return await self._admin({"action": "RELOAD", "name": self.name})
+
+    async def split_shard(self, shard, ranges=None, split_key=None):
+        """
+        Split a shard into two new shards
+
+        :param shard: The name of the shard to be split.
+        :type shard: str
+        :param ranges: A comma-separated list of hash ranges in hexadecimal e.g. ranges=0-1f4,1f5-3e8,3e9-5dc
+        :type ranges: str
+        :param split_key: The key to use for splitting the index
+        :type split_key: str
+        :return: a response associated with the splitshard request
+        :rtype: SolrResult
+        """
+        params = _split_shard_params(self.name, shard, ranges, split_key)
+        return await self._admin(params)
+
+    async def create_shard(self, shard, create_node_set=None):
+        """
+        Create a new shard
+
+        :param shard: The name of the shard to be created.
+        :type shard: str
+        :param create_node_set: Allows defining the nodes to spread the new collection across.
+        :type create_node_set: str
+        :return: a response associated with the createshard request
+        :rtype: SolrResult
+        """
+        params = _create_shard_params(self.name, shard, create_node_set)
+        return await self._admin(params)
+
+    async def create_alias(self, alias):
+        """
+        Create or modify an alias for a collection
+
+        :param alias: the name of the alias
+        :type alias: str
+        :return: a response associated with the createalias request
+        :rtype: SolrResult
+        """
+        return await self._admin(
+            {"action": "CREATEALIAS", "name": alias, "collections": self.name}
+        )
+
+    async def delete_alias(self, alias):
+        """
+        Delete an alias for a collection
+
+        :param alias: the name of the alias
+        :type alias: str
+        :return: a response associated with the deletealias request
+        :rtype: SolrResult
+        """
+        return await self._admin({"action": "DELETEALIAS", "name": alias})
+
+    async def delete_replica(self, replica, shard):
+        """
+        Delete a replica
+
+        :param replica:  The name of the replica to remove.
+        :type replica: str
+        :param shard: The name of the shard that includes the replica to be removed.
+        :type shard: str
+        :return: a response associated with the deletereplica request
+        :rtype: SolrResult
+        """
+        return await self._admin(_delete_replica_params(self.name, replica, shard))
+
+    async def backup(self, backup_name, location=None, repository=None):
+        """
+        Creates a backup for a collection
+
+        :param backup_name: the name of the backup we will use for storage & restoration
+        :type backup_name: str
+        :param location: an optional param to define where on the shared filesystem we should store the backup
+        :type location: str
+        :param repository: an optional param to define a repository type. filesystem is the default
+        :type repository: str
+        :return: an async response
+        :rtype: AsyncResponse
+        """
+        params = _backup_restore_params(
+            "BACKUP", self.name, backup_name, location, repository
+        )
+        return await self._admin(params, asynchronous=True)
+
+    async def restore(self, backup_name, location=None, repository=None):
+        """
+        Restores a backup for a collection
+
+        :param backup_name: the name of the backup we will use for restoration
+        :type backup_name: str
+        :param location: an optional param to define where on the shared filesystem we should access the backup
+        :type location: str
+        :param repository: an optional param to define a repository type. filesystem is the default
+        :type repository: str
+        :return: an async response
+        :rtype: AsyncResponse
+        """
+        params = _backup_restore_params(
+            "RESTORE", self.name, backup_name, location, repository
+        )
+        return await self._admin(params, asynchronous=True)
+
+    async def request_status(self, async_response):
+        """
+        Retrieves the status of a request for a given async result
+        :param async_response: the response object that includes its async_id
+        :type async_response: AsyncResponse
+        :return: the status of the request
+        :rtype: SolrResult
+        """
+        params = _request_status_params(async_response)
+        return (await self.client.get("admin/collections", params)).result
+
+
+class AsyncSolrCollection(AsyncSolrCollectionAdmin, AsyncSolrCollectionSearch):
+    def __repr__(self):
+        return "AsyncSolrCollection<%s>" % self.name
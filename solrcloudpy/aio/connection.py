@@ -0,0 +1,344 @@
+"""
+Connecting to a set of solr servers from an asyncio event loop.
+
+:class:`AsyncSolrConnection` mirrors :class:`~solrcloudpy.connection.SolrConnection`,
+except that every call that talks to solr is a coroutine:
+
+    >>> from solrcloudpy.aio import AsyncSolrConnection
+    >>> async with AsyncSolrConnection() as conn:
+    ...     await conn.list()
+    ...     response = await conn['collection1'].search({'q': '*:*'})
+    [u'collection1']
+
+"""
+import asyncio
+import functools
+import json
+from collections import OrderedDict
+
+import semver
+
+from solrcloudpy.balancer import get_balancer
+from solrcloudpy.breaker import get_circuit_breaker
+from solrcloudpy.cache import get_result_cache
+from solrcloudpy.retry import get_retry_policy
+from solrcloudpy.connection import (
+    MAX_SUPPORTED_VERSION,
+    MIN_SUPPORTED_VERSION,
+    RESPONSE_FORMATS,
+    _cached_collection,
+    _ClusterState,
+    _collections_from_tree,
+    _health_status,
+    _nodes_from_tree,
+    _unhealthy_replicas,
+)
+
+from . import collection
+from .utils import _AsyncRequest, _run_all
+
+
+class AsyncSolrConnection(object):
+
+    """
+    Asynchronous connection to a solr server or several ones
+
+    :param server: The server. Can be a single one or a list of servers. Example  ``localhost:8983`` or ``[localhost,solr1.domain.com:8983]``.
+    :type server: str
+    :param auth: HTTP basic authentication, as an ``aiohttp.BasicAuth`` instance
+    :type auth: aiohttp.BasicAuth
+    :param user: HTTP basic auth user name
+    :type user: str
+    :param password: HTTP basic auth password
+    :type password: str
+    :param timeout: timeout for HTTP requests
+    :type timeout: int
+    :param webappdir: the solr webapp directory; defaults to 'solr'
+    :type webappdir: str
+    :param version: the solr version we're currently running. must be semver compliant
+    :type version: str
+    :param request_retries: number of times to retry a request against the same server. particularly useful for load-balancing or proxy situations.
+    :type request_retries: int
+    :param use_https: True if https is required
+    :type use_https: bool
+    :param keep_alive: whether to keep HTTP connections open and reuse them across requests. The default value is ``True``.
+    :type keep_alive: bool
+    :param pool_maxsize: the maximum number of connections open to each server at once
+    :type pool_maxsize: int
+    :param pool_idle_timeout: number of seconds after which an idle connection is closed instead of being reused
+    :type pool_idle_timeout: float
+    :param max_concurrency: the maximum number of requests in flight at once on this connection
+    :type max_concurrency: int
+    :param route_updates: whether to send added documents straight to the leader of their shard, by hashing their ids like Solr's `compositeId` router does. The default value is ``False``.
+    :type route_updates: bool
+    :param cluster_state_ttl: number of seconds the cluster state returned by CLUSTERSTATUS is cached for. It is also dropped whenever this client changes the cluster through the collections API. The default value is ``0``, which fetches it on every access.
+    :type cluster_state_ttl: float
+    :param balancer: the strategy used to pick the server of each request: ``random`` (the default), ``least_outstanding``, ``ewma``, ``p2c`` or a :class:`~solrcloudpy.balancer.Balancer` instance
+    :type balancer: str
+    :param circuit_breaker: whether to stop sending requests to servers that keep failing until they recover. ``True`` (the default) uses a :class:`~solrcloudpy.breaker.CircuitBreaker` with default settings, so a server that failed 3 requests in a row gets no requests for a while. This is a change from versions up to 4.0.1, which always tried every server: pass ``False`` to keep that behaviour, or pass your own instance.
+    :type circuit_breaker: bool
+    :param retry_policy: decides whether and when failed requests are retried. Defaults to a :class:`~solrcloudpy.retry.RetryPolicy` with default settings, which waits before each retry with an exponential backoff, honors `Retry-After`, and gives up once retries exceed a budget of 20% of the requests. This is a change from versions up to 4.0.1, which retried at once and without limit: ``RetryPolicy(backoff_base=0, budget_ratio=None)`` comes closest to that.
+    :type retry_policy: RetryPolicy
+    :param hedge_delay: when set, a search, mlt or clustering request that got no response after this delay is also sent to another server, and the first response is used. Either a number of seconds, or a percentile of the recent response times of the collection such as ``"p95"``. The default value is ``None``, which disables hedging.
+    :type hedge_delay: float
+    :param response_format: the format of the responses to search, mlt and clustering requests, either ``"json"`` or ``"javabin"``. Javabin only saves network: responses are smaller, but the pure python decoder takes about 5 to 8 times as much CPU as the JSON one, so it is not recommended for CPU-bound clients. See :mod:`solrcloudpy.javabin`. The default value is ``"json"``
+    :type response_format: str
+    :param accept_compressed: whether to let servers send compressed responses. The default value is ``True``
+    :type accept_compressed: bool
+    :param compress_updates: whether to gzip the bodies of update requests. Solr decompresses them transparently. The default value is ``False``
+    :type compress_updates: bool
+    :param compression_level: the gzip compression level of update bodies, from 1 (fastest) to 9 (smallest). The default value is ``6``
+    :type compression_level: int
+    :param compression_min_size: the size in bytes under which update bodies are sent uncompressed. The default value is ``1024``
+    :type compression_min_size: int
+    :param result_cache: `True` to cache search responses in a default :class:`~solrcloudpy.cache.ResultCache`, or a :class:`~solrcloudpy.cache.ResultCache` instance. The default value is ``None``, which disables caching
+    :type result_cache: ResultCache
+    :param max_query_length: the length of the query string above which a `GET` request is sent as a `POST` with its parameters form-encoded in the body, so that long queries don't hit the URL length limit of the servers. The default value is ``4096``. ``None`` disables switching
+    :type max_query_length: int
+    :param get_batch_window: the number of seconds the single-id lookups of a collection are collected for, to be sent in one real-time get request. See :mod:`solrcloudpy.collection.realtime`. A lookup made while no other one is pending is sent at once, so only concurrent lookups wait for the window. The default value is ``0.002``. ``None`` sends each lookup on its own
+    :type get_batch_window: float
+    """
+
+    def __init__(
+        self,
+        server="localhost:8983",
+        auth=None,
+        user=None,
+        password=None,
+        timeout=10,
+        webappdir="solr",
+        version="7.7.0",
+        request_retries=1,
+        use_https=False,
+        keep_alive=True,
+        pool_maxsize=100,
+        pool_idle_timeout=30,
+        max_concurrency=500,
+        route_updates=False,
+        cluster_state_ttl=0,
+        balancer=None,
+        circuit_breaker=True,
+        retry_policy=None,
+        hedge_delay=None,
+        response_format="json",
+        accept_compressed=True,
+        compress_updates=False,
+        compression_level=6,
+        compression_min_size=1024,
+        result_cache=None,
+        max_query_length=4096,
+        get_batch_window=0.002,
+    ):
+        self.auth = auth
+        self.user = user
+        self.password = password
+        self.timeout = timeout
+        self.webappdir = webappdir
+        self.version = version
+        self.request_retries = request_retries
+        self.keep_alive = keep_alive
+        self.pool_maxsize = pool_maxsize
+        self.pool_idle_timeout = pool_idle_timeout
+        self.max_concurrency = max_concurrency
+        self.route_updates = route_updates
+        self.cluster_state_ttl = cluster_state_ttl
+        self.balancer = get_balancer(balancer)
+        self.circuit_breaker = get_circuit_breaker(circuit_breaker)
+        self.retry_policy = get_retry_policy(retry_policy)
+        self.hedge_delay = hedge_delay
+        if response_format not in RESPONSE_FORMATS:
+            raise ValueError(
+                "Unknown response format %r, expected one of %s"
+                % (response_format, ", ".join(RESPONSE_FORMATS))
+            )
+        self.response_format = response_format
+        self.accept_compressed = accept_compressed
+        self.compress_updates = compress_updates
+        self.compression_level = compression_level
+        self.compression_min_size = compression_min_size
+        self.result_cache = get_result_cache(result_cache)
+        self.max_query_length = max_query_length
+        self.get_batch_window = get_batch_window
+
+        if not semver.match(version, MIN_SUPPORTED_VERSION) and semver.match(
+            version, MAX_SUPPORTED_VERSION
+        ):
+            raise Exception("Unsupported version %s" % version)
+
+        self.zk_path = "/{webappdir}/admin/zookeeper".format(webappdir=self.webappdir)
+
+        protocol = "https" if use_https else "http"
+
+        self.url_template = "{protocol}://{{server}}/{webappdir}/".format(
+            protocol=protocol, webappdir=self.webappdir
+        )
+
+        if type(server) == str:
+            self.url = self.url_template.format(server=server)
+            self.servers = [self.url, self.url]
+        if type(server) == list:
+            self.servers = [self.url_template.format(server=a) for a in server]
+
+        self.client = _AsyncRequest(self)
+        # see `__getitem__`
+        self._collections = OrderedDict()
+
+        # see `cluster_state`. The lock is created in the event loop that uses it
+        self._cluster_state = _ClusterState()
+        self._cluster_state_lock = None
+
+    async def list(self):
+        """
+        Lists out the current collections in the cluster
+
+        :return: a list of collection names
+        :rtype: list
+        """
+        params = {"detail": "false", "path": "/collections"}
+        response = (await self.client.get(self.zk_path, params)).result
+        return _collections_from_tree(response)
+
+    async def cluster_health(self):
+        """
+        Determine the state of all nodes and collections in the cluster. Problematic nodes or
+        collections are returned, along with their state, otherwise an `OK` message is returned
+
+        :return: a dict representing the status of the cluster
+        :rtype: dict
+        """
+        cluster_state = await self.cluster_state()
+        return _health_status(_unhealthy_replicas(cluster_state["collections"]))
+
+    async def cluster_state(self):
+        """
+        The state of the cluster, as returned by the CLUSTERSTATUS action of the collections API.
+        It is cached for `cluster_state_ttl` seconds, and shared by all the collections of this connection.
+
+        :return: a dict with the `collections`, `aliases` and `live_nodes` of the cluster
+        :rtype: dict
+        """
+        if self._cluster_state_lock is None:
+            self._cluster_state_lock = asyncio.Lock()
+        async with self._cluster_state_lock:
+            state = self._cluster_state.get(self.cluster_state_ttl)
+            if state is None:
+                response = await self.client.get(
+                    "/{webappdir}/admin/collections".format(webappdir=self.webappdir),
+                    _ClusterState.params,
+                )
+                state = self._cluster_state.set(response.result)
+            return state
+
+    def invalidate_cluster_state(self):
+        """
+        Drops the cached cluster state, so that the next call to `cluster_state` fetches it again
+        """
+        self._cluster_state.invalidate()
+
+    async def cluster_leader(self):
+        """
+        Gets the cluster leader
+
+        :rtype: dict
+        :return: a dict with the json loaded from the zookeeper response related to the cluster leader request
+        """
+        params = {"detail": "true", "path": "/overseer_elect/leader"}
+        response = (await self.client.get(self.zk_path, params)).result
+        return json.loads(response["znode"]["data"])
+
+    async def live_nodes(self):
+        """
+        Lists all nodes that are currently online.
+        Assign the result to `servers` to send requests to all of them.
+
+        :return: a list of urls related to live nodes
+        :rtype: list
+        """
+        params = {"detail": "true", "path": "/live_nodes"}
+        response = (await self.client.get(self.zk_path, params)).result
+        return [self.url_template.format(server=a) for a in _nodes_from_tree(response)]
+
+    async def create_collection(self, collname, *args, **kwargs):
+        r"""
+        Create a collection.
+
+        :param collname: The collection name
+        :type collname: str
+        :param \*args: additional arguments
+        :param \*\*kwargs: additional named parameters
+
+        :return: the created collection
+        :rtype: AsyncSolrCollection
+        """
+        return await self[collname].create(*args, **kwargs)
+
+    async def multi_search(
+        self, queries, max_concurrency=None, timeout=None, compact=False
+    ):
+        """
+        Runs searches concurrently, so that they take about as long as the slowest one
+
+        :param queries: the searches, as `(collection name, params)` pairs whose params are a :class:`~solrcloudpy.parameters.SearchOptions` instance or a dictionary
+        :type queries: list
+        :param max_concurrency: the maximum number of searches sent at the same time. Defaults to the `pool_maxsize` of the connection
+        :type max_concurrency: int
+        :param timeout: the number of seconds each search may take, from the moment it is sent. A search that times out is cancelled
+        :type timeout: float
+        :param compact: whether to return the documents as compact :class:`~solrcloudpy.collection.documents.SolrDocument` instances
+        :type compact: bool
+        :return: the response of each search, in order, or the exception it raised. A failed search does not fail the others
+        :rtype: list
+        """
+        calls = [
+            functools.partial(self[name].search, params, compact=compact)
+            for name, params in queries
+        ]
+        if max_concurrency is None:
+            max_concurrency = self.pool_maxsize
+        return await _run_all(calls, max_concurrency, timeout)
+
+    async def close(self):
+        """
+        Closes the connections to solr
+        """
+        await self.client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def __getattr__(self, name):
+        """
+        Convenience method for retrieving a solr collection
+        :param name: the name of the collection
+        :type name: str
+        :return: AsyncSolrCollection
+        """
+        if "_collections" not in self.__dict__ or name.startswith("_"):
+            # see `SolrConnection.__getattr__`
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name):
+        """
+        Convenience method for retrieving a solr collection. Handles are cached, like the
+        ones of :class:`~solrcloudpy.connection.SolrConnection`
+        :param name: the name of the collection
+        :type name: str
+        :return: AsyncSolrCollection
+        """
+        return _cached_collection(
+            self._collections,
+            name,
+            lambda name: collection.AsyncSolrCollection(self, name),
+        )
+
+    def __repr__(self):
+        """
+        Representation in Python outputs
+        :return: string representation
+        :rtype: str
+        """
+        return "AsyncSolrConnection %s" % str(self.servers)
@@ -0,0 +1,387 @@
+"""
+Asynchronous transport to a set of solr servers, built on `aiohttp`
+"""
+import asyncio
+import json
+import logging
+
+import aiohttp
+from yarl import URL
+
+from solrcloudpy.utils import (
+    AsyncResponse,
+    SolrException,
+    SolrResponse,
+    _error_message,
+    _query_and_body,
+    _request_headers,
+    _request_params,
+    _ServerPool,
+)
+
+try:
+    from urllib.parse import urljoin
+except ImportError:
+    from urlparse import urljoin
+
+logger = logging.getLogger(__name__)
+
+
+async def _run_all(calls, max_concurrency, timeout=None):
+    """
+    Runs coroutines concurrently, at most `max_concurrency` at a time
+
+    :param calls: functions returning the coroutines to run
+    :type calls: list
+    :param max_concurrency: the maximum number of coroutines running at the same time
+    :type max_concurrency: int
+    :param timeout: the number of seconds each coroutine may run for, from the moment it starts.
+        ``None`` waits for as long as they take
+    :type timeout: float
+    :return: the result of each coroutine, in order, or the exception it raised.
+        A coroutine that timed out is cancelled, and gets a :class:`~solrcloudpy.utils.SolrException`
+    :rtype: list
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(call):
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(call(), timeout)
+            except asyncio.TimeoutError:
+                return SolrException("Timed out after %.3fs" % timeout)
+            except Exception as e:
+                return e
+
+    return list(await asyncio.gather(*[run(call) for call in calls]))
+
+
+class _BufferedResponse(object):
+
+    """
+    A fully read `aiohttp` response, exposing the subset of the `requests.Response`
+    interface that :class:`~solrcloudpy.utils.SolrResponse` relies on
+    """
+
+    def __init__(self, response, content):
+        """
+        :param response: the `aiohttp` response
+        :type response: aiohttp.ClientResponse
+        :param content: the body of the response
+        :type content: bytes
+        """
+        self.status_code = response.status
+        self.headers = response.headers
+        self.url = str(response.url)
+        self.content = content
+        self.encoding = response.charset or "utf-8"
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, "replace")
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class _AsyncBody(object):
+
+    """
+    Sends an iterable of bytes, e.g. a streamed update, as a chunked request body.
+    Each attempt to send it iterates over the wrapped body again.
+
+    `aiohttp` reports the errors raised while sending the body as connection errors,
+    so the ones of the body itself are kept in `error`, not to be retried
+    """
+
+    def __init__(self, chunks):
+        """
+        :param chunks: the body
+        :type chunks: iterable<bytes>
+        """
+        self.chunks = chunks
+        self.error = None
+
+    async def __aiter__(self):
+        try:
+            for chunk in self.chunks:
+                yield chunk
+        except SolrException as e:
+            self.error = e
+            raise
+
+
+class _AsyncRequest(object):
+
+    """
+    Issues requests to solr from an asyncio event loop.
+
+    Servers are picked and retried exactly like :class:`~solrcloudpy.utils._Request` does.
+    Connections are pooled and kept alive per server, and at most `max_concurrency`
+    requests are in flight at once.
+    """
+
+    def __init__(self, connection):
+        """
+        :param connection: the solr connection
+        :type connection: AsyncSolrConnection
+        """
+        self.connection = connection
+        self.timeout = aiohttp.ClientTimeout(total=connection.timeout)
+        self._session = None
+        self._semaphore = None
+
+        self.auth = None
+        if self.connection.auth:
+            self.auth = self.connection.auth
+        elif self.connection.user:
+            self.auth = aiohttp.BasicAuth(
+                self.connection.user, self.connection.password or ""
+            )
+
+    def _get_session(self):
+        """
+        Opens the HTTP session on first use, so that it is bound to the running event loop
+
+        :rtype: aiohttp.ClientSession
+        """
+        if self._session is None or self._session.closed:
+            if self.connection.keep_alive:
+                connector = aiohttp.TCPConnector(
+                    limit=0,
+                    limit_per_host=self.connection.pool_maxsize,
+                    keepalive_timeout=self.connection.pool_idle_timeout,
+                )
+            else:
+                connector = aiohttp.TCPConnector(limit=0, force_close=True)
+            headers = None
+            if not self.connection.accept_compressed:
+                headers = {"Accept-Encoding": "identity"}
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                auth=self.auth,
+                timeout=self.timeout,
+                headers=headers,
+            )
+            self._semaphore = asyncio.Semaphore(self.connection.max_concurrency)
+        return self._session
+
+    async def close(self):
+        """
+        Closes all the pooled connections
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def request(
+        self,
+        path,
+        params=None,
+        method="GET",
+        body=None,
+        asynchronous=False,
+        servers=None,
+        attempted=None,
+        headers=None,
+    ):
+        """
+        Send a request to a collection
+
+        :param path: The relative path of the request
+        :type path: str
+        :param params: The parameters of this request. Has to be an objects that implements `iteritems`. Most often this will be an instance :class:`~solrcloudpy.parameter.SearchOptions` or a dictionary
+        :type params: SearchOptions
+        :type params: dict
+        :param method: The request method, e.g. `GET`
+        :type method: str
+        :param body: The request body, if any -- should be a json string
+        :type body: str
+        :param asynchronous: whether to perform the action asynchronously (only for collections API)
+        :type asynchronous: bool
+        :param servers: the servers this request may be sent to. Defaults to all the servers of the connection
+        :type servers: list
+        :param attempted: a list to append the servers this request is sent to, if any
+        :type attempted: list
+        :param headers: headers to send in addition to the default ones
+        :type headers: dict
+
+        :returns response: an instance of :class:`~solrcloudpy.utils.SolrResponse`
+        :rtype: SolrResponse
+        :raise: SolrException
+        """
+        resparams, async_id = _request_params(params, asynchronous)
+        query, method, body, form_headers = _query_and_body(
+            self.connection, resparams, method, body
+        )
+        extra_headers = headers
+        headers = _request_headers(method, body)
+        headers.update(form_headers or {})
+        headers.update(extra_headers or {})
+        if body is not None and not isinstance(body, (str, bytes, dict)):
+            body = _AsyncBody(body)
+        servers = _ServerPool(self.connection, servers, attempted)
+        session = self._get_session()
+
+        while True:
+            host = servers.choose()
+            # the query string is already encoded, aiohttp would encode it again
+            url = urljoin(host, path)
+            fullpath = URL("%s?%s" % (url, query) if query else url, encoded=True)
+            # only set once the whole response was read: failing to read the body,
+            # e.g. with a timeout, is a connection failure whatever the status was
+            r = None
+            content = b""
+            success = False
+            healthy = False
+            try:
+                async with self._semaphore:
+                    async with session.request(
+                        method, fullpath, data=body, headers=headers
+                    ) as response:
+                        content = await response.read()
+                        r = response
+                        healthy = r.status < 500
+                        r.raise_for_status()
+                success = True
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if isinstance(body, _AsyncBody) and body.error is not None:
+                    # e.g. a one-shot iterable of documents that can't be sent again,
+                    # which is not the fault of the server
+                    healthy = True
+                    raise body.error
+                logger.exception("Failed to connect to server at %s. e=%s", host, e)
+            finally:
+                servers.finished(host, healthy)
+
+            if not success:
+                if r is None:
+                    delay = servers.failed(host)
+                else:
+                    response = _BufferedResponse(r, content)
+                    delay = servers.failed(
+                        host,
+                        r.status,
+                        r.headers.get("Retry-After"),
+                        _error_message(response),
+                    )
+                await asyncio.sleep(delay)
+                continue
+
+            response = _BufferedResponse(r, content)
+            if asynchronous:
+                return AsyncResponse(response, async_id)
+            return SolrResponse(response)
+
+    async def hedged_request(self, path, delay, params=None, method="GET", body=None):
+        """
+        Sends a read-only request, and if it did not complete within `delay` seconds,
+        sends a copy of it to another server. The first response wins and the other
+        request is cancelled. Copies are only sent if the retry budget of the connection allows it.
+
+        :param path: The relative path of the request
+        :type path: str
+        :param delay: number of seconds to wait for before sending a copy of the request
+        :type delay: float
+        :param params: The parameters of this request
+        :type params: SearchOptions
+        :type params: dict
+        :param method: The request method, e.g. `GET`
+        :type method: str
+        :param body: The request body, if any -- should be a json string
+        :type body: str
+
+        :returns response: an instance of :class:`~solrcloudpy.utils.SolrResponse`
+        :rtype: SolrResponse
+        :raise: SolrException
+        """
+        attempted = []
+        primary = asyncio.ensure_future(
+            self.request(path, params, method, body, attempted=attempted)
+        )
+        pending = set([primary])
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+
+            others = [s for s in set(self.connection.servers) if s not in attempted]
+            if not others or not self.connection.retry_policy.allow_retry():
+                return await primary
+
+            logger.debug("No response after %.3fs, hedging request to %s", delay, path)
+            pending.add(
+                asyncio.ensure_future(
+                    self.request(path, params, method, body, servers=others)
+                )
+            )
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    return task.result()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def update(self, path, params=None, body=None, asynchronous=False):
+        """
+        Posts an update request to Solr
+
+        :param path: the path to the collection
+        :type path: str
+        :param params: query params
+        :type params: dict
+        :param body: the request body, a json string
+        :type body: str
+        :param asynchronous: whether to perform the action asynchronously (only for collections API)
+        :type asynchronous: bool
+        :returns response: an instance of :class:`~solrcloudpy.utils.SolrResponse`
+        :rtype: SolrResponse
+        :raise: SolrException
+        """
+        return await self.request(
+            path, params=params, method="POST", body=body, asynchronous=asynchronous
+        )
+
+    async def get(self, path, params=None, asynchronous=False):
+        """
+        Sends a get request to Solr
+
+        :param path: the path to the collection
+        :type path: str
+        :param params: query params
+        :type params: dict
+        :param asynchronous: whether to perform the action asynchronously (only for collections API)
+        :type asynchronous: bool
+        :returns response: an instance of :class:`~solrcloudpy.utils.SolrResponse`
+        :rtype: SolrResponse
+        :raise: SolrException
+        """
+        return await self.request(
+            path, params=params, method="GET", asynchronous=asynchronous
+        )
+
+
+class AsyncCollectionBase(object):
+
+    """
+    Base class for asynchronous operations on collections
+    """
+
+    def __init__(self, connection, name):
+        """
+        :param connection: the solr connection
+        :type connection: AsyncSolrConnection
+        :param name: the name of the collection
+        :type name: str
+        """
+        self.connection = connection
+        self.name = name
+        self.client = connection.client
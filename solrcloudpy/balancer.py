@@ -0,0 +1,203 @@
+"""
+Strategies to pick the server a request is sent to.
+
+A balancer is shared by all the requests of a :class:`~solrcloudpy.connection.SolrConnection`,
+so the statistics it keeps about each server outlive single requests.
+
+    >>> from solrcloudpy import SolrConnection
+    >>> conn = SolrConnection(["localhost:8983", "localhost:7574"], balancer="p2c")
+
+The available strategies are:
+
+ - `random`: pick any server (the default)
+ - `least_outstanding`: pick the server with the fewest requests in flight
+ - `ewma`: pick the server with the lowest moving average of response times
+ - `p2c`: pick two servers at random, and keep the one with the lowest load,
+   estimated from its moving average response time and its requests in flight
+
+Custom strategies can be passed as instances of a :class:`Balancer` subclass.
+"""
+import math
+import random
+import threading
+import time
+
+
+class Balancer(object):
+    """
+    Base class of all balancing strategies.
+    Subclasses must implement :meth:`choose`, and can override :meth:`started` and
+    :meth:`finished` to track the servers they pick.
+    """
+
+    def choose(self, servers):
+        """
+        Picks the server for the next attempt of a request
+
+        :param servers: the servers that can still be tried
+        :type servers: list
+        :return: one of the servers
+        :rtype: str
+        """
+        raise NotImplementedError
+
+    def started(self, server):
+        """
+        Called when a request is sent to a server
+
+        :param server: the server
+        :type server: str
+        """
+
+    def finished(self, server, elapsed, success):
+        """
+        Called when a request to a server completed or failed
+
+        :param server: the server
+        :type server: str
+        :param elapsed: the duration of the request, in seconds
+        :type elapsed: float
+        :param success: whether the request succeeded
+        :type success: bool
+        """
+
+
+class RandomBalancer(Balancer):
+    """
+    Picks a server at random
+    """
+
+    def choose(self, servers):
+        return random.choice(servers)
+
+
+class _StatsBalancer(Balancer):
+    """
+    Keeps the number of requests in flight and a moving average of response times for each server.
+    The average of a server that is not picked decays towards 0 over time, so that a server
+    that was slow for a while gets tried again eventually.
+    """
+
+    def __init__(self, alpha=0.3, failure_penalty=1.0, decay=10.0):
+        """
+        :param alpha: the weight of the latest response time in the moving average, between 0 and 1
+        :type alpha: float
+        :param failure_penalty: number of seconds added to the response time of failed requests
+        :type failure_penalty: float
+        :param decay: number of seconds for the average of an unused server to decay by a factor of `e`
+        :type decay: float
+        """
+        self.alpha = alpha
+        self.failure_penalty = failure_penalty
+        self.decay = decay
+        self.outstanding = {}
+        self.latency = {}
+        self._updated = {}
+        self._lock = threading.Lock()
+
+    def started(self, server):
+        with self._lock:
+            self.outstanding[server] = self.outstanding.get(server, 0) + 1
+
+    def finished(self, server, elapsed, success):
+        if not success:
+            elapsed += self.failure_penalty
+        with self._lock:
+            self.outstanding[server] = max(self.outstanding.get(server, 1) - 1, 0)
+            if server not in self.latency:
+                self.latency[server] = elapsed
+            else:
+                self.latency[server] = (
+                    self.alpha * elapsed + (1 - self.alpha) * self._latency(server)
+                )
+            self._updated[server] = time.time()
+
+    def _latency(self, server):
+        """
+        :return: the decayed moving average of the response times of a server
+        :rtype: float
+        """
+        latency = self.latency.get(server)
+        if latency is None:
+            return 0.0
+        age = time.time() - self._updated[server]
+        return latency * math.exp(-age / self.decay)
+
+    def _load(self, server):
+        """
+        :return: the estimated cost of sending one more request to a server
+        :rtype: float
+        """
+        return self._latency(server) * (self.outstanding.get(server, 0) + 1)
+
+    def _pick(self, servers, key):
+        """
+        :return: the server with the lowest `key`, ties being broken at random
+        :rtype: str
+        """
+        with self._lock:
+            keys = [(key(server), server) for server in servers]
+        best = min(k for k, _ in keys)
+        return random.choice([server for k, server in keys if k == best])
+
+
+class LeastOutstandingBalancer(_StatsBalancer):
+    """
+    Picks the server with the fewest requests in flight
+    """
+
+    def choose(self, servers):
+        return self._pick(servers, lambda server: self.outstanding.get(server, 0))
+
+
+class EWMABalancer(_StatsBalancer):
+    """
+    Picks the server with the lowest exponentially weighted moving average of response times.
+    Servers that were never used have an average of 0, so they are tried first.
+    """
+
+    def choose(self, servers):
+        return self._pick(servers, self._latency)
+
+
+class PowerOfTwoBalancer(_StatsBalancer):
+    """
+    Picks two servers at random, and keeps the less loaded one
+    """
+
+    def choose(self, servers):
+        if len(servers) < 2:
+            return servers[0]
+        first, second = random.sample(servers, 2)
+        with self._lock:
+            return first if self._load(first) <= self._load(second) else second
+
+
+BALANCERS = {
+    "random": RandomBalancer,
+    "least_outstanding": LeastOutstandingBalancer,
+    "ewma": EWMABalancer,
+    "p2c": PowerOfTwoBalancer,
+}
+
+
+def get_balancer(balancer=None):
+    """
+    :param balancer: the name of a strategy in `BALANCERS`, a :class:`Balancer` instance or `None` for random
+    :type balancer: str
+    :type balancer: Balancer
+    :return: a balancer
+    :rtype: Balancer
+    :raise: ValueError for unknown strategy names
+    """
+    if balancer is None:
+        return RandomBalancer()
+    if isinstance(balancer, Balancer):
+        return balancer
+    try:
+        return BALANCERS[balancer]()
+    except KeyError:
+        raise ValueError(
+            "Unknown balancer %r, expected one of %s"
+            % (balancer, ", ".join(sorted(BALANCERS)))
+        )
@@ -0,0 +1,181 @@
+"""
+Track the health of each server across requests.
+
+A :class:`CircuitBreaker` is shared by all the requests of a connection. A server that
+fails `failure_threshold` times in a row is *open*: requests stop being sent to it for a
+cool-down period. Once the cool-down elapsed the server is *half-open*, and the next
+request is sent to it as a probe. If the probe succeeds the server is *closed* again,
+i.e. healthy; otherwise it is opened for twice as long, up to `max_cooldown` seconds.
+
+    >>> from solrcloudpy import SolrConnection
+    >>> from solrcloudpy.breaker import CircuitBreaker
+    >>> conn = SolrConnection(["localhost:8983", "localhost:7574"],
+    ...                       circuit_breaker=CircuitBreaker(failure_threshold=5))
+    >>> conn.circuit_breaker.states()
+    {'http://localhost:8983/solr/': 'closed', 'http://localhost:7574/solr/': 'closed'}
+
+"""
+import logging
+import threading
+import time
+
+log = logging.getLogger("solrcloud")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class _ServerHealth(object):
+    """
+    The circuit state of a single server
+    """
+
+    def __init__(self, cooldown):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0
+        self.cooldown = cooldown
+        self.probing = False
+
+
+class CircuitBreaker(object):
+    """
+    Keeps failing servers out of rotation, and re-admits them once they recover
+    """
+
+    def __init__(
+        self, failure_threshold=3, cooldown=1.0, max_cooldown=60.0, backoff_factor=2.0
+    ):
+        """
+        :param failure_threshold: number of consecutive failures after which a server is opened
+        :type failure_threshold: int
+        :param cooldown: number of seconds a server stays open the first time
+        :type cooldown: float
+        :param max_cooldown: the maximum number of seconds a server stays open
+        :type max_cooldown: float
+        :param backoff_factor: how much longer a server stays open each time its probe fails
+        :type backoff_factor: float
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.backoff_factor = backoff_factor
+        self._servers = {}
+        self._lock = threading.Lock()
+
+    def _health(self, server):
+        health = self._servers.get(server)
+        if health is None:
+            health = self._servers[server] = _ServerHealth(self.cooldown)
+        return health
+
+    def available(self, servers):
+        """
+        Filters out the servers requests should not be sent to
+
+        :param servers: the candidate servers
+        :type servers: list
+        :return: the closed servers, and the half-open ones no probe is in flight for
+        :rtype: list
+        """
+        now = time.time()
+        res = []
+        with self._lock:
+            for server in servers:
+                health = self._health(server)
+                if health.state == OPEN and now - health.opened_at >= health.cooldown:
+                    health.state = HALF_OPEN
+                    health.probing = False
+                if health.state == CLOSED or (
+                    health.state == HALF_OPEN and not health.probing
+                ):
+                    res.append(server)
+        return res
+
+    def attempt(self, server):
+        """
+        Called when a request is sent to a server. A request sent to a half-open server is its probe
+
+        :param server: the server
+        :type server: str
+        """
+        with self._lock:
+            health = self._health(server)
+            if health.state == HALF_OPEN:
+                health.probing = True
+
+    def succeeded(self, server):
+        """
+        Closes the circuit of a server that answered
+
+        :param server: the server
+        :type server: str
+        """
+        with self._lock:
+            health = self._health(server)
+            if health.state != CLOSED:
+                log.info("Server %s recovered, sending requests to it again", server)
+            health.state = CLOSED
+            health.failures = 0
+            health.cooldown = self.cooldown
+            health.probing = False
+
+    def failed(self, server):
+        """
+        Records a failure of a server, opening its circuit if needed
+
+        :param server: the server
+        :type server: str
+        """
+        with self._lock:
+            health = self._health(server)
+            health.failures += 1
+            if health.state == HALF_OPEN:
+                health.cooldown = min(
+                    health.cooldown * self.backoff_factor, self.max_cooldown
+                )
+            elif health.state == OPEN or health.failures < self.failure_threshold:
+                return
+            log.warning(
+                "Server %s failed %d times, not sending requests to it for %.1fs",
+                server,
+                health.failures,
+                health.cooldown,
+            )
+            health.state = OPEN
+            health.opened_at = time.time()
+            health.probing = False
+
+    def state(self, server):
+        """
+        :param server: the server
+        :type server: str
+        :return: the circuit state of a server, one of `closed`, `open` or `half-open`
+        :rtype: str
+        """
+        with self._lock:
+            return self._health(server).state
+
+    def states(self):
+        """
+        :return: the circuit state of every server seen so far
+        :rtype: dict
+        """
+        with self._lock:
+            return dict((server, h.state) for server, h in self._servers.items())
+
+
+def get_circuit_breaker(circuit_breaker=True):
+    """
+    :param circuit_breaker: `True` for a default circuit breaker, `False` or `None` for none, or a :class:`CircuitBreaker` instance
+    :type circuit_breaker: bool
+    :type circuit_breaker: CircuitBreaker
+    :return: a circuit breaker or `None`
+    :rtype: CircuitBreaker
+    """
+    if isinstance(circuit_breaker, CircuitBreaker):
+        return circuit_breaker
+    if circuit_breaker:
+        return CircuitBreaker()
+    return None
@@ -0,0 +1,248 @@
+"""
+Cache search responses in the client.
+
+A :class:`ResultCache` is shared by all the collections of a connection. Searches with
+the same parameters on the same collection are answered from the cache until their entry
+expires, or until this connection sends an update to the collection:
+
+    >>> from solrcloudpy import SolrConnection
+    >>> from solrcloudpy.cache import ResultCache
+    >>> conn = SolrConnection(result_cache=ResultCache(max_entries=500, ttl=30))
+    >>> conn["collection1"].search({"q": "*:*", "facet": "true", "facet.field": "tag_s"})
+    >>> conn.result_cache.stats()
+    {'entries': 1, 'bytes': 1024, 'hits': 0, 'misses': 1, 'evictions': 0}
+
+Updates sent by other clients are not seen: pick a `ttl` that bounds how stale results can be.
+
+Results are kept pickled, and the size of the pickle is what counts towards `max_bytes`.
+Each hit unpickles its own copy, so callers can modify the results they get.
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from future.utils import iteritems
+
+from solrcloudpy.utils import SolrResponse, SolrResult
+
+
+class ResultCache(object):
+    """
+    A thread-safe LRU cache of responses, bounded in entries and in bytes, whose entries expire
+    """
+
+    def __init__(self, max_entries=1000, max_bytes=64 * 1024 * 1024, ttl=60.0):
+        """
+        :param max_entries: the maximum number of responses kept
+        :type max_entries: int
+        :param max_bytes: the maximum total size of the responses kept, as pickled results
+        :type max_bytes: int
+        :param ttl: the default number of seconds a response is kept for
+        :type ttl: float
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = 0
+        # key -> (collection, value, size, expiry), least recently used first
+        self._entries = OrderedDict()
+        # collection -> number of times it was invalidated, see `generation`
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def generation(self, collection):
+        """
+        :param collection: the name of a collection
+        :type collection: str
+        :return: a token that changes each time the responses of the collection are invalidated.
+            Pass it to :meth:`put` so that a response fetched before an update is not cached after it
+        :rtype: int
+        """
+        with self._lock:
+            return self._generations.setdefault(collection, 0)
+
+    def get(self, key):
+        """
+        :param key: the key of the response, see :func:`cache_key`
+        :type key: tuple
+        :return: the cached response, or `None`
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[3] <= time.time():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, size, ttl=None, generation=None):
+        """
+        :param key: the key of the response, see :func:`cache_key`
+        :type key: tuple
+        :param value: the response, see :func:`_freeze_response`
+        :param size: the size of the value, in bytes
+        :type size: int
+        :param ttl: the number of seconds the response is kept for, instead of the default one
+        :type ttl: float
+        :param generation: the generation of the collection before the response was requested
+        :type generation: int
+        """
+        if size > self.max_bytes:
+            return
+        expiry = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if generation is not None and generation != self._generations.get(
+                key[0], 0
+            ):
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (key[0], value, size, expiry)
+            self.size += size
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, collection=None):
+        """
+        Removes the responses of a collection
+
+        :param collection: the name of the collection, or `None` for all of them
+        :type collection: str
+        """
+        with self._lock:
+            if collection is None:
+                for name in self._generations:
+                    self._generations[name] += 1
+                self._entries.clear()
+                self.size = 0
+                return
+            self._generations[collection] = self._generations.get(collection, 0) + 1
+            stale = [
+                key for key, entry in iteritems(self._entries) if entry[0] == collection
+            ]
+            for key in stale:
+                self._remove(key)
+
+    def stats(self):
+        """
+        :return: the number of entries and bytes in the cache, and its hit, miss and eviction counts
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.size -= entry[2]
+
+
+def cache_key(collection, path, params, method, body, *options):
+    """
+    :param collection: the name of the collection
+    :type collection: str
+    :param path: the path of the request
+    :type path: str
+    :param params: the parameters of the request
+    :type params: SearchOptions
+    :type params: dict
+    :param method: the request method
+    :type method: str
+    :param body: the request body
+    :type body: str
+    :param options: anything else the response depends on
+    :return: a key identifying the request, whatever the order of its parameters
+    :rtype: tuple
+    """
+    if hasattr(params, "_encode"):
+        # the canonical form of SearchOptions, see `SearchOptions._encode`
+        items = params._encode()[0]
+        return (collection, path, items, method.upper(), body) + options
+    if hasattr(params, "iteritems") or hasattr(params, "items"):
+        pairs = iteritems(params)
+    else:
+        # a list of `(name, value)` tuples
+        pairs = params or ()
+    items = []
+    for name, value in pairs:
+        if isinstance(value, (set, frozenset)):
+            value = tuple(sorted(str(v) for v in value))
+        elif isinstance(value, (list, tuple)):
+            value = tuple(str(v) for v in value)
+        else:
+            value = (str(value),)
+        items.append((name, value))
+    items.sort()
+    return (collection, path, tuple(items), method.upper(), body) + options
+
+
+class CachedResponse(SolrResponse):
+    """
+    A search response answered from a :class:`ResultCache`
+    """
+
+    def __init__(self, result):
+        """
+        :param result: the parsed body of the response
+        :type result: dict
+        """
+        self.result = SolrResult(result)
+        self._response_obj = None
+
+    @property
+    def code(self):
+        """
+        Status code of this response. Only successful responses are cached
+        :rtype: int
+        """
+        return 200
+
+
+def _freeze_response(response):
+    """
+    :param response: a successful response
+    :type response: SolrResponse
+    :return: its result, pickled to be cached
+    :rtype: bytes
+    """
+    return pickle.dumps(response.result.dict, pickle.HIGHEST_PROTOCOL)
+
+
+def _thaw_response(data):
+    """
+    :param data: a result pickled by :func:`_freeze_response`
+    :type data: bytes
+    :return: a response with its own copy of the result
+    :rtype: CachedResponse
+    """
+    return CachedResponse(pickle.loads(data))
+
+
+def get_result_cache(result_cache=None):
+    """
+    :param result_cache: `True` for a default cache, `False` or `None` for none, or a :class:`ResultCache` instance
+    :type result_cache: bool
+    :type result_cache: ResultCache
+    :return: a result cache or `None`
+    :rtype: ResultCache
+    """
+    if isinstance(result_cache, ResultCache):
+        return result_cache
+    if result_cache:
+        return ResultCache()
+    return None
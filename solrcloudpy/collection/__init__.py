@@ -15,10 +15,10 @@ This class is also used for query a Solr collection. The endpoints supported by
  - `/select` : the default Solr request handler
  - `/mlt`: the request handler for doing *more like this* search
  - `/clustering`: Solr's clustering component
+ - `/get`: Solr's real-time get request handler
 
 Support will be coming for the following endpoints:
 
- - `/get`: Solr's real-time get request handler
  - `/highlight`: Solr's search highlight component
  - `/terms`: Term component
 
@@ -65,7 +65,7 @@ class SolrCollection(SolrCollectionAdmin, SolrCollectionSearch):
         """
 
         admin = super(SolrCollection, self).create(replication_factor, force, **kwargs)
-        return SolrCollection(admin.connection, admin.name)
+        return admin.connection[admin.name]
 
     def __repr__(self):
         return "SolrCollection<%s>" % self.name
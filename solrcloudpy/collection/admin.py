@@ -6,12 +6,162 @@ import time
 
 import requests
 
-from solrcloudpy.utils import CollectionBase, SolrException
+from solrcloudpy.utils import CollectionBase, SolrException, SolrResult
 
 from .schema import SolrSchema
 from .stats import SolrIndexStats
 
 
+def _create_params(name, replication_factor, **kwargs):
+    """
+    Builds the parameters of a CREATE request to the collections API
+
+    :param name: the name of the collection
+    :type name: str
+    :param replication_factor: an integer indicating the number of replcas for this collection
+    :type replication_factor: int
+    :param kwargs: additional parameters, see :meth:`SolrCollectionAdmin.create`
+    :return: the request parameters
+    :rtype: dict
+    """
+    params = {
+        "name": name,
+        "replicationFactor": replication_factor,
+        "action": "CREATE",
+    }
+    router_name = kwargs.get("router_name", "compositeId")
+    params["router.name"] = router_name
+
+    num_shards = kwargs.get("num_shards", "1")
+    params["numShards"] = num_shards
+
+    shards = kwargs.get("shards")
+    if shards:
+        params["shards"] = shards
+
+    max_shards_per_node = kwargs.get("max_shards_per_node", 1)
+    params["maxShardsPerNode"] = max_shards_per_node
+
+    create_node_set = kwargs.get("create_node_set")
+    if create_node_set:
+        params["createNodeSet"] = create_node_set
+
+    collection_config_name = kwargs.get("collection_config_name")
+    if collection_config_name:
+        params["collection.configName"] = collection_config_name
+
+    router_field = kwargs.get("router_field")
+    if router_field:
+        params["router.field"] = router_field
+
+    return params
+
+
+def _split_shard_params(name, shard, ranges=None, split_key=None):
+    """
+    Builds the parameters of a SPLITSHARD request, see :meth:`SolrCollectionAdmin.split_shard`
+
+    :return: the request parameters
+    :rtype: dict
+    """
+    params = {"action": "SPLITSHARD", "collection": name, "shard": shard}
+    if ranges:
+        params["ranges"] = ranges
+    if split_key:
+        params["split.key"] = split_key
+    return params
+
+
+def _create_shard_params(name, shard, create_node_set=None):
+    """
+    Builds the parameters of a CREATESHARD request, see :meth:`SolrCollectionAdmin.create_shard`
+
+    :return: the request parameters
+    :rtype: dict
+    """
+    params = {"action": "CREATESHARD", "collection": name, "shard": shard}
+    if create_node_set:
+        params["create_node_set"] = create_node_set
+    return params
+
+
+def _delete_replica_params(name, replica, shard):
+    """
+    Builds the parameters of a DELETEREPLICA request, see :meth:`SolrCollectionAdmin.delete_replica`
+
+    :return: the request parameters
+    :rtype: dict
+    """
+    return {
+        "action": "DELETEREPLICA",
+        "replica": replica,
+        "collection": name,
+        "shard": shard,
+    }
+
+
+def _backup_restore_params(action, name, backup_name, location=None, repository=None):
+    """
+    Builds the parameters of a BACKUP or RESTORE request, see :meth:`SolrCollectionAdmin.backup`
+
+    :return: the request parameters
+    :rtype: dict
+    """
+    params = {"action": action, "collection": name, "name": backup_name}
+    if location:
+        params["location"] = location
+    if repository:
+        params["repository"] = repository
+    return params
+
+
+def _request_status_params(async_response):
+    """
+    Builds the parameters of a REQUESTSTATUS request, see :meth:`SolrCollectionAdmin.request_status`
+
+    :return: the request parameters
+    :rtype: dict
+    """
+    return {
+        "action": "REQUESTSTATUS",
+        "requestid": async_response.async_id,
+        "wt": "json",
+    }
+
+
+def _collection_state(cluster_state, name):
+    """
+    :param cluster_state: the cluster state of the connection
+    :type cluster_state: dict
+    :param name: the name of the collection
+    :type name: str
+    :return: the state of the collection, a warning if it is an alias, or an empty
+        dict if it does not exist
+    :rtype: dict
+    """
+    if name in cluster_state.get("aliases", {}):
+        return {"warn": "no state info available for aliases"}
+
+    try:
+        return SolrResult(cluster_state["collections"][name])
+    except KeyError:
+        return {}
+
+
+def _index_info(result):
+    """
+    :param result: the result of a request to the luke handler
+    :type result: SolrResult
+    :return: the high-level information about the index
+    :rtype: dict
+    """
+    # XXX ugly
+    data = result["index"].dict
+    data.pop("directory", None)
+    data.pop("userData", None)
+    return data
+
+
 class SolrCollectionAdmin(CollectionBase):
     """
     Manage and administer a collection
@@ -36,7 +186,7 @@ class SolrCollectionAdmin(CollectionBase):
         :return: whether a collection exists in the cluster
         :rtype: bool
         """
-        return self.name in self.connection.list()
+        return self.name in self.connection.cluster_state["collections"]
 
     def create(self, replication_factor=1, force=False, **kwargs):
         """
@@ -61,39 +211,11 @@ class SolrCollectionAdmin(CollectionBase):
 
         Additional parameters are further documented at https://cwiki.apache.org/confluence/display/solr/Collections+API#CollectionsAPI-CreateaCollection
         """
-        params = {
-            "name": self.name,
-            "replicationFactor": replication_factor,
-            "action": "CREATE",
-        }
-        router_name = kwargs.get("router_name", "compositeId")
-        params["router.name"] = router_name
-
-        num_shards = kwargs.get("num_shards", "1")
-        params["numShards"] = num_shards
-
-        shards = kwargs.get("shards")
-        if shards:
-            params["shards"] = shards
-
-        max_shards_per_node = kwargs.get("max_shards_per_node", 1)
-        params["maxShardsPerNode"] = max_shards_per_node
-
-        create_node_set = kwargs.get("create_node_set")
-        if create_node_set:
-            params["createNodeSet"] = create_node_set
-
-        collection_config_name = kwargs.get("collection_config_name")
-        if collection_config_name:
-            params["collection.configName"] = collection_config_name
-
-        router_field = kwargs.get("router_field")
-        if router_field:
-            params["router.field"] = router_field
+        params = _create_params(self.name, replication_factor, **kwargs)
 
         # this collection doesn't exist yet, actually create it
         if not self.exists() or force:
-            res = self.client.get("admin/collections", params).result
+            res = self._admin(params)
             if hasattr(res, "success"):
                 # Create the index and wait until it's available
                 while True:
@@ -117,7 +239,9 @@ class SolrCollectionAdmin(CollectionBase):
         :rtype: bool
         """
         server = list(self.connection.servers)[0]
-        req = requests.get("%s/solr/%s" % (server, self.name))
+        req = self.client.client.get(
+            "%s/solr/%s" % (server, self.name), timeout=self.client.timeout
+        )
         return req.status_code == requests.codes.ok
 
     def is_alias(self):
@@ -125,12 +249,20 @@ class SolrCollectionAdmin(CollectionBase):
         Determines if this collection is an alias for a 'real' collection
         :rtype: bool
         """
-        response = self.client.get(
-            "/solr/admin/collections", {"action": "CLUSTERSTATUS", "wt": "json"}
-        ).result.dict
-        if "aliases" in response["cluster"]:
-            return self.name in response["cluster"]["aliases"]
-        return False
+        return self.name in self.connection.cluster_state.get("aliases", {})
+
+    def _admin(self, params):
+        """
+        Sends a request to the collections API. Such requests change the cluster, so the cached cluster state is dropped.
+
+        :param params: the parameters of the request
+        :type params: dict
+        :return: the result of the request
+        :rtype: SolrResult
+        """
+        result = self.client.get("admin/collections", params).result
+        self.connection.invalidate_cluster_state()
+        return result
 
     def drop(self):
         """
@@ -139,9 +271,7 @@ class SolrCollectionAdmin(CollectionBase):
         :return: a response associated with the delete request
         :rtype: SolrResponse
         """
-        return self.client.get(
-            "admin/collections", {"action": "DELETE", "name": self.name}
-        ).result
+        return self._admin({"action": "DELETE", "name": self.name})
 
     def reload(self):
         """
@@ -150,9 +280,7 @@ class SolrCollectionAdmin(CollectionBase):
         :return: a response associated with the reload request
         :rtype: SolrResponse
         """
-        return self.client.get(
-            "admin/collections", {"action": "RELOAD", "name": self.name}
-        ).result
+        return self._admin({"action": "RELOAD", "name": self.name})
 
     def split_shard(self, shard, ranges=None, split_key=None):
         """
@@ -167,12 +295,7 @@ class SolrCollectionAdmin(CollectionBase):
         :return: a response associated with the splitshard request
         :rtype: SolrResponse
         """
-        params = {"action": "SPLITSHARD", "collection": self.name, "shard": shard}
-        if ranges:
-            params["ranges"] = ranges
-        if split_key:
-            params["split.key"] = split_key
-        return self.client.get("admin/collections", params).result
+        return self._admin(_split_shard_params(self.name, shard, ranges, split_key))
 
     def create_shard(self, shard, create_node_set=None):
         """
@@ -185,10 +308,7 @@ class SolrCollectionAdmin(CollectionBase):
         :return: a response associated with the createshard request
         :rtype: SolrResponse
         """
-        params = {"action": "CREATESHARD", "collection": self.name, "shard": shard}
-        if create_node_set:
-            params["create_node_set"] = create_node_set
-        return self.client.get("admin/collections", params).result
+        return self._admin(_create_shard_params(self.name, shard, create_node_set))
 
     def create_alias(self, alias):
         """
@@ -200,7 +320,7 @@ class SolrCollectionAdmin(CollectionBase):
         :rtype: SolrResponse
         """
         params = {"action": "CREATEALIAS", "name": alias, "collections": self.name}
-        return self.client.get("admin/collections", params).result
+        return self._admin(params)
 
     def delete_alias(self, alias):
         """
@@ -212,7 +332,7 @@ class SolrCollectionAdmin(CollectionBase):
         :rtype: SolrResponse
         """
         params = {"action": "DELETEALIAS", "name": alias}
-        return self.client.get("admin/collections", params).result
+        return self._admin(params)
 
     def delete_replica(self, replica, shard):
         """
@@ -225,13 +345,7 @@ class SolrCollectionAdmin(CollectionBase):
         :return: a response associated with the deletereplica request
         :rtype: SolrResponse
         """
-        params = {
-            "action": "DELETEREPLICA",
-            "replica": replica,
-            "collection": self.name,
-            "shard": shard,
-        }
-        return self.client.get("admin/collections", params).result
+        return self._admin(_delete_replica_params(self.name, replica, shard))
 
     @property
     def state(self):
@@ -241,19 +355,7 @@ class SolrCollectionAdmin(CollectionBase):
         :return: the state of this collection
         :rtype: dict
         """
-        if self.is_alias():
-            return {"warn": "no state info available for aliases"}
-
-        response = self.client.get(
-            "/{webappdir}/admin/collections".format(
-                webappdir=self.connection.webappdir
-            ),
-            dict(action="clusterstatus"),
-        ).result
-        try:
-            return response["cluster"]["collections"][self.name]
-        except KeyError:
-            return {}
+        return _collection_state(self.connection.cluster_state, self.name)
 
     @property
     def shards(self):
@@ -270,12 +372,7 @@ class SolrCollectionAdmin(CollectionBase):
         :return: information about an index
         :rtype: dict
         """
-        response = self.client.get("%s/admin/luke" % self.name, {}).result
-        # XXX ugly
-        data = response["index"].dict
-        data.pop("directory", None)
-        data.pop("userData", None)
-        return data
+        return _index_info(self.client.get("%s/admin/luke" % self.name, {}).result)
 
     @property
     def index_stats(self):
@@ -325,15 +422,12 @@ class SolrCollectionAdmin(CollectionBase):
         :return: an async response
         :rtype: AsyncResponse
         """
-        params = {"action": action, "collection": self.name, "name": backup_name}
-
-        if location:
-            params["location"] = location
-
-        if repository:
-            params["repository"] = repository
-
-        return self.client.get("admin/collections", params, asynchronous=True)
+        params = _backup_restore_params(
+            action, self.name, backup_name, location, repository
+        )
+        response = self.client.get("admin/collections", params, asynchronous=True)
+        self.connection.invalidate_cluster_state()
+        return response
 
     def backup(self, backup_name, location=None, repository=None):
         """
@@ -376,14 +470,8 @@ class SolrCollectionAdmin(CollectionBase):
         :type async_response: AsyncResponse
         :return:
         """
-        return self.client.get(
-            "admin/collections",
-            {
-                "action": "REQUESTSTATUS",
-                "requestid": async_response.async_id,
-                "wt": "json",
-            },
-        ).result
+        params = _request_status_params(async_response)
+        return self.client.get("admin/collections", params).result
 
     def request_state(self, async_response):
         """
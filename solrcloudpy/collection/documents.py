@@ -0,0 +1,294 @@
+"""
+Compact containers for the documents of search results.
+
+A python dict costs several hundred bytes even for a handful of fields. When paging
+through many documents, :func:`compact_documents` replaces the dicts of a result page
+with instances of a class built for the fields of the query: each instance only stores
+one pointer per field in `__slots__`, and the field names are shared by all the documents.
+
+    >>> res = coll.search({"q": "*:*", "fl": "id,title", "rows": 10000}, compact=True).result
+    >>> doc = res.response.docs[0]
+    >>> doc.title, doc["id"], doc.get("missing")
+    ('hello', '1', None)
+
+Fields can always be read as items. They can also be read as attributes when their name is
+a valid python identifier that does not clash with a method of :class:`SolrDocument`.
+"""
+import copy
+import keyword
+import re
+import threading
+from collections import OrderedDict
+from operator import attrgetter
+
+from future.utils import iteritems
+
+_FL_SEPARATOR = re.compile(r"[\s,]+")
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# the number of record classes kept around, one per distinct field list.
+# The least recently used ones are dropped first
+_MAX_CLASSES = 256
+_classes = OrderedDict()
+_classes_lock = threading.Lock()
+
+
+class SolrDocument(object):
+    """
+    Base class of the compact documents. Behaves like a read-only dict of the document's fields
+    """
+
+    __slots__ = ()
+
+    # field names, and the slot each field is stored in. Set on subclasses
+    _fields = ()
+    _slots = {}
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, self._slots[name])
+        except AttributeError:
+            raise KeyError(name)
+
+    def get(self, name, default=None):
+        """
+        :param name: the field name
+        :type name: str
+        :param default: the value returned if this document has no such field
+        :return: the value of the field
+        """
+        slot = self._slots.get(name)
+        if slot is None:
+            return default
+        return getattr(self, slot, default)
+
+    def __contains__(self, name):
+        slot = self._slots.get(name)
+        return slot is not None and hasattr(self, slot)
+
+    def keys(self):
+        """
+        :return: the names of the fields of this document
+        :rtype: list
+        """
+        return [name for name, _ in self.items()]
+
+    def values(self):
+        """
+        :return: the values of the fields of this document
+        :rtype: list
+        """
+        return [value for _, value in self.items()]
+
+    def items(self):
+        """
+        :return: the `(name, value)` pairs of this document
+        :rtype: list
+        """
+        res = []
+        for name in self._fields:
+            value = getattr(self, self._slots[name], _MISSING)
+            if value is not _MISSING:
+                res.append((name, value))
+        return res
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.items())
+
+    @property
+    def dict(self):
+        """
+        :return: a copy of this document as a python `dict`
+        :rtype: dict
+        """
+        return dict(self.items())
+
+    def __eq__(self, other):
+        if isinstance(other, SolrDocument):
+            other = other.dict
+        return self.dict == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "SolrDocument(%r)" % self.dict
+
+    def __reduce__(self):
+        return _restore, (self._fields, self.items())
+
+
+_MISSING = object()
+
+
+def _restore(fields, items):
+    """
+    Rebuilds a pickled document
+    """
+    doc = record_class(fields)()
+    slots = doc._slots
+    for name, value in items:
+        setattr(doc, slots[name], value)
+    return doc
+
+
+def record_class(fields):
+    """
+    :param fields: the field names
+    :type fields: tuple
+    :return: a :class:`SolrDocument` subclass storing these fields in `__slots__`
+    :rtype: type
+    """
+    fields = tuple(fields)
+    with _classes_lock:
+        cls = _classes.get(fields)
+        if cls is not None:
+            _classes.move_to_end(fields)
+            return cls
+
+        # fields are stored in slots of the same name, so that reading them as attributes
+        # is as fast as it gets. Other fields are stored in slots named after their position,
+        # and exposed as properties if they can be, e.g. `_version_`
+        slots = []
+        properties = {}
+        for i, name in enumerate(fields):
+            valid = (
+                _IDENTIFIER.match(name)
+                and not name.startswith("__")
+                and not keyword.iskeyword(name)
+                and not hasattr(SolrDocument, name)
+            )
+            if valid and not name.startswith("_"):
+                slots.append(name)
+                continue
+            slots.append("_f%d" % i)
+            if valid:
+                properties[name] = property(attrgetter(slots[-1]))
+
+        namespace = {
+            "__slots__": tuple(slots),
+            "_fields": fields,
+            "_slots": dict(zip(fields, slots)),
+        }
+        namespace.update(
+            (name, prop) for name, prop in iteritems(properties) if name not in slots
+        )
+        cls = type("SolrDocument", (SolrDocument,), namespace)
+
+        _classes[fields] = cls
+        if len(_classes) > _MAX_CLASSES:
+            _classes.popitem(last=False)
+        return cls
+
+
+def _fl_fields(params):
+    """
+    :param params: the parameters of a search
+    :type params: SearchOptions
+    :type params: dict
+    :return: the names of the fields the search returns, or `None` if they can't be known
+        from the `fl` parameter alone, e.g. with globs, functions or document transformers
+    :rtype: list
+    """
+    if not (hasattr(params, "iteritems") or hasattr(params, "items")):
+        return None
+    value = dict(iteritems(params)).get("fl")
+    if not value:
+        return None
+
+    fields = []
+    for fl in [value] if isinstance(value, str) else value:
+        for token in _FL_SEPARATOR.split(fl):
+            if not token:
+                continue
+            if any(c in token for c in "*?[(\"'"):
+                return None
+            # `alias:field` returns the field under its alias
+            name = token.split(":", 1)[0]
+            if name not in fields:
+                fields.append(name)
+    return fields
+
+
+def _page_fields(docs):
+    """
+    :return: the field names of a list of documents, in the order they appear
+    :rtype: list
+    """
+    seen = {}
+    for doc in docs:
+        for name in doc:
+            if name not in seen:
+                seen[name] = None
+    return list(seen)
+
+
+def _convert(docs, cls):
+    """
+    :return: the documents as instances of `cls`
+    :rtype: list
+    :raise: KeyError if a document has a field `cls` has no slot for
+    """
+    # the slot descriptors set the values directly, without a `setattr` lookup
+    setters = dict(
+        (name, getattr(cls, slot).__set__) for name, slot in iteritems(cls._slots)
+    )
+    res = []
+    for doc in docs:
+        record = cls()
+        for name, value in iteritems(doc):
+            setters[name](record, value)
+        res.append(record)
+    return res
+
+
+def compact_documents(docs, params=None):
+    """
+    Converts the documents of a result page to compact :class:`SolrDocument` instances
+
+    :param docs: the documents, as returned by solr
+    :type docs: list<dict>
+    :param params: the parameters of the search, whose `fl` gives the expected fields
+    :type params: SearchOptions
+    :type params: dict
+    :return: the compact documents
+    :rtype: list<SolrDocument>
+    """
+    if not docs:
+        return []
+    fields = _fl_fields(params)
+    if fields is not None:
+        try:
+            return _convert(docs, record_class(fields))
+        except KeyError:
+            # solr returned more than asked for, e.g. `_childDocuments_`
+            pass
+    return _convert(docs, record_class(_page_fields(docs)))
+
+
+def compact_response(response, params=None):
+    """
+    Copies a search response, with compact :class:`SolrDocument` instances for documents.
+    The response itself is left as it is
+
+    :param response: the response of a search
+    :type response: SolrResponse
+    :param params: the parameters of the search
+    :type params: SearchOptions
+    :type params: dict
+    :return: the compacted response, or `response` if it has no documents
+    :rtype: SolrResponse
+    """
+    data = response.result.dict
+    result = data.get("response")
+    if not (isinstance(result, dict) and result.get("docs")):
+        return response
+    result = dict(result, docs=compact_documents(result["docs"], params))
+    compacted = copy.copy(response)
+    compacted.result = response.result.__class__(dict(data, response=result))
+    return compacted
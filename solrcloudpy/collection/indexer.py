@@ -2,11 +2,38 @@
 Utilities to index large volumes of documents in Solr
 """
 import logging
+import threading
 from contextlib import contextmanager
 
+from future.moves.queue import Queue
+
+from solrcloudpy.utils import SolrException
+
 log = logging.getLogger("solrcloud")
 
 
+class _Delete(object):
+    """
+    The deletion of a document, queued in a batch next to the documents to add
+    """
+
+    __slots__ = ("id",)
+
+    def __init__(self, doc_id):
+        self.id = doc_id
+
+
+def _command(item):
+    """
+    :param item: an item of a batch
+    :return: the update command of the item, see `SolrCollectionSearch._update_commands`
+    :rtype: tuple
+    """
+    if isinstance(item, _Delete):
+        return ("delete", item.id)
+    return ("add", item)
+
+
 class SolrBatchAdder(object):
     """
     Provides an abstraction for batching commits to the Solr
@@ -14,9 +41,22 @@ class SolrBatchAdder(object):
     "batch" list, and  when it reaches `batch_size`, it will commit the batch to
     Solr.  This allows for overall better performance when committing large numbers of
     documents.
+
+    With `workers` set, full batches are sent by that many background threads, so that
+    several batches are in flight while the caller keeps producing documents. Ready
+    batches wait in a queue of at most `queue_size` batches; once it is full, adding
+    documents blocks until a worker picks up a batch. When a worker fails to send some
+    items of a batch, even one by one, the error is raised again by the next call to
+    `add_one`, `add_multi`, `flush` or `close`.
+
+    Deletions by id queued with `delete_one` or `delete_multi`, and atomic updates queued
+    with `update_one` or `update_multi`, go in the same batches as the documents, and are
+    applied in the order they were queued.
     """
 
-    def __init__(self, solr, batch_size=100, auto_commit=True):
+    def __init__(
+        self, solr, batch_size=100, auto_commit=True, workers=0, queue_size=None
+    ):
         """
         `batch_size` is 100 by default; different values may yield
         different performance characteristics, and this of course depends upon your average
@@ -31,12 +71,23 @@ class SolrBatchAdder(object):
 
         :param auto_commit: whether to commit after adding each batch of documents
         :type auto_commit: bool
+
+        :param workers: the number of threads sending batches concurrently. The default is 0, which sends each batch synchronously
+        :type workers: int
+
+        :param queue_size: the number of ready batches that can wait for a worker. The default is twice the number of workers
+        :type queue_size: int
         """
         self.solr = solr
         self.batch = list()
         self.batch_len = 0
         self.batch_size = batch_size
         self.auto_commit = auto_commit
+        self.workers = workers
+        self._queue = Queue(maxsize=queue_size or 2 * workers) if workers else None
+        self._threads = []
+        self._error = None
+        self._error_lock = threading.Lock()
 
     def add_one(self, doc):
         """
@@ -61,12 +112,85 @@ class SolrBatchAdder(object):
         for doc in docs_iter:
             self._append_commit(doc)
 
+    def update_one(self, update):
+        """
+        Queue an atomic update, sent with the next batch
+
+        :param update: the changes to the fields of a document
+        :type update: AtomicUpdate
+        """
+        self._append_commit(update.to_doc(self.solr.unique_key))
+
+    def update_multi(self, updates):
+        """
+        Queue atomic updates, sent with the next batches
+
+        :param updates: the changes to the fields of documents
+        :type updates: iterable<AtomicUpdate>
+        """
+        unique_key = self.solr.unique_key
+        for update in updates:
+            self._append_commit(update.to_doc(unique_key))
+
+    def delete_one(self, doc_id):
+        """
+        Queue the deletion of a document, sent with the next batch
+
+        :param doc_id: the id of the document
+        :type doc_id: str
+        """
+        self._append_commit(_Delete(doc_id))
+
+    def delete_multi(self, ids):
+        """
+        Queue the deletion of documents, sent with the next batches
+
+        :param ids: the ids of the documents
+        :type ids: iterable
+        """
+        for doc_id in ids:
+            self._append_commit(_Delete(doc_id))
+
     def flush(self):
         """
         Flush the batch queue of the batch adder; necessary after
         successive calls to `add_one` or `add_multi`.
+        With workers, this waits until every batch in flight was sent.
+        """
+        if not self.workers:
+            self._send(self.batch)
+            self.batch = list()
+            self.batch_len = 0
+            return
+
+        if self.batch:
+            self._submit()
+        self._queue.join()
+        self._raise_error()
+
+    def close(self):
+        """
+        Flush the remaining documents, and stop the workers
         """
-        batch_len = len(self.batch)
+        try:
+            self.flush()
+        finally:
+            for _ in self._threads:
+                self._queue.put(None)
+            for thread in self._threads:
+                thread.join()
+            self._threads = []
+
+    def _send(self, batch):
+        """
+        Sends a batch of documents to solr, one by one if the batch fails
+
+        :param batch: the documents
+        :type batch: list
+        :return: the errors of the items that could not be sent one by one either
+        :rtype: list
+        """
+        batch_len = len(batch)
         auto_commit = self.auto_commit
         log.debug(
             "SolrBatchAdder: flushing {batch_len} articles to Solr (auto_commit={auto_commit})".format(
@@ -74,25 +198,91 @@ class SolrBatchAdder(object):
             )
         )
         try:
-            self.solr.add(self.batch)
+            self._send_items(batch)
         except Exception as e:
             log.exception(
                 "Exception encountered when committing batch, falling back on one-by-one commit"
             )
             log.error(e)
             # one by one fall-back
-            for item in self.batch:
+            errors = []
+            for item in batch:
                 try:
-                    self.solr.add([item])
+                    self._send_items([item])
                 except Exception as e:
                     log.error("Could not add item to solr index")
                     log.exception(str(e))
+                    errors.append(e)
             if auto_commit:
                 self.commit()
+            return errors
+        return []
+
+    def _send_items(self, items):
+        """
+        Sends documents, and deletions if there are any, in a single request
+
+        :param items: documents and deletions
+        :type items: list
+        """
+        if any(isinstance(item, _Delete) for item in items):
+            self.solr._update_commands([_command(item) for item in items])
+        else:
+            self.solr.add(items)
 
+    def _submit(self):
+        """
+        Hands the current batch over to the workers, blocking while the queue is full
+        """
+        self._raise_error()
+        if len(self._threads) < self.workers:
+            self._start_workers()
+        self._queue.put(self.batch)
         self.batch = list()
         self.batch_len = 0
 
+    def _start_workers(self):
+        for i in range(len(self._threads), self.workers):
+            thread = threading.Thread(
+                target=self._work, name="SolrBatchAdder-%d" % i
+            )
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        """
+        Sends the batches of the queue until it gets `None`
+        """
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is None:
+                    return
+                errors = self._send(batch)
+                if errors:
+                    # the producer only learns about failures through `_raise_error`
+                    raise SolrException(
+                        "Could not send %d of the %d items of a batch, first error: %s"
+                        % (len(errors), len(batch), errors[0])
+                    )
+            except Exception as e:
+                log.exception("SolrBatchAdder: could not send a batch")
+                with self._error_lock:
+                    if self._error is None:
+                        self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self):
+        """
+        Raises the first error of the workers since the last call, if any
+        """
+        with self._error_lock:
+            error, self._error = self._error, None
+        if error is not None:
+            raise error
+
     def commit(self):
         """Commit the current batch of documents"""
         try:
@@ -105,12 +295,15 @@ class SolrBatchAdder(object):
     def _append_commit(self, doc):
         """
         Adds a doc with an optional commit
-        :param doc: the document we want to send to solr
+        :param doc: the document we want to send to solr, or a deletion
         :type doc: dict
         """
         if self.batch_len == self.batch_size:
             # flush first, because we are at our batch size
-            self.flush()
+            if self.workers:
+                self._submit()
+            else:
+                self.flush()
         self._add_to_batch(doc)
 
     def _add_to_batch(self, doc):
@@ -123,13 +316,19 @@ class SolrBatchAdder(object):
         self.batch.append(doc)
         self.batch_len += 1
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def __unicode__(self):
         fmt = "SolrBatchAdder(batch_size={batch_size},  batch_len={batch_len}, solr={solr}"
         return fmt.format(**vars(self))
 
 
 @contextmanager
-def solr_batch_adder(solr, batch_size=2000, auto_commit=False):
+def solr_batch_adder(solr, batch_size=2000, auto_commit=False, workers=0):
     """
     A context manager for adding documents in solr
 
@@ -141,10 +340,13 @@ def solr_batch_adder(solr, batch_size=2000, auto_commit=False):
 
     :param auto_commit: whether to commit after adding each batch of documents
     :type auto_commit: bool
+
+    :param workers: the number of threads sending batches concurrently
+    :type workers: int
     """
-    batcher = SolrBatchAdder(solr, batch_size, auto_commit)
+    batcher = SolrBatchAdder(solr, batch_size, auto_commit, workers)
     try:
         yield batcher
     finally:
         log.info("solr_batch_adder: flushing last few items in batch")
-        batcher.flush()
+        batcher.close()
@@ -0,0 +1,223 @@
+"""
+Batching of real-time get lookups.
+
+Solr's `/get` handler returns the latest version of documents by id, including ones that
+are not committed yet, and can look up many ids in one request. When many threads or
+coroutines each look up a single id, a :class:`GetBatcher` merges the ids requested within
+a short window into a single request, and hands each caller its own document back:
+
+    >>> from concurrent.futures import ThreadPoolExecutor
+    >>> coll = conn["collection1"]
+    >>> with ThreadPoolExecutor(32) as pool:
+    ...     docs = list(pool.map(coll.lookup, ["1", "2", "3"]))
+
+A lookup made while no other one is pending is sent at once. The window only delays the
+lookups made while a request is on its way, see the `get_batch_window` parameter of
+:class:`~solrcloudpy.connection.SolrConnection`.
+"""
+import asyncio
+import threading
+
+# the most ids sent in one request; larger batches are sent as soon as they are full
+MAX_BATCH_SIZE = 200
+
+
+def _escape_id(doc_id):
+    """
+    :param doc_id: a document id
+    :return: the id as written in the comma-separated `ids` parameter
+    :rtype: str
+    """
+    return str(doc_id).replace("\\", "\\\\").replace(",", "\\,")
+
+
+def _ids_param(ids):
+    """
+    :param ids: document ids
+    :type ids: list
+    :return: the `ids` parameter of a real-time get request
+    :rtype: str
+    """
+    return ",".join(_escape_id(doc_id) for doc_id in ids)
+
+
+def _docs_by_id(result, unique_key):
+    """
+    :param result: the result of a real-time get request for several ids
+    :type result: SolrResult
+    :param unique_key: the name of the uniqueKey field
+    :type unique_key: str
+    :return: the documents found, by id
+    :rtype: dict
+    """
+    docs = result.dict.get("response", {}).get("docs", [])
+    return dict((str(doc[unique_key]), doc) for doc in docs)
+
+
+class _Batch(object):
+    """
+    The ids requested within one window, and their documents once fetched
+    """
+
+    def __init__(self):
+        # the ids requested, by their string form
+        self.ids = {}
+        self.docs = None
+        self.error = None
+        # set by the batcher using it, see `GetBatcher` and `AsyncGetBatcher`
+        self.full = None
+        self.done = None
+        self.task = None
+
+
+class GetBatcher(object):
+    """
+    Merges the lookups of single ids made from several threads into batched requests.
+
+    A lookup made while no other one is pending sends its request at once. Otherwise the
+    first lookup of a batch waits for `window` seconds, or until the batch holds `max_size`
+    ids, then sends the request. Lookups made meanwhile join the batch and wait for its
+    response.
+    """
+
+    def __init__(self, fetch, window=0.002, max_size=MAX_BATCH_SIZE):
+        """
+        :param fetch: a function taking a list of ids, and returning the documents found by id
+        :type fetch: function
+        :param window: the number of seconds lookups are collected for before a request is sent
+        :type window: float
+        :param max_size: the most ids sent in one request
+        :type max_size: int
+        """
+        self.fetch = fetch
+        self.window = window
+        self.max_size = max_size
+        self._batch = None
+        # the number of batches waiting for their window or their response
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def load(self, doc_id):
+        """
+        :param doc_id: the id of a document
+        :return: the document, or `None` if there is no such document
+        :rtype: dict
+        :raise: SolrException if the request of the batch failed
+        """
+        key = str(doc_id)
+        with self._lock:
+            batch = self._batch
+            leader = batch is None
+            if leader:
+                batch = _Batch()
+                batch.done = threading.Event()
+                if self._pending:
+                    # collect the lookups made until the window is over
+                    batch.full = threading.Event()
+                    self._batch = batch
+                self._pending += 1
+            batch.ids.setdefault(key, doc_id)
+            if batch.full is not None and len(batch.ids) >= self.max_size:
+                self._batch = None
+                batch.full.set()
+
+        if leader:
+            if batch.full is not None:
+                batch.full.wait(self.window)
+                with self._lock:
+                    if self._batch is batch:
+                        self._batch = None
+            try:
+                batch.docs = self.fetch(list(batch.ids.values()))
+            except Exception as e:
+                batch.error = e
+            finally:
+                with self._lock:
+                    self._pending -= 1
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.docs.get(key)
+
+
+def _consume_error(task):
+    """
+    Retrieves the exception of a batch request, so that asyncio does not log it as never
+    retrieved when all the lookups waiting for it were cancelled
+
+    :param task: the task of the request
+    :type task: asyncio.Task
+    """
+    if not task.cancelled():
+        task.exception()
+
+
+class AsyncGetBatcher(object):
+    """
+    Merges the lookups of single ids made from several coroutines into batched requests,
+    like :class:`GetBatcher` does for threads. Must be used from a single event loop.
+    """
+
+    def __init__(self, fetch, window=0.002, max_size=MAX_BATCH_SIZE):
+        """
+        :param fetch: a coroutine function taking a list of ids, and returning the documents found by id
+        :type fetch: function
+        :param window: the number of seconds lookups are collected for before a request is sent
+        :type window: float
+        :param max_size: the most ids sent in one request
+        :type max_size: int
+        """
+        self.fetch = fetch
+        self.window = window
+        self.max_size = max_size
+        self._batch = None
+        # the number of batches waiting for their window or their response
+        self._pending = 0
+
+    async def load(self, doc_id):
+        """
+        :param doc_id: the id of a document
+        :return: the document, or `None` if there is no such document
+        :rtype: dict
+        :raise: SolrException if the request of the batch failed
+        """
+        key = str(doc_id)
+        batch = self._batch
+        if batch is None:
+            batch = _Batch()
+            if self._pending:
+                # collect the lookups made until the window is over
+                batch.full = asyncio.Event()
+                self._batch = batch
+            self._pending += 1
+            # the request runs in its own task, so that cancelling a lookup does not
+            # cancel the lookups of the other callers
+            batch.task = asyncio.ensure_future(self._send(batch))
+            batch.task.add_done_callback(_consume_error)
+        batch.ids.setdefault(key, doc_id)
+        if batch.full is not None and len(batch.ids) >= self.max_size:
+            self._batch = None
+            batch.full.set()
+
+        docs = await asyncio.shield(batch.task)
+        return docs.get(key)
+
+    async def _send(self, batch):
+        """
+        :return: the documents of the batch, by id, once its window is over
+        :rtype: dict
+        """
+        try:
+            if batch.full is not None:
+                try:
+                    await asyncio.wait_for(batch.full.wait(), self.window)
+                except asyncio.TimeoutError:
+                    pass
+                if self._batch is batch:
+                    self._batch = None
+            return await self.fetch(list(batch.ids.values()))
+        finally:
+            self._pending -= 1
@@ -0,0 +1,374 @@
+"""
+Client-side routing of updates to shard leaders.
+
+Solr's default `compositeId` router assigns a document to the shard whose hash range
+contains the MurmurHash3 of the document's id (or of its `router.field` value).
+Computing that hash here lets us send each document straight to the leader of its shard,
+instead of letting a random node forward it.
+"""
+import logging
+import threading
+
+from future.utils import iteritems
+
+from solrcloudpy.utils import SolrException
+
+log = logging.getLogger("solrcloud")
+
+_SEPARATOR = "!"
+_BITS_SEPARATOR = "/"
+
+
+def _to_int32(value):
+    """
+    :param value: an integer
+    :type value: int
+    :return: the value as a signed 32-bit integer, as Java would see it
+    :rtype: int
+    """
+    value &= 0xFFFFFFFF
+    return value - 0x100000000 if value & 0x80000000 else value
+
+
+def murmurhash3_x86_32(data, seed=0):
+    """
+    The 32-bit x86 variant of MurmurHash3, as implemented in `org.apache.solr.common.util.Hash`
+
+    :param data: the value to hash. Strings are hashed as UTF-8
+    :type data: str
+    :type data: bytes
+    :param seed: the hash seed
+    :type seed: int
+    :return: the hash, as a signed 32-bit integer
+    :rtype: int
+    """
+    if not isinstance(data, bytes):
+        data = data.encode("utf-8")
+
+    c1 = 0xCC9E2D51
+    c2 = 0x1B873593
+    length = len(data)
+    h1 = seed & 0xFFFFFFFF
+    rounded_end = length & ~0x3
+
+    for i in range(0, rounded_end, 4):
+        k1 = (
+            data[i]
+            | (data[i + 1] << 8)
+            | (data[i + 2] << 16)
+            | (data[i + 3] << 24)
+        )
+        k1 = (k1 * c1) & 0xFFFFFFFF
+        k1 = ((k1 << 15) | (k1 >> 17)) & 0xFFFFFFFF
+        k1 = (k1 * c2) & 0xFFFFFFFF
+
+        h1 ^= k1
+        h1 = ((h1 << 13) | (h1 >> 19)) & 0xFFFFFFFF
+        h1 = (h1 * 5 + 0xE6546B64) & 0xFFFFFFFF
+
+    # tail
+    k1 = 0
+    tail = length & 0x03
+    if tail == 3:
+        k1 = data[rounded_end + 2] << 16
+    if tail >= 2:
+        k1 |= data[rounded_end + 1] << 8
+    if tail >= 1:
+        k1 |= data[rounded_end]
+        k1 = (k1 * c1) & 0xFFFFFFFF
+        k1 = ((k1 << 15) | (k1 >> 17)) & 0xFFFFFFFF
+        k1 = (k1 * c2) & 0xFFFFFFFF
+        h1 ^= k1
+
+    # finalization
+    h1 ^= length
+    h1 ^= h1 >> 16
+    h1 = (h1 * 0x85EBCA6B) & 0xFFFFFFFF
+    h1 ^= h1 >> 13
+    h1 = (h1 * 0xC2B2AE35) & 0xFFFFFFFF
+    h1 ^= h1 >> 16
+
+    return _to_int32(h1)
+
+
+def _num_bits(part, default):
+    """
+    Parses the `/bits` suffix of a composite id part, e.g. `tenant/4`
+
+    :return: the part without its suffix and the number of bits it contributes
+    :rtype: tuple
+    """
+    idx = part.find(_BITS_SEPARATOR)
+    if idx <= 0:
+        return part, default
+    bits = part[idx + 1 :]
+    if bits.isdigit() and int(bits) <= 32:
+        return part[:idx], int(bits)
+    return part[:idx], default
+
+
+def _split_key(key):
+    """
+    Splits a composite id into at most 3 parts, the way Solr's `CompositeIdRouter` does
+
+    :param key: the composite id
+    :type key: str
+    :return: the parts of the id
+    :rtype: list
+    """
+    first = key.find(_SEPARATOR)
+    if first == -1:
+        return [key]
+
+    parts = [key[:first]]
+    last = len(key) - 1
+    if first < last:
+        second = key.find(_SEPARATOR, first + 1)
+        if second == -1:
+            parts.append(key[first + 1 :])
+        elif second == last:
+            if first < second - 1:
+                parts.append(key[first + 1 : second])
+        else:
+            parts.append(key[first + 1 : second])
+            parts.append(key[second + 1 :])
+    return parts
+
+
+def composite_id_hash(key):
+    """
+    Computes the routing hash of a document id for Solr's `compositeId` router.
+    Ids can have the form `id`, `shardkey!id` or `tenant!user!id`, where any but the
+    last part can specify how many bits of the hash it controls, e.g. `tenant/4!id`
+
+    :param key: the id of the document, or the value of its `router.field`
+    :type key: str
+    :return: the hash, as a signed 32-bit integer
+    :rtype: int
+    """
+    if _SEPARATOR not in key:
+        return murmurhash3_x86_32(key)
+
+    parts = _split_key(key)
+    pieces = len(parts)
+    if key.endswith(_SEPARATOR) and pieces < 3:
+        pieces += 1
+
+    tri_level = pieces == 3
+    num_bits = [8, 8] if tri_level else [16, 0]
+
+    hashes = []
+    for i in range(pieces):
+        part = parts[i] if i < len(parts) else ""
+        if i < pieces - 1:
+            part, num_bits[i] = _num_bits(part, num_bits[i])
+        hashes.append(murmurhash3_x86_32(part) & 0xFFFFFFFF)
+
+    first_bits = num_bits[0]
+    mask0 = 0 if first_bits == 0 else (0xFFFFFFFF << (32 - first_bits)) & 0xFFFFFFFF
+    if tri_level:
+        total = first_bits + num_bits[1]
+        mask1 = 0 if total == 0 else (0xFFFFFFFF << (32 - total)) & 0xFFFFFFFF
+        mask1 ^= mask0
+        mask2 = 0 if total == 32 else ~(mask0 | mask1) & 0xFFFFFFFF
+        masks = [mask0, mask1, mask2]
+    else:
+        masks = [mask0, 0 if first_bits == 32 else 0xFFFFFFFF >> first_bits]
+
+    result = 0
+    for h, mask in zip(hashes, masks):
+        result |= h & mask
+    return _to_int32(result)
+
+
+def _parse_range(hash_range):
+    """
+    :param hash_range: a shard hash range as returned by CLUSTERSTATUS, e.g. `80000000-ffffffff`
+    :type hash_range: str
+    :return: the lower and upper bounds of the range, as signed 32-bit integers
+    :rtype: tuple
+    """
+    low, high = hash_range.split("-")
+    return _to_int32(int(low, 16)), _to_int32(int(high, 16))
+
+
+def _route_key(doc, unique_key, router_field):
+    """
+    :return: the value a document is routed on
+    :rtype: str
+    :raise: SolrException
+    """
+    field = router_field or unique_key
+    value = doc.get(field)
+    if isinstance(value, (list, tuple)):
+        value = value[0] if value else None
+    if value is None:
+        raise SolrException(
+            "No value for %s. Unable to identify the shard of %r" % (field, doc)
+        )
+    if isinstance(value, bool):
+        return str(value).lower()
+    return str(value)
+
+
+def _routing_table(cluster_state, name):
+    """
+    Reads the routing table of a collection from the cluster state
+
+    :param cluster_state: the cluster state of the connection
+    :type cluster_state: dict
+    :param name: the name of the collection
+    :type name: str
+    :return: a `(router_field, [(low, high, shard, leader_url, core), ...])` tuple, or `None`
+        if the collection does not use the `compositeId` router
+    :rtype: tuple
+    """
+    state = cluster_state["collections"].get(name)
+    if not state:
+        return None
+
+    router = state.get("router", {})
+    if router.get("name", "compositeId") != "compositeId":
+        return None
+
+    ranges = []
+    for shard_name, shard in iteritems(state["shards"]):
+        if shard.get("state", "active") != "active" or not shard.get("range"):
+            continue
+        for replica in shard["replicas"].values():
+            if replica.get("leader") == "true" and replica["state"] == "active":
+                low, high = _parse_range(shard["range"])
+                leader = replica["base_url"].rstrip("/") + "/"
+                ranges.append((low, high, shard_name, leader, replica["core"]))
+                break
+        else:
+            log.info("No active leader for shard %s, not routing", shard_name)
+            return None
+
+    return router.get("field"), ranges
+
+
+def _partition(docs, table, unique_key):
+    """
+    Groups documents by the leader of their shard
+
+    :param docs: the documents
+    :type docs: list
+    :param table: the routing table of the collection, see :func:`_routing_table`
+    :type table: tuple
+    :param unique_key: the name of the uniqueKey field, documents are routed on when
+        the collection has no `router.field`
+    :type unique_key: str
+    :return: a dict of `(shard, leader_url, core)` to the list of documents they lead,
+        or `None` if the documents can't be routed on the client
+    :rtype: dict
+    :raise: SolrException if a document lacks the field it is routed on
+    """
+    router_field, ranges = table
+    batches = {}
+    for doc in docs:
+        h = composite_id_hash(_route_key(doc, unique_key, router_field))
+        for low, high, shard, leader, core in ranges:
+            if low <= h <= high:
+                batches.setdefault((shard, leader, core), []).append(doc)
+                break
+        else:
+            # the ranges are being changed, e.g. by a shard split
+            return None
+    return batches
+
+
+class CompositeIdRouter(object):
+    """
+    Maps documents of a collection to the URL of their shard leader.
+
+    The shard hash ranges and leaders are read from the connection's cluster state on
+    first use, and kept until :meth:`invalidate` is called, e.g. after a leader stopped answering.
+    """
+
+    def __init__(self, collection):
+        """
+        :param collection: the collection whose updates are routed
+        :type collection: SolrCollectionSearch
+        """
+        self.collection = collection
+        self._lock = threading.Lock()
+        self._table = None
+
+    def invalidate(self):
+        """
+        Forgets the shard ranges and leaders, so that they are fetched again on next use
+        """
+        with self._lock:
+            self._table = None
+        self.collection.connection.invalidate_cluster_state()
+
+    def _routing_table(self):
+        """
+        :return: the cached routing table, see :func:`_routing_table`
+        :rtype: tuple
+        """
+        with self._lock:
+            if self._table is None:
+                cluster_state = self.collection.connection.cluster_state
+                self._table = (_routing_table(cluster_state, self.collection.name),)
+            return self._table[0]
+
+    def partition(self, docs):
+        """
+        Groups documents by the leader of their shard
+
+        :param docs: the documents
+        :type docs: list
+        :return: a dict of `(shard, leader_url, core)` to the list of documents they lead,
+            or `None` if this collection can't be routed on the client
+        :rtype: dict
+        :raise: SolrException if a document lacks the field it is routed on
+        """
+        table = self._routing_table()
+        if table is None:
+            return None
+        unique_key = None if table[0] else self.collection.unique_key
+        return _partition(docs, table, unique_key)
+
+
+class AsyncCompositeIdRouter(object):
+    """
+    Maps documents of a collection to the URL of their shard leader, like
+    :class:`CompositeIdRouter` does, from an asyncio event loop
+    """
+
+    def __init__(self, collection):
+        """
+        :param collection: the collection whose updates are routed
+        :type collection: AsyncSolrCollectionSearch
+        """
+        self.collection = collection
+        self._table = None
+
+    def invalidate(self):
+        """
+        Forgets the shard ranges and leaders, so that they are fetched again on next use
+        """
+        self._table = None
+        self.collection.connection.invalidate_cluster_state()
+
+    async def partition(self, docs):
+        """
+        Groups documents by the leader of their shard
+
+        :param docs: the documents
+        :type docs: list
+        :return: a dict of `(shard, leader_url, core)` to the list of documents they lead,
+            or `None` if this collection can't be routed on the client
+        :rtype: dict
+        :raise: SolrException if a document lacks the field it is routed on
+        """
+        if self._table is None:
+            cluster_state = await self.collection.connection.cluster_state()
+            self._table = (_routing_table(cluster_state, self.collection.name),)
+        table = self._table[0]
+        if table is None:
+            return None
+        unique_key = None if table[0] else await self.collection.get_unique_key()
+        return _partition(docs, table, unique_key)
@@ -1,8 +1,6 @@
 """
 Get and modify schema
 """
-from solrcloudpy.utils import _Request
-
 
 class SolrSchema(object):
     """
@@ -19,7 +17,7 @@ class SolrSchema(object):
         """
         self.connection = connection
         self.collection_name = collection_name
-        self.client = _Request(connection)
+        self.client = connection.client
 
     @property
     def schema(self):
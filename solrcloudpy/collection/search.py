@@ -3,21 +3,449 @@ Query and update a Solr collection
 """
 
 import datetime as dt
+import functools
 import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from future.utils import iterkeys
+from future.utils import iteritems, iterkeys
 
-from solrcloudpy.utils import CollectionBase, SolrException, as_json_bool
+from solrcloudpy.cache import _freeze_response, _thaw_response, cache_key
+from solrcloudpy.utils import (
+    CollectionBase,
+    LatencyTracker,
+    SolrException,
+    _compress_body,
+    _hedge_delay,
+    _run_all,
+    _with_wt,
+    as_json_bool,
+)
+
+from .documents import compact_response
+from .realtime import GetBatcher, _docs_by_id, _ids_param
+from .routing import CompositeIdRouter
+from .streaming import _raise_for_tuple, iter_docs
+
+log = logging.getLogger("solrcloud")
+
+# the number of documents of a streamed add that are routed to shard leaders at once
+ROUTED_CHUNK_SIZE = 1000
 
 # todo this seems funky -- only called once
 dthandler = lambda obj: obj.isoformat() if isinstance(obj, dt.datetime) else None
 
 
-class SolrCollectionSearch(CollectionBase):
+def _delete_query_body(query):
+    """
+    Builds the JSON body of a delete-by-query update request
+
+    :param query: query parameters, a :class:`~solrcloudpy.parameters.SearchOptions` instance or a dictionary
+    :type query: SearchOptions
+    :type query: dict
+    :return: the update JSON string
+    :rtype: str
+    """
+    if "q" not in iterkeys(query):
+        raise ValueError("query should have a 'q' parameter")
+
+    if hasattr(query, "commonparams"):
+        q = list(query.commonparams["q"])
+        q = q[0]
+    else:
+        q = query["q"]
+
+    return json.dumps({"delete": {"query": "%s" % q}})
+
+
+def _chunks(items, size):
+    """
+    :param items: an iterable
+    :type items: iterable
+    :param size: the maximum size of a chunk
+    :type size: int
+    :return: a generator of lists of at most `size` items
+    :rtype: generator
+    """
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _commands_body(commands):
+    """
+    Builds the JSON body of an update request made of several commands, which solr
+    applies in order. Consecutive deletes are merged into a single `delete` command
+
+    :param commands: `("add", document)` and `("delete", id)` pairs
+    :type commands: list<tuple>
+    :return: the update JSON string
+    :rtype: str
+    """
+    parts = []
+    deletes = []
+    for op, value in commands:
+        if op == "delete":
+            deletes.append(value)
+            continue
+        if deletes:
+            parts.append('"delete":%s' % json.dumps(deletes))
+            deletes = []
+        # a JSON object can't hold several `add` keys, but solr reads them one by one
+        parts.append('"add":%s' % json.dumps({"doc": value}, default=dthandler))
+    if deletes:
+        parts.append('"delete":%s' % json.dumps(deletes))
+    return "{%s}" % ",".join(parts)
+
+
+def _docs_json(docs):
+    """
+    :param docs: the documents to add
+    :type docs: list<dict>
+    :return: the update JSON string adding them
+    :rtype: str
+    """
+    return json.dumps(docs, default=dthandler)
+
+
+def _get_params(ids, params=None):
+    """
+    Builds the parameters of a real-time get request
+
+    :param ids: the id of a document, or a list of ids
+    :type ids: str
+    :type ids: list
+    :param params: other query parameters, e.g. `fl` or `fq`
+    :type params: dict
+    :return: the request parameters
+    :rtype: dict
+    """
+    if isinstance(ids, str) or not hasattr(ids, "__iter__"):
+        ids = [ids]
+    params = dict(iteritems(params)) if params else {}
+    params["ids"] = _ids_param(ids)
+    return params
+
+
+def _optimize_params(wait_searcher, soft_commit, max_segments):
+    """
+    Builds the parameters of an optimize request, see :meth:`SolrCollectionSearch.optimize`
+
+    :return: the request parameters
+    :rtype: dict
+    """
+    return {
+        "softCommit": as_json_bool(soft_commit),
+        "waitSearcher": as_json_bool(wait_searcher),
+        "maxSegments": max_segments,
+        "optimize": "true",
+    }
+
+
+def _cursor_params(params, unique_key, rows=None):
+    """
+    Builds the parameters of a deep-paging search with `cursorMark`, whose sort must
+    end with the uniqueKey field and which can't have a `start` parameter
+
+    :param params: query parameters, a :class:`~solrcloudpy.parameters.SearchOptions` instance or a dictionary
+    :type params: SearchOptions
+    :type params: dict
+    :param unique_key: the name of the uniqueKey field of the collection
+    :type unique_key: str
+    :param rows: the number of documents per page, overriding the `rows` parameter
+    :type rows: int
+    :return: the parameters, without `cursorMark`
+    :rtype: dict
+    """
+    res = dict(iteritems(params)) if params else {}
+    res.pop("start", None)
+    res.pop("cursorMark", None)
+    if rows is not None:
+        res["rows"] = rows
+    elif not res.get("rows"):
+        res["rows"] = 1000
+
+    sort = res.get("sort") or []
+    clauses = []
+    for value in [sort] if isinstance(sort, str) else sort:
+        clauses.extend(c.strip() for c in value.split(",") if c.strip())
+    if not any(c.split()[0] == unique_key for c in clauses):
+        # a tiebreak on the uniqueKey makes the sort total, as cursors require
+        clauses.append("%s asc" % unique_key)
+    res["sort"] = ",".join(clauses)
+    return res
+
+
+class _JsonStream(object):
+    """
+    A request body serializing documents to a JSON array as it is sent, with chunked
+    transfer encoding, so that only one document at a time is held as JSON.
+
+    If `docs` can be iterated over more than once, e.g. a list, the body can be sent again
+    when a request is retried. A one-shot iterable such as a generator can't: a second
+    attempt raises :class:`~solrcloudpy.utils.SolrException` instead of sending partial data.
+    """
+
+    def __init__(self, docs, chunk_size=65536):
+        """
+        :param docs: the documents to serialize
+        :type docs: iterable<dict>
+        :param chunk_size: the approximate number of bytes sent in each chunk
+        :type chunk_size: int
+        """
+        self.docs = docs
+        self.chunk_size = chunk_size
+        self._one_shot = iter(docs) is docs
+        self._started = False
+
+    def __iter__(self):
+        if self._started and self._one_shot:
+            raise SolrException(
+                "Unable to send the documents again, "
+                "they were given as a one-shot iterable"
+            )
+        self._started = True
+
+        chunk = [b"["]
+        size = 1
+        separator = b""
+        for doc in self.docs:
+            data = separator + json.dumps(doc, default=dthandler).encode("utf-8")
+            separator = b","
+            chunk.append(data)
+            size += len(data)
+            if size >= self.chunk_size:
+                yield b"".join(chunk)
+                chunk = []
+                size = 0
+        chunk.append(b"]")
+        yield b"".join(chunk)
+
+
+class _SearchBase(object):
+    """
+    The parts of search and update operations that don't send requests, shared by
+    :class:`SolrCollectionSearch` and :class:`~solrcloudpy.aio.collection.AsyncSolrCollectionSearch`
+    """
+
+    # set by subclasses, see `lookup` and `router`
+    _batcher_class = None
+    _router_class = None
+
+    def __init__(self, connection, name):
+        """
+        :param connection: the connection to Solr
+        :type connection: SolrConnection
+        :param name: the name of the collection
+        :type name: str
+        """
+        super(_SearchBase, self).__init__(connection, name)
+
+        # memoized, see `router` and the uniqueKey accessors of the subclasses
+        self._router = None
+        self._unique_key = None
+
+        # response times of read-only requests, see `_hedging_delay`
+        self._latencies = LatencyTracker()
+
+        # merges concurrent single-id lookups, see `lookup`
+        self._get_batcher = self._batcher_class(
+            self._get_docs, window=connection.get_batch_window or 0
+        )
+
+    @property
+    def router(self):
+        """
+        Retrieves the router used to send updates straight to shard leaders
+        :return: the router
+        :rtype: CompositeIdRouter
+        """
+        if self._router is None:
+            self._router = self._router_class(self)
+        return self._router
+
+    def _read_params(self, params):
+        """
+        :param params: the parameters of a read-only request
+        :type params: dict
+        :return: the parameters, asking for the response format of the connection
+        :rtype: dict
+        """
+        if self.connection.response_format != "json":
+            return _with_wt(params, self.connection.response_format)
+        return params
+
+    def _hedging_delay(self):
+        """
+        :return: the number of seconds to wait for before hedging a read-only request,
+            or `None` to send it to a single server
+        :rtype: float
+        """
+        delay = _hedge_delay(self.connection.hedge_delay, self._latencies)
+        if delay is None or len(set(self.connection.servers)) < 2:
+            return None
+        return delay
+
+    def _invalidate_cache(self):
+        """
+        Forgets the cached responses of this collection, after it was updated
+        """
+        if self.connection.result_cache is not None:
+            self.connection.result_cache.invalidate(self.name)
+
+    def _cached_search(self, params, method, body):
+        """
+        Looks a search up in the result cache of the connection
+
+        :return: the cache key of the search, the cached response or `None`, and the cache
+            generation of this collection, to store the response with once it is received.
+            The key is `None` if the connection has no result cache
+        :rtype: tuple
+        """
+        cache = self.connection.result_cache
+        if cache is None:
+            return None, None, None
+        key = cache_key(self.name, "select", params, method, body)
+        data = cache.get(key)
+        if data is not None:
+            return key, _thaw_response(data), None
+        return key, None, cache.generation(self.name)
+
+    def _cache_response(self, key, response, generation):
+        """
+        Stores the response of a search in the result cache of the connection
+
+        :param key: the cache key of the search, see `_cached_search`
+        :type key: tuple
+        :param response: the response from Solr, before its documents are compacted
+        :type response: SolrResponse
+        :param generation: the cache generation of this collection when the search was sent
+        :type generation: int
+        """
+        if key is not None:
+            data = _freeze_response(response)
+            cache = self.connection.result_cache
+            cache.put(key, data, len(data), generation=generation)
+
+    @staticmethod
+    def _scan_page(response, page, compact):
+        """
+        :param response: the response to a page of a scan
+        :type response: SolrResponse
+        :param page: the parameters of the page
+        :type page: dict
+        :param compact: whether to compact the documents
+        :type compact: bool
+        :return: the documents of the page, and the cursor of the next one
+        :rtype: tuple
+        """
+        if compact:
+            response = compact_response(response, page)
+        result = response.result
+        return result.response.docs, result.nextCursorMark
+
+    @staticmethod
+    def _update_result(resp):
+        """
+        :param resp: the response to an update request
+        :type resp: SolrResponse
+        :return: the response
+        :rtype: SolrResponse
+        :raise: SolrException if the update failed
+        """
+        if resp.code != 200:
+            raise SolrException(resp.result.error)
+        return resp
+
+    def _leader_failed(self, leader_url, error):
+        """
+        Decides what to do when a routed update failed on its shard leader
+
+        :param leader_url: the base URL of the leader
+        :type leader_url: str
+        :param error: the error of the update
+        :type error: SolrException
+        :return: whether the update should be sent again, to any server.
+            Errors any server would return, e.g. a bad document, are not worth it
+        :rtype: bool
+        """
+        if not self.connection.retry_policy.retryable(error.status):
+            return False
+        log.warning("Shard leader %s failed, falling back on any server", leader_url)
+        self.router.invalidate()
+        return True
+
+    @staticmethod
+    def _routed_result(leaders, results):
+        """
+        Checks the results of the parts of a routed update
+
+        :param leaders: the `(shard, leader_url, core)` each part was sent to
+        :type leaders: list<tuple>
+        :param results: the result of each part, or the exception it raised
+        :type results: list
+        :return: the result of the first part, when all of them succeeded
+        :rtype: SolrResult
+        :raise: SolrException naming the shards whose part failed. The parts of the
+            other shards were added
+        """
+        failed = []
+        for (shard, url, core), result in zip(leaders, results):
+            if isinstance(result, SolrException):
+                failed.append((shard, result))
+            elif isinstance(result, BaseException):
+                raise result
+        if not failed:
+            return results[0]
+
+        message = "; ".join("shard %s: %s" % (shard, e) for shard, e in failed)
+        raise SolrException(
+            "Adding documents failed on %d of %d shards, %s"
+            % (len(failed), len(leaders), message),
+            failed[0][1].status,
+        )
+
+
+class SolrCollectionSearch(_SearchBase, CollectionBase):
     """
     Performs search-related operations on a collection
     """
 
+    _batcher_class = GetBatcher
+    _router_class = CompositeIdRouter
+
+    def __init__(self, connection, name):
+        """
+        :param connection: the connection to Solr
+        :type connection: SolrConnection
+        :param name: the name of the collection
+        :type name: str
+        """
+        super(SolrCollectionSearch, self).__init__(connection, name)
+
+        # sends the parts of routed updates in parallel, see `_get_executor`
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def unique_key(self):
+        """
+        Retrieves the name of the uniqueKey field of this collection, once
+        :return: the field name
+        :rtype: str
+        """
+        if self._unique_key is None:
+            response = self.client.get("%s/schema/uniquekey" % self.name).result
+            self._unique_key = response.dict.get("uniqueKey", "id")
+        return self._unique_key
+
     def __repr__(self):
         """
         :return: A string representation of the object
@@ -42,22 +470,55 @@ class SolrCollectionSearch(CollectionBase):
         """
         return self.client.request(path, params=params, method=method, body=body)
 
+    def _get_read_response(self, path, params=None, method="GET", body=None):
+        """
+        Retrieves a response from a read-only solr endpoint. If the connection has a
+        `hedge_delay`, slow requests are hedged by sending a copy to another server.
+
+        :param path: the URL of the solr endpoint
+        :type path: str
+        :param params: query params
+        :type params: dict
+        :param method: the request method
+        :type method: str
+        :param body: the request body
+        :type body: str
+        :return: the response
+        :rtype: SolrResponse
+        """
+        params = self._read_params(params)
+        if self.connection.hedge_delay is None:
+            return self._get_response(path, params, method, body)
+
+        start = time.time()
+        delay = self._hedging_delay()
+        if delay is None:
+            response = self._get_response(path, params, method, body)
+        else:
+            response = self.client.hedged_request(path, delay, params, method, body)
+        self._latencies.record(time.time() - start)
+        return response
+
     def _update(self, body, params=None):
         """
         Sends and update request to the solr collection in JSON format
-        :param body: the update JSON string
+        :param body: the update JSON string, or an iterable of the bytes to send
         :type: str
         :return: the response from Solr
         :rtype: SolrResponse
         :raise: SolrException
         """
         path = "%s/update/json" % self.name
-        resp = self._get_response(path, method="POST", params=params, body=body)
-        if resp.code != 200:
-            raise SolrException(resp.result.error)
-        return resp
+        body, headers = _compress_body(self.connection, body)
+        try:
+            resp = self.client.request(
+                path, params=params, method="POST", body=body, headers=headers
+            )
+        finally:
+            self._invalidate_cache()
+        return self._update_result(resp)
 
-    def search(self, params, method="GET", body=None):
+    def search(self, params, method="GET", body=None, compact=False):
         """
         Search this index
 
@@ -69,10 +530,172 @@ class SolrCollectionSearch(CollectionBase):
         :type method: str
         :param body: the request body
         :type body: str
-        :return: the response from Solr
+        :param compact: whether to return the documents as compact :class:`~solrcloudpy.collection.documents.SolrDocument` instances instead of dicts, which saves memory on large pages
+        :type compact: bool
+        :return: the response from Solr, from the result cache of the connection if it has one
         :rtype: SolrResponse
         """
-        return self._get_response("%s/select" % self.name, params, method, body)
+        key, response, generation = self._cached_search(params, method, body)
+        if response is None:
+            response = self._get_read_response(
+                "%s/select" % self.name, params, method, body
+            )
+            self._cache_response(key, response, generation)
+        if compact:
+            response = compact_response(response, params)
+        return response
+
+    def multi_search(self, queries, max_concurrency=None, timeout=None, compact=False):
+        """
+        Runs searches on this index concurrently, see :meth:`~solrcloudpy.connection.SolrConnection.multi_search`
+
+        :param queries: the parameters of each search, :class:`~solrcloudpy.parameters.SearchOptions` instances or dictionaries
+        :type queries: list
+        :param max_concurrency: the maximum number of searches sent at the same time. Defaults to the `pool_maxsize` of the connection
+        :type max_concurrency: int
+        :param timeout: the number of seconds each search may take, from the moment it is sent
+        :type timeout: float
+        :param compact: whether to return the documents as compact :class:`~solrcloudpy.collection.documents.SolrDocument` instances
+        :type compact: bool
+        :return: the response of each search, in order, or the exception it raised
+        :rtype: list
+        """
+        calls = [
+            functools.partial(self.search, params, compact=compact)
+            for params in queries
+        ]
+        if max_concurrency is None:
+            max_concurrency = self.connection.pool_maxsize
+        executor = self.client._get_executor("multi")
+        return _run_all(executor, calls, max_concurrency, timeout)
+
+    def scan(self, params, rows=None, prefetch=False, compact=False):
+        """
+        Iterates over all the documents matching a query, page by page, with `cursorMark`.
+        Unlike paging with `start`, the cost of each page does not grow with its offset.
+
+        The sort of the query gets a tiebreak on the uniqueKey field if it does not have one.
+        With `prefetch`, the next page is fetched in the background while the
+        documents of the current page are consumed.
+
+        :param params: query parameters. Here `params` can be a :class:`~solrcloudpy.parameters.SearchOptions` instance or a dictionary
+        :type params: SearchOptions
+        :type params: dict
+        :param rows: the number of documents per page. Defaults to the `rows` parameter, or 1000
+        :type rows: int
+        :param prefetch: whether to fetch the next page while the current one is consumed
+        :type prefetch: bool
+        :param compact: whether to return the documents as compact :class:`~solrcloudpy.collection.documents.SolrDocument` instances
+        :type compact: bool
+        :return: a generator of documents
+        :rtype: generator
+        :raise: SolrException
+        """
+        params = _cursor_params(params, self.unique_key, rows)
+
+        def fetch(cursor):
+            page = dict(params)
+            page["cursorMark"] = cursor
+            # pages are not worth caching, and would evict entries that are
+            response = self._get_read_response("%s/select" % self.name, page)
+            return self._scan_page(response, page, compact)
+
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            cursor = "*"
+            docs, next_cursor = fetch(cursor)
+            while True:
+                more = next_cursor != cursor and len(docs) > 0
+                future = None
+                if more and executor is not None:
+                    future = executor.submit(fetch, next_cursor)
+                for doc in docs:
+                    yield doc
+                if not more:
+                    return
+                cursor = next_cursor
+                if future is not None:
+                    docs, next_cursor = future.result()
+                else:
+                    docs, next_cursor = fetch(cursor)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    def _iter_response(
+        self, path, params=None, method="GET", body=None, chunk_size=65536
+    ):
+        """
+        Sends a request whose response is a large `docs` array, and yields its documents as they arrive
+
+        :param path: the URL of the solr endpoint
+        :type path: str
+        :param params: query params
+        :type params: dict
+        :param method: the request method
+        :type method: str
+        :param body: the request body
+        :type body: str
+        :param chunk_size: the number of bytes read from the response at a time
+        :type chunk_size: int
+        :return: a generator of documents
+        :rtype: generator
+        :raise: SolrException
+        """
+        response = self.client.request(path, params, method, body, stream=True)
+        try:
+            for doc in iter_docs(response.iter_content(chunk_size)):
+                _raise_for_tuple(doc)
+                if doc.get("EOF"):
+                    return
+                yield doc
+        finally:
+            response.close()
+
+    def export(self, params, chunk_size=65536):
+        """
+        Exports all the documents matching a query with the `/export` handler.
+        The documents are parsed as they are received, so that memory use does not depend on their number.
+
+        The `/export` handler requires the `fl` and `sort` parameters, on fields with doc values.
+
+        :param params: query parameters. Here `params` can be a :class:`~solrcloudpy.parameters.SearchOptions` instance or a dictionary
+        :type params: SearchOptions
+        :type params: dict
+        :param chunk_size: the number of bytes read from the response at a time
+        :type chunk_size: int
+        :return: a generator of documents
+        :rtype: generator
+        :raise: SolrException
+        """
+        return self._iter_response(
+            "%s/export" % self.name, params, chunk_size=chunk_size
+        )
+
+    def stream(self, expr, chunk_size=65536):
+        """
+        Runs a streaming expression with the `/stream` handler, and yields its tuples
+        as they arrive. The final `EOF` tuple is not returned.
+
+            >>> from solrcloudpy.collection import streaming as se
+            >>> for row in coll.stream(se.facet("logs", "host_s", se.metric("count"))):
+            ...     print(row)
+
+        :param expr: the expression, as a string or an :class:`~solrcloudpy.collection.streaming.Expression`
+        :type expr: str
+        :type expr: Expression
+        :param chunk_size: the number of bytes read from the response at a time
+        :type chunk_size: int
+        :return: a generator of tuples
+        :rtype: generator
+        :raise: SolrException if the expression failed
+        """
+        return self._iter_response(
+            "%s/stream" % self.name,
+            method="POST",
+            body={"expr": str(expr)},
+            chunk_size=chunk_size,
+        )
 
     def clustering(self, params):
         """
@@ -85,7 +708,7 @@ class SolrCollectionSearch(CollectionBase):
         :return: the response from Solr
         :rtype: SolrResponse
         """
-        return self._get_response("%s/clustering" % self.name, params)
+        return self._get_read_response("%s/clustering" % self.name, params)
 
     def mlt(self, params):
         """
@@ -98,19 +721,182 @@ class SolrCollectionSearch(CollectionBase):
         :return: the response from Solr
         :rtype: SolrResponse
         """
-        return self._get_response("%s/mlt" % self.name, params)
+        return self._get_read_response("%s/mlt" % self.name, params)
 
-    def add(self, docs, params=None):
+    def get(self, ids, params=None):
+        """
+        Retrieves documents by id with the real-time get handler, which also sees
+        the documents that are not committed yet
+
+        :param ids: the id of a document, or a list of ids
+        :type ids: str
+        :type ids: list
+        :param params: other query parameters, e.g. `fl` or `fq`
+        :type params: dict
+        :return: the response from Solr, whose `response.docs` are the documents found
+        :rtype: SolrResponse
+        """
+        return self._get_read_response("%s/get" % self.name, _get_params(ids, params))
+
+    def _get_docs(self, ids):
+        """
+        :param ids: document ids
+        :type ids: list
+        :return: the documents found, by id
+        :rtype: dict
+        """
+        return _docs_by_id(self.get(ids).result, self.unique_key)
+
+    def lookup(self, doc_id):
+        """
+        Retrieves a document by id with the real-time get handler. Lookups made from other
+        threads within the `get_batch_window` of the connection are sent in the same request
+
+        :param doc_id: the id of the document
+        :type doc_id: str
+        :return: the document, or `None` if there is no such document
+        :rtype: dict
+        :raise: SolrException
+        """
+        if self.connection.get_batch_window is None:
+            return self._get_docs([doc_id]).get(str(doc_id))
+        return self._get_batcher.load(doc_id)
+
+    def add(self, docs, params=None, stream=False):
         """
         Add a list of document to the collection
 
+        When the connection was created with `route_updates=True`, the documents are
+        split by shard and each part is sent to its shard leader in parallel. The
+        response of the first of these requests is returned once all of them succeeded.
+        If some failed, the :class:`~solrcloudpy.utils.SolrException` raised names their
+        shards: the documents of the other shards were added.
+
+        With `stream=True`, or when `docs` is neither a list nor a tuple (e.g. a generator),
+        the documents are serialized while they are sent instead of being turned into one
+        JSON string first, so that large batches don't need to fit in memory twice. A request
+        whose documents come from a generator can't be retried: if it fails, it raises a
+        :class:`~solrcloudpy.utils.SolrException` saying so rather than sending partial data.
+
+        When updates are routed, streamed documents are read `ROUTED_CHUNK_SIZE` at a time
+        instead, and each chunk is routed like a list, which can be retried. Chunks are sent
+        one after the other: if one fails, the documents of the previous ones were added.
+
         :param docs: a list of documents to add
         :type docs: iterable<dict>
+        :param stream: whether to serialize the documents while sending them
+        :type stream: bool
+        :return: the response from Solr
+        :rtype: SolrResponse
+        :raise: SolrException
+        """
+        if isinstance(docs, dict):
+            docs = [docs]
+        streamed = stream or not isinstance(docs, (list, tuple))
+        if self.connection.route_updates:
+            if not streamed:
+                return self._routed_add(docs, params)
+            result = None
+            for chunk in _chunks(docs, ROUTED_CHUNK_SIZE):
+                result = self._routed_add(chunk, params)
+            if result is None:
+                result = self._routed_add([], params)
+            return result
+        if streamed:
+            return self._update(_JsonStream(docs), params).result
+        return self._update(_docs_json(docs), params).result
+
+    def _routed_add(self, docs, params=None):
+        """
+        Sends each document to the leader of its shard, waiting for all of them to answer
+
+        :param docs: a list of documents to add
+        :type docs: list<dict>
+        :return: the response from Solr
+        :rtype: SolrResponse
+        :raise: SolrException naming the shards the documents could not be added to
+        """
+        batches = self.router.partition(docs)
+        if not batches:
+            return self._update(_docs_json(docs), params).result
+
+        leaders = list(batches)
+        if len(leaders) == 1:
+            return self._update_leader(leaders[0], batches[leaders[0]], params)
+
+        executor = self._get_executor()
+        futures = [
+            executor.submit(self._update_leader, leader, batches[leader], params)
+            for leader in leaders
+        ]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return self._routed_result(leaders, results)
+
+    def _get_executor(self):
+        """
+        :return: the thread pool routed updates are sent from, created on first use
+        :rtype: ThreadPoolExecutor
+        """
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=max(4, self.connection.pool_maxsize)
+                    )
+        return self._executor
+
+    def _update_leader(self, leader, docs, params=None):
+        """
+        Sends documents to a shard leader, falling back on any server if the leader fails
+
+        :param leader: the shard, and the base URL and core name of its leader
+        :type leader: tuple
+        :param docs: the documents of that shard
+        :type docs: list<dict>
         :return: the response from Solr
         :rtype: SolrResponse
         :raise: SolrException
         """
-        return self._update(json.dumps(docs, default=dthandler), params).result
+        body = _docs_json(docs)
+        _, url, core = leader
+        try:
+            compressed, headers = _compress_body(self.connection, body)
+            resp = self.client.request(
+                "%s/update/json" % core,
+                params=params,
+                method="POST",
+                body=compressed,
+                servers=[url],
+                headers=headers,
+            )
+        except SolrException as e:
+            if not self._leader_failed(url, e):
+                raise
+            return self._update(body, params).result
+
+        self._invalidate_cache()
+        return self._update_result(resp).result
+
+    def update_fields(self, updates, params=None):
+        """
+        Applies atomic updates, which change some fields of documents without sending them
+        whole, in a single request. See :mod:`solrcloudpy.collection.updates`
+
+        :param updates: the updates
+        :type updates: list<AtomicUpdate>
+        :param params: query parameters, e.g. `commitWithin`
+        :type params: dict
+        :return: the response from Solr
+        :rtype: SolrResponse
+        :raise: SolrException, e.g. if a document does not have the version of its update
+        """
+        unique_key = self.unique_key
+        return self.add([update.to_doc(unique_key) for update in updates], params)
 
     def delete(self, query, commit=True):
         """
@@ -125,22 +911,43 @@ class SolrCollectionSearch(CollectionBase):
         :rtype: SolrResponse
         :raise: SolrException
         """
-        if "q" not in iterkeys(query):
-            raise ValueError("query should have a 'q' parameter")
-
-        if hasattr(query, "commonparams"):
-            q = list(query.commonparams["q"])
-            q = q[0]
-        else:
-            q = query["q"]
-
-        m = json.dumps({"delete": {"query": "%s" % q}})
-
-        response = self._update(m)
+        response = self._update(_delete_query_body(query))
         if commit:
             self.commit()
         return response
 
+    def delete_ids(self, ids, chunk_size=1000, params=None):
+        """
+        Delete documents by id, sending at most `chunk_size` ids per request.
+        Unlike :meth:`delete`, this does not commit
+
+        :param ids: the ids of the documents
+        :type ids: iterable
+        :param chunk_size: the maximum number of ids sent in one request
+        :type chunk_size: int
+        :param params: query parameters, e.g. `commitWithin`
+        :type params: dict
+        :return: the response from Solr to the last request, or `None` if there were no ids
+        :rtype: SolrResponse
+        :raise: SolrException
+        """
+        result = None
+        for chunk in _chunks(ids, chunk_size):
+            result = self._update(json.dumps({"delete": chunk}), params).result
+        return result
+
+    def _update_commands(self, commands, params=None):
+        """
+        Sends adds and deletes in a single update request, applied in order
+
+        :param commands: `("add", document)` and `("delete", id)` pairs
+        :type commands: list<tuple>
+        :return: the response from Solr
+        :rtype: SolrResponse
+        :raise: SolrException
+        """
+        return self._update(_commands_body(commands), params).result
+
     def optimize(self, wait_searcher=False, soft_commit=False, max_segments=1):
         """
         Optimize a collection for searching
@@ -155,13 +962,11 @@ class SolrCollectionSearch(CollectionBase):
         :rtype: SolrResponse
         :raise: SolrException
         """
-        params = {
-            "softCommit": as_json_bool(soft_commit),
-            "waitSearcher": as_json_bool(wait_searcher),
-            "maxSegments": max_segments,
-            "optimize": "true",
-        }
-        return self._get_response("%s/update" % self.name, params=params).result
+        params = _optimize_params(wait_searcher, soft_commit, max_segments)
+        try:
+            return self._get_response("%s/update" % self.name, params=params).result
+        finally:
+            self._invalidate_cache()
 
     def commit(self):
         """
@@ -3,7 +3,7 @@ Get different statistics about the underlying index in a collection
 """
 from future.utils import iteritems
 
-from solrcloudpy.utils import SolrResult, _Request
+from solrcloudpy.utils import SolrResult
 
 
 class SolrIndexStats(object):
@@ -20,7 +20,7 @@ class SolrIndexStats(object):
         """
         self.connection = connection
         self.name = name
-        self.client = _Request(connection)
+        self.client = connection.client
 
     @property
     def cache_stats(self):
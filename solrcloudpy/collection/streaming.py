@@ -0,0 +1,222 @@
+"""
+Incremental parsing of large JSON responses, and streaming expressions.
+
+Handlers such as `/export` and `/stream` return all the matching documents in a single
+JSON response, which can be far too big to load at once. :func:`iter_docs` reads such a
+response chunk by chunk, and yields the documents of its `docs` array as soon as each one
+is complete, so memory use does not depend on the size of the response.
+
+:class:`Expression` and the helpers below it build the streaming expressions sent to `/stream`.
+"""
+import codecs
+import json
+import re
+
+from solrcloudpy.utils import SolrException
+
+_DOCS_START = re.compile(r'"docs"\s*:\s*\[')
+_SEPARATORS = " \t\r\n,"
+
+
+def _raise_for_tuple(doc):
+    """
+    :param doc: a document of a streamed response
+    :type doc: dict
+    :raise: SolrException if it is the tuple solr sends in place of the results after an error
+    """
+    if "EXCEPTION" in doc:
+        raise SolrException(doc["EXCEPTION"])
+
+
+def iter_docs(chunks):
+    """
+    Yields the elements of the first `docs` array of a JSON response, one at a time
+
+    :param chunks: the body of the response
+    :type chunks: iterable<bytes>
+    :return: a generator of documents
+    :rtype: generator
+    :raise: SolrException if the response is truncated or not valid JSON
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buf = ""
+    pos = None
+
+    def more():
+        for chunk in chunks:
+            data = text.decode(chunk)
+            if data:
+                return data
+        return None
+
+    # skip everything before the array, e.g. the response header
+    while pos is None:
+        data = more()
+        if data is None:
+            raise SolrException("No documents in the response: %s" % buf[:500])
+        buf += data
+        match = _DOCS_START.search(buf)
+        if match is not None:
+            pos = match.end()
+        else:
+            # keep enough to match `"docs" : [` split over two chunks
+            buf = buf[-64:]
+
+    while True:
+        while pos < len(buf) and buf[pos] in _SEPARATORS:
+            pos += 1
+        if pos < len(buf) and buf[pos] == "]":
+            return
+        try:
+            if pos == len(buf):
+                raise ValueError("incomplete")
+            doc, end = decoder.raw_decode(buf, pos)
+        except ValueError:
+            # the next document is not complete yet
+            data = more()
+            if data is None:
+                raise SolrException(
+                    "Truncated response, after: %s" % buf[max(pos - 200, 0) : pos + 200]
+                )
+            buf = buf[pos:] + data
+            pos = 0
+            continue
+        pos = end
+        yield doc
+        if pos > 65536:
+            # forget the documents already yielded
+            buf = buf[pos:]
+            pos = 0
+
+
+class Expression(object):
+    """
+    A streaming expression, e.g. `search(coll, q="*:*", fl="id", sort="id asc")`.
+
+    Positional arguments are either other expressions or raw strings such as collection
+    names. Named parameters are quoted as needed.
+
+        >>> from solrcloudpy.collection import streaming as se
+        >>> expr = se.rollup(
+        ...     se.search("logs", q="*:*", fl="host_s,bytes_i", sort="host_s asc", qt="/export"),
+        ...     "host_s",
+        ...     se.metric("sum", "bytes_i"),
+        ...     se.metric("count"),
+        ... )
+        >>> for row in coll.stream(expr):
+        ...     print(row)
+    """
+
+    def __init__(self, name, *args, **params):
+        """
+        :param name: the name of the stream source, decorator or function
+        :type name: str
+        :param args: the positional arguments
+        :param params: the named parameters
+        """
+        self.name = name
+        self.args = args
+        self.params = params
+
+    def __str__(self):
+        parts = [str(arg) for arg in self.args]
+        parts.extend(
+            "%s=%s" % (key, _format_param(value))
+            for key, value in sorted(self.params.items())
+        )
+        return "%s(%s)" % (self.name, ",".join(parts))
+
+    def __repr__(self):
+        return "<Expression %s>" % self
+
+
+def _format_param(value):
+    """
+    :return: the value of a named parameter, as written in an expression
+    :rtype: str
+    """
+    if isinstance(value, Expression):
+        return str(value)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, (list, tuple)):
+        value = ",".join(str(v) for v in value)
+    return '"%s"' % str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def metric(name, field="*"):
+    """
+    :param name: the metric, e.g. `count`, `sum`, `avg`, `min` or `max`
+    :type name: str
+    :param field: the field the metric is computed on
+    :type field: str
+    :return: e.g. `sum(price_f)`
+    :rtype: Expression
+    """
+    return Expression(name, field)
+
+
+def search(collection, q="*:*", **params):
+    """
+    :param collection: the collection to search
+    :type collection: str
+    :param q: the query
+    :type q: str
+    :param params: other parameters, e.g. `fl`, `sort` or `qt="/export"` to stream all the results
+    :return: a `search` stream source
+    :rtype: Expression
+    """
+    return Expression("search", collection, q=q, **params)
+
+
+def rollup(stream, over, *metrics):
+    """
+    :param stream: the stream to group, sorted on the `over` fields
+    :type stream: Expression
+    :param over: the fields to group by
+    :type over: str
+    :type over: list
+    :param metrics: the metrics to compute for each group
+    :return: a `rollup` stream decorator
+    :rtype: Expression
+    """
+    return Expression("rollup", stream, *metrics, over=over)
+
+
+def facet(collection, buckets, *metrics, **params):
+    """
+    :param collection: the collection to facet
+    :type collection: str
+    :param buckets: the fields to bucket by
+    :type buckets: str
+    :type buckets: list
+    :param metrics: the metrics to compute for each bucket
+    :param params: other parameters, e.g. `q`, `bucketSorts` or `bucketSizeLimit`
+    :return: a `facet` stream source
+    :rtype: Expression
+    """
+    params.setdefault("q", "*:*")
+    return Expression("facet", collection, *metrics, buckets=buckets, **params)
+
+
+def parallel(collection, stream, workers, sort, **params):
+    """
+    :param collection: the collection whose nodes run the workers
+    :type collection: str
+    :param stream: the stream each worker runs, whose sources set `partitionKeys`
+    :type stream: Expression
+    :param workers: the number of workers
+    :type workers: int
+    :param sort: the sort of the tuples the workers return, e.g. `a_s asc`
+    :type sort: str
+    :param params: other parameters, e.g. `zkHost`
+    :return: a `parallel` stream decorator
+    :rtype: Expression
+    """
+    return Expression(
+        "parallel", collection, stream, workers=workers, sort=sort, **params
+    )
@@ -0,0 +1,133 @@
+"""
+Atomic updates of documents.
+
+An atomic update changes some fields of a document that is already indexed, without sending
+the whole document again. Solr rebuilds the document from its stored fields and applies the
+changes:
+
+    >>> from solrcloudpy.collection.updates import AtomicUpdate
+    >>> coll.update_fields([
+    ...     AtomicUpdate("1").inc("views_i").set("title_s", "Hello"),
+    ...     AtomicUpdate("2", version=1681234567890).add("tags_ss", ["a", "b"]),
+    ... ])
+
+With a `version`, the update only succeeds if the document still has that `_version_`, and
+solr rejects it otherwise (optimistic concurrency). Updates can also be queued in a
+:class:`~solrcloudpy.collection.indexer.SolrBatchAdder` next to full documents.
+
+Atomic updates require the fields of the collection to be stored, or to have doc values.
+"""
+
+
+class AtomicUpdate(object):
+    """
+    The changes to the fields of one document. Each method returns the update itself,
+    so that changes can be chained
+    """
+
+    def __init__(self, doc_id, version=None):
+        """
+        :param doc_id: the id of the document
+        :type doc_id: str
+        :param version: the `_version_` the document must have for the update to apply.
+            A negative version requires the document not to exist, `1` requires it to exist
+        :type version: int
+        """
+        self.doc_id = doc_id
+        self.version = version
+        # field name -> {operation: value}
+        self.fields = {}
+
+    def _op(self, op, field, value):
+        self.fields.setdefault(field, {})[op] = value
+        return self
+
+    def set(self, field, value):
+        """
+        Replaces the value of a field. A `None` value removes the field
+
+        :param field: the field name
+        :type field: str
+        :param value: the new value, or list of values
+        :return: self
+        :rtype: AtomicUpdate
+        """
+        return self._op("set", field, value)
+
+    def add(self, field, value):
+        """
+        Adds values to a multi-valued field
+
+        :param field: the field name
+        :type field: str
+        :param value: a value, or a list of values
+        :return: self
+        :rtype: AtomicUpdate
+        """
+        return self._op("add", field, value)
+
+    def add_distinct(self, field, value):
+        """
+        Adds values to a multi-valued field, if it does not have them yet. Requires solr 7.3
+
+        :param field: the field name
+        :type field: str
+        :param value: a value, or a list of values
+        :return: self
+        :rtype: AtomicUpdate
+        """
+        return self._op("add-distinct", field, value)
+
+    def remove(self, field, value):
+        """
+        Removes all the occurrences of values from a multi-valued field
+
+        :param field: the field name
+        :type field: str
+        :param value: a value, or a list of values
+        :return: self
+        :rtype: AtomicUpdate
+        """
+        return self._op("remove", field, value)
+
+    def remove_regex(self, field, pattern):
+        """
+        Removes the values of a multi-valued field that match regular expressions
+
+        :param field: the field name
+        :type field: str
+        :param pattern: a regular expression, or a list of them
+        :type pattern: str
+        :return: self
+        :rtype: AtomicUpdate
+        """
+        return self._op("removeregex", field, pattern)
+
+    def inc(self, field, amount=1):
+        """
+        Increments a numeric field
+
+        :param field: the field name
+        :type field: str
+        :param amount: the amount to add, which may be negative
+        :type amount: int
+        :return: self
+        :rtype: AtomicUpdate
+        """
+        return self._op("inc", field, amount)
+
+    def to_doc(self, unique_key="id"):
+        """
+        :param unique_key: the name of the uniqueKey field of the collection
+        :type unique_key: str
+        :return: the update as the document sent to solr
+        :rtype: dict
+        """
+        doc = {unique_key: self.doc_id}
+        doc.update((field, dict(ops)) for field, ops in self.fields.items())
+        if self.version is not None:
+            doc["_version_"] = self.version
+        return doc
+
+    def __repr__(self):
+        return "AtomicUpdate(%r, %r)" % (self.doc_id, self.fields)
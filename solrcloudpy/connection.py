@@ -13,18 +13,179 @@ To get a :class:`~solrcloudpy.SolrCollection` instance from a :class:`SolrConnec
 
 
 """
+import functools
 import json
+import threading
+import time
+from collections import OrderedDict
 
 import semver
 from future.utils import iteritems
 
 import solrcloudpy.collection as collection
-from solrcloudpy.utils import _Request
+from solrcloudpy.balancer import get_balancer
+from solrcloudpy.breaker import get_circuit_breaker
+from solrcloudpy.cache import get_result_cache
+from solrcloudpy.retry import get_retry_policy
+from solrcloudpy.utils import _Request, _run_all
 
 MIN_SUPPORTED_VERSION = ">5.4.0"
 
 MAX_SUPPORTED_VERSION = "<=9.0.0"
 
+RESPONSE_FORMATS = ("json", "javabin")
+
+# the most collection handles a connection keeps; the least recently used ones are dropped
+MAX_CACHED_COLLECTIONS = 256
+
+
+def _cached_collection(cache, name, factory):
+    """
+    Retrieves a collection handle from the cache of a connection, creating it if needed
+
+    :param cache: the collection handles, least recently used first
+    :type cache: OrderedDict
+    :param name: the name of the collection
+    :type name: str
+    :param factory: creates the handle of a collection from its name
+    :type factory: function
+    :return: the collection handle
+    """
+    coll = cache.get(name)
+    if coll is not None:
+        cache.move_to_end(name)
+        return coll
+    coll = cache[name] = factory(name)
+    while len(cache) > MAX_CACHED_COLLECTIONS:
+        cache.popitem(last=False)
+    return coll
+
+
+class _ClusterState(object):
+    """
+    The cached cluster state of a connection, as returned by the CLUSTERSTATUS action of
+    the collections API. Fetching it is left to the connection
+    """
+
+    # the parameters of the CLUSTERSTATUS request
+    params = {"action": "CLUSTERSTATUS", "wt": "json"}
+
+    def __init__(self):
+        self._state = None
+        self._time = 0
+
+    def get(self, ttl):
+        """
+        :param ttl: number of seconds the state is kept for
+        :type ttl: float
+        :return: the state, or `None` if it was never fetched, expired or was invalidated
+        :rtype: dict
+        """
+        if self._state is None or time.time() - self._time >= ttl:
+            return None
+        return self._state
+
+    def set(self, result):
+        """
+        :param result: the result of a CLUSTERSTATUS request
+        :type result: SolrResult
+        :return: the state
+        :rtype: dict
+        """
+        self._state = result.dict["cluster"]
+        self._time = time.time()
+        return self._state
+
+    def invalidate(self):
+        """
+        Drops the state, so that it is fetched again on next use
+        """
+        self._state = None
+
+
+def _collections_from_tree(response):
+    """
+    Extracts collection names from the zookeeper tree listing `/collections`
+
+    :param response: the result of the zookeeper admin request
+    :type response: SolrResult
+    :return: a list of collection names
+    :rtype: list
+    """
+    if "children" not in response["tree"][0]:
+        return []
+
+    if response["tree"][0]["data"]["title"] == "/collections":
+        # solr 5.3 and older
+        data = response["tree"][0]["children"]
+    else:
+        # solr 5.4+
+        data = None
+        for branch in response["tree"]:
+            if data is not None:
+                break
+            for child in branch["children"]:
+                if child["data"]["title"] == "/collections":
+                    if "children" not in child:
+                        return []
+                    else:
+                        data = child["children"]
+                        break
+    colls = []
+    if data:
+        colls = [node["data"]["title"] for node in data]
+    return colls
+
+
+def _nodes_from_tree(response):
+    """
+    Extracts the `host:port` of live nodes from the zookeeper tree listing `/live_nodes`
+
+    :param response: the result of the zookeeper admin request
+    :type response: SolrResult
+    :return: a list of nodes
+    :rtype: list
+    """
+    children = [d["data"]["title"] for d in response["tree"][0]["children"]]
+    return [c.replace("_solr", "") for c in children]
+
+
+def _unhealthy_replicas(collections):
+    """
+    Lists the replicas that are not active in a CLUSTERSTATUS response
+
+    :param collections: the `cluster.collections` section of a CLUSTERSTATUS response
+    :type collections: dict
+    :return: a list of problematic replicas
+    :rtype: list
+    """
+    res = []
+    for collection_name, collection in list(collections.items()):
+        for shard_name, shard in list(collection["shards"].items()):
+            for replica_name, replica in list(shard["replicas"].items()):
+                if replica["state"] != "active":
+                    item = {
+                        "collection": collection_name,
+                        "replica": replica_name,
+                        "shard": shard_name,
+                        "info": replica,
+                    }
+                    res.append(item)
+    return res
+
+
+def _health_status(res):
+    """
+    :param res: a list of problematic replicas
+    :type res: list
+    :return: a dict representing the status of the cluster
+    :rtype: dict
+    """
+    if not res:
+        return {"status": "OK"}
+
+    return {"status": "NOT OK", "details": res}
+
 
 class SolrConnection(object):
 
@@ -52,6 +213,42 @@ class SolrConnection(object):
     :type request_retries: int
     :param use_https: True if https is required
     :type use_https: bool
+    :param keep_alive: whether to keep HTTP connections open and reuse them across requests. The default value is ``True``.
+    :type keep_alive: bool
+    :param pool_maxsize: the maximum number of connections kept open to each server when ``keep_alive`` is set
+    :type pool_maxsize: int
+    :param pool_idle_timeout: number of seconds after which an idle connection is closed instead of being reused. ``None`` keeps idle connections open.
+    :type pool_idle_timeout: float
+    :param pool_block: whether requests should wait for a free pooled connection instead of opening extra ones, which bounds the number of open connections to each server to ``pool_maxsize``
+    :type pool_block: bool
+    :param route_updates: whether to send added documents straight to the leader of their shard, by hashing their ids like Solr's `compositeId` router does. The default value is ``False``.
+    :type route_updates: bool
+    :param cluster_state_ttl: number of seconds the cluster state returned by CLUSTERSTATUS is cached for. It is also dropped whenever this client changes the cluster through the collections API. The default value is ``0``, which fetches it on every access.
+    :type cluster_state_ttl: float
+    :param balancer: the strategy used to pick the server of each request: ``random`` (the default), ``least_outstanding``, ``ewma``, ``p2c`` or a :class:`~solrcloudpy.balancer.Balancer` instance
+    :type balancer: str
+    :param circuit_breaker: whether to stop sending requests to servers that keep failing until they recover. ``True`` (the default) uses a :class:`~solrcloudpy.breaker.CircuitBreaker` with default settings, so a server that failed 3 requests in a row gets no requests for a while. This is a change from versions up to 4.0.1, which always tried every server: pass ``False`` to keep that behaviour, or pass your own instance.
+    :type circuit_breaker: bool
+    :param retry_policy: decides whether and when failed requests are retried. Defaults to a :class:`~solrcloudpy.retry.RetryPolicy` with default settings, which waits before each retry with an exponential backoff, honors `Retry-After`, and gives up once retries exceed a budget of 20% of the requests. This is a change from versions up to 4.0.1, which retried at once and without limit: ``RetryPolicy(backoff_base=0, budget_ratio=None)`` comes closest to that.
+    :type retry_policy: RetryPolicy
+    :param hedge_delay: when set, a search, mlt or clustering request that got no response after this delay is also sent to another server, and the first response is used. Either a number of seconds, or a percentile of the recent response times of the collection such as ``"p95"``. The default value is ``None``, which disables hedging.
+    :type hedge_delay: float
+    :param response_format: the format of the responses to search, mlt and clustering requests, either ``"json"`` or ``"javabin"``. Javabin only saves network: responses are smaller, but the pure python decoder takes about 5 to 8 times as much CPU as the JSON one, so it is not recommended for CPU-bound clients. See :mod:`solrcloudpy.javabin`. The default value is ``"json"``
+    :type response_format: str
+    :param accept_compressed: whether to let servers send compressed responses. The default value is ``True``
+    :type accept_compressed: bool
+    :param compress_updates: whether to gzip the bodies of update requests. Solr decompresses them transparently. The default value is ``False``
+    :type compress_updates: bool
+    :param compression_level: the gzip compression level of update bodies, from 1 (fastest) to 9 (smallest). The default value is ``6``
+    :type compression_level: int
+    :param compression_min_size: the size in bytes under which update bodies are sent uncompressed. The default value is ``1024``
+    :type compression_min_size: int
+    :param result_cache: `True` to cache search responses in a default :class:`~solrcloudpy.cache.ResultCache`, or a :class:`~solrcloudpy.cache.ResultCache` instance. The default value is ``None``, which disables caching
+    :type result_cache: ResultCache
+    :param max_query_length: the length of the query string above which a `GET` request is sent as a `POST` with its parameters form-encoded in the body, so that long queries don't hit the URL length limit of the servers. The default value is ``4096``. ``None`` disables switching
+    :type max_query_length: int
+    :param get_batch_window: the number of seconds the single-id lookups of a collection are collected for, to be sent in one real-time get request. See :mod:`solrcloudpy.collection.realtime`. A lookup made while no other one is pending is sent at once, so only concurrent lookups wait for the window. The default value is ``0.002``. ``None`` sends each lookup on its own
+    :type get_batch_window: float
     """
 
     def __init__(
@@ -66,6 +263,24 @@ class SolrConnection(object):
         version="7.7.0",
         request_retries=1,
         use_https=False,
+        keep_alive=True,
+        pool_maxsize=10,
+        pool_idle_timeout=30,
+        pool_block=False,
+        route_updates=False,
+        cluster_state_ttl=0,
+        balancer=None,
+        circuit_breaker=True,
+        retry_policy=None,
+        hedge_delay=None,
+        response_format="json",
+        accept_compressed=True,
+        compress_updates=False,
+        compression_level=6,
+        compression_min_size=1024,
+        result_cache=None,
+        max_query_length=4096,
+        get_batch_window=0.002,
     ):
         self.auth = auth
         self.user = user
@@ -74,6 +289,29 @@ class SolrConnection(object):
         self.webappdir = webappdir
         self.version = version
         self.request_retries = request_retries
+        self.keep_alive = keep_alive
+        self.pool_maxsize = pool_maxsize
+        self.pool_idle_timeout = pool_idle_timeout
+        self.pool_block = pool_block
+        self.route_updates = route_updates
+        self.cluster_state_ttl = cluster_state_ttl
+        self.balancer = get_balancer(balancer)
+        self.circuit_breaker = get_circuit_breaker(circuit_breaker)
+        self.retry_policy = get_retry_policy(retry_policy)
+        self.hedge_delay = hedge_delay
+        if response_format not in RESPONSE_FORMATS:
+            raise ValueError(
+                "Unknown response format %r, expected one of %s"
+                % (response_format, ", ".join(RESPONSE_FORMATS))
+            )
+        self.response_format = response_format
+        self.accept_compressed = accept_compressed
+        self.compress_updates = compress_updates
+        self.compression_level = compression_level
+        self.compression_min_size = compression_min_size
+        self.result_cache = get_result_cache(result_cache)
+        self.max_query_length = max_query_length
+        self.get_batch_window = get_batch_window
 
         if not semver.match(version, MIN_SUPPORTED_VERSION) and semver.match(
             version, MAX_SUPPORTED_VERSION
@@ -91,21 +329,24 @@ class SolrConnection(object):
         if type(server) == str:
             self.url = self.url_template.format(server=server)
             servers = [self.url, self.url]
-            if detect_live_nodes:
-                url = servers[0]
-                self.servers = self.detect_nodes(url)
-            else:
-                self.servers = servers
         if type(server) == list:
             servers = [self.url_template.format(server=a) for a in server]
-            if detect_live_nodes:
-                url = servers[0]
-                self.servers = self.detect_nodes(url)
-            else:
-                self.servers = servers
+        self.servers = servers
 
+        # a single transport, shared by every object derived from this connection
         self.client = _Request(self)
 
+        # collection handles are cached so repeated lookups reuse them, see `_collection`
+        self._collections = OrderedDict()
+        self._collections_lock = threading.Lock()
+
+        # see the `cluster_state` property
+        self._cluster_state = _ClusterState()
+        self._cluster_state_lock = threading.Lock()
+
+        if detect_live_nodes:
+            self.servers = self.detect_nodes(servers[0])
+
     def detect_nodes(self, _):
         """
         Queries Solr's zookeeper integration for live nodes
@@ -127,30 +368,7 @@ class SolrConnection(object):
         """
         params = {"detail": "false", "path": "/collections"}
         response = self.client.get(self.zk_path, params).result
-
-        if "children" not in response["tree"][0]:
-            return []
-
-        if response["tree"][0]["data"]["title"] == "/collections":
-            # solr 5.3 and older
-            data = response["tree"][0]["children"]
-        else:
-            # solr 5.4+
-            data = None
-            for branch in response["tree"]:
-                if data is not None:
-                    break
-                for child in branch["children"]:
-                    if child["data"]["title"] == "/collections":
-                        if "children" not in child:
-                            return []
-                        else:
-                            data = child["children"]
-                            break
-        colls = []
-        if data:
-            colls = [node["data"]["title"] for node in data]
-        return colls
+        return _collections_from_tree(response)
 
     def _list_cores(self):
         """
@@ -199,29 +417,35 @@ class SolrConnection(object):
                             }
                             res.append(item)
         else:
-            params = {"action": "CLUSTERSTATUS", "wt": "json"}
-            response = self.client.get(
-                ("/{webappdir}/admin/collections".format(webappdir=self.webappdir)),
-                params,
-            ).result
-            for collection_name, collection in list(
-                response.dict["cluster"]["collections"].items()
-            ):
-                for shard_name, shard in list(collection["shards"].items()):
-                    for replica_name, replica in list(shard["replicas"].items()):
-                        if replica["state"] != "active":
-                            item = {
-                                "collection": collection_name,
-                                "replica": replica_name,
-                                "shard": shard_name,
-                                "info": replica,
-                            }
-                            res.append(item)
+            res = _unhealthy_replicas(self.cluster_state["collections"])
 
-        if not res:
-            return {"status": "OK"}
+        return _health_status(res)
 
-        return {"status": "NOT OK", "details": res}
+    @property
+    def cluster_state(self):
+        """
+        The state of the cluster, as returned by the CLUSTERSTATUS action of the collections API.
+        It is cached for `cluster_state_ttl` seconds, and shared by all the collections of this connection.
+
+        :return: a dict with the `collections`, `aliases` and `live_nodes` of the cluster
+        :rtype: dict
+        """
+        with self._cluster_state_lock:
+            state = self._cluster_state.get(self.cluster_state_ttl)
+            if state is None:
+                response = self.client.get(
+                    "/{webappdir}/admin/collections".format(webappdir=self.webappdir),
+                    _ClusterState.params,
+                )
+                state = self._cluster_state.set(response.result)
+            return state
+
+    def invalidate_cluster_state(self):
+        """
+        Drops the cached cluster state, so that the next access to `cluster_state` fetches it again
+        """
+        with self._cluster_state_lock:
+            self._cluster_state.invalidate()
 
     @property
     def cluster_leader(self):
@@ -245,9 +469,7 @@ class SolrConnection(object):
         """
         params = {"detail": "true", "path": "/live_nodes"}
         response = self.client.get(self.zk_path, params).result
-        children = [d["data"]["title"] for d in response["tree"][0]["children"]]
-        nodes = [c.replace("_solr", "") for c in children]
-        return [self.url_template.format(server=a) for a in nodes]
+        return [self.url_template.format(server=a) for a in _nodes_from_tree(response)]
 
     def create_collection(self, collname, *args, **kwargs):
         r"""
@@ -261,9 +483,53 @@ class SolrConnection(object):
         :return: the created collection
         :rtype: SolrCollection
         """
-        coll = collection.SolrCollection(self, collname)
+        coll = self._collection(collname)
         return coll.create(*args, **kwargs)
 
+    def multi_search(self, queries, max_concurrency=None, timeout=None, compact=False):
+        """
+        Runs searches concurrently, so that they take about as long as the slowest one
+
+            >>> res = conn.multi_search([("products", {"q": "shoes"}), ("reviews", {"q": "shoes"})])
+            >>> [r if isinstance(r, Exception) else r.result.response.numFound for r in res]
+            [12, SolrException('Timed out after 2.000s')]
+
+        :param queries: the searches, as `(collection name, params)` pairs whose params are a :class:`~solrcloudpy.parameters.SearchOptions` instance or a dictionary
+        :type queries: list
+        :param max_concurrency: the maximum number of searches sent at the same time. Defaults to the `pool_maxsize` of the connection
+        :type max_concurrency: int
+        :param timeout: the number of seconds each search may take, from the moment it is sent. ``None`` waits for as long as they take
+        :type timeout: float
+        :param compact: whether to return the documents as compact :class:`~solrcloudpy.collection.documents.SolrDocument` instances
+        :type compact: bool
+        :return: the response of each search, in order, or the exception it raised. A failed search does not fail the others
+        :rtype: list
+        """
+        calls = [
+            functools.partial(self[name].search, params, compact=compact)
+            for name, params in queries
+        ]
+        if max_concurrency is None:
+            max_concurrency = self.pool_maxsize
+        executor = self.client._get_executor("multi")
+        return _run_all(executor, calls, max_concurrency, timeout)
+
+    def _collection(self, name):
+        """
+        Retrieves the cached handle of a solr collection, creating it on first access.
+        At most `MAX_CACHED_COLLECTIONS` handles are kept, so that looking up many names,
+        or names that are not collections, does not grow the cache forever
+        :param name: the name of the collection
+        :type name: str
+        :return: SolrCollection
+        """
+        with self._collections_lock:
+            return _cached_collection(
+                self._collections,
+                name,
+                lambda name: collection.SolrCollection(self, name),
+            )
+
     def __getattr__(self, name):
         """
         Convenience method for retrieving a solr collection
@@ -271,7 +537,12 @@ class SolrConnection(object):
         :type name: str
         :return: SolrCollection
         """
-        return collection.SolrCollection(self, name)
+        if "_collections" not in self.__dict__ or name.startswith("_"):
+            # not fully initialized yet, e.g. while unpickling, or a probe for
+            # a private or special attribute, such as IPython's `_repr_html_`.
+            # Such collections are still available as `conn["_name"]`
+            raise AttributeError(name)
+        return self._collection(name)
 
     def __getitem__(self, name):
         """
@@ -280,7 +551,7 @@ class SolrConnection(object):
         :type name: str
         :return: SolrCollection
         """
-        return collection.SolrCollection(self, name)
+        return self._collection(name)
 
     def __dir__(self):
         """
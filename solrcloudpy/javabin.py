@@ -0,0 +1,375 @@
+"""
+Decode Solr responses in the `javabin` format.
+
+`javabin` is the binary format SolrJ uses. Responses are smaller than in JSON, since
+numbers are sent in binary and field names only once per response, and decoding them
+allocates less memory. This decoder is written in pure python though, so it takes about 5 to
+8 times as much CPU as the C JSON decoder of the standard library. Javabin only saves
+network, and is not recommended for CPU-bound clients: run `benchmarks/javabin_decode.py`
+to compare both on result sets like yours before switching.
+
+Error responses are sent in javabin too, their message is read the same way as in JSON.
+
+:func:`loads` builds the same structures as a `wt=json&json.nl=map` response, so that
+a :class:`~solrcloudpy.utils.SolrResult` looks the same whatever the format:
+
+ - named lists are dicts
+ - document lists are dicts with `numFound`, `start`, `maxScore` and `docs` keys
+ - dates are ISO-8601 strings, e.g. `2020-01-31T12:00:00Z`
+ - byte arrays are base64 strings
+
+    >>> from solrcloudpy import SolrConnection
+    >>> conn = SolrConnection(response_format="javabin")
+
+"""
+import base64
+import datetime as dt
+import struct
+import uuid
+
+VERSION = 2
+
+CONTENT_TYPE = "application/octet-stream"
+
+# tags of the values whose type is stored in the low bits of the tag byte
+NULL = 0
+BOOL_TRUE = 1
+BOOL_FALSE = 2
+BYTE = 3
+SHORT = 4
+DOUBLE = 5
+INT = 6
+LONG = 7
+FLOAT = 8
+DATE = 9
+MAP = 10
+SOLRDOC = 11
+SOLRDOCLST = 12
+BYTEARR = 13
+ITERATOR = 14
+END = 15
+SOLRINPUTDOC = 16
+MAP_ENTRY_ITER = 17
+ENUM_FIELD_VALUE = 18
+MAP_ENTRY = 19
+UUID = 20
+
+# tags of the values whose type is stored in the 3 high bits of the tag byte,
+# and whose size or value is stored in the 5 low bits
+STR = 1
+SINT = 2
+SLONG = 3
+ARR = 4
+ORDERED_MAP = 5
+NAMED_LST = 6
+EXTERN_STRING = 7
+
+_EPOCH = dt.datetime(1970, 1, 1)
+_END = object()
+
+_unpack_byte = struct.Struct(">b").unpack_from
+_unpack_short = struct.Struct(">h").unpack_from
+_unpack_int = struct.Struct(">i").unpack_from
+_unpack_long = struct.Struct(">q").unpack_from
+_unpack_float = struct.Struct(">f").unpack_from
+_unpack_double = struct.Struct(">d").unpack_from
+_pack_float = struct.Struct(">f").pack
+
+
+def _format_date(millis):
+    """
+    :param millis: milliseconds since the epoch
+    :type millis: int
+    :return: the date the way Solr writes it in JSON
+    :rtype: str
+    """
+    date = _EPOCH + dt.timedelta(milliseconds=millis)
+    if date.microsecond:
+        return date.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+    return date.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _shortest_float(value):
+    """
+    :param value: a 32-bit float, widened to a python float
+    :type value: float
+    :return: the float with the fewest digits that is the same 32-bit float,
+        i.e. the value Solr writes in JSON
+    :rtype: float
+    """
+    packed = _pack_float(value)
+    for precision in (6, 7, 8):
+        shorter = float("%.*g" % (precision, value))
+        if _pack_float(shorter) == packed:
+            return shorter
+    return value
+
+
+class _Decoder(object):
+    """
+    Reads the values of a single javabin payload
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+        self.strings = []
+
+    def read_byte(self):
+        byte = self.data[self.pos]
+        self.pos += 1
+        return byte
+
+    def read_vint(self):
+        data = self.data
+        pos = self.pos
+        byte = data[pos]
+        pos += 1
+        value = byte & 0x7F
+        shift = 7
+        while byte & 0x80:
+            byte = data[pos]
+            pos += 1
+            value |= (byte & 0x7F) << shift
+            shift += 7
+        self.pos = pos
+        return value
+
+    def read_size(self, tag):
+        size = tag & 0x1F
+        if size == 0x1F:
+            size += self.read_vint()
+        return size
+
+    def read_val(self):
+        data = self.data
+        pos = self.pos
+        tag = data[pos]
+        kind = tag >> 5
+        # short strings and field names make up most of a result page, read them inline
+        if kind == STR:
+            size = tag & 0x1F
+            if size != 0x1F:
+                self.pos = pos + 1 + size
+                return data[pos + 1 : self.pos].decode("utf-8")
+        elif kind == EXTERN_STRING:
+            index = tag & 0x1F
+            if 0 < index < 0x1F:
+                self.pos = pos + 1
+                return self.strings[index - 1]
+        self.pos = pos + 1
+        if kind:
+            return _TAGGED[kind](self, tag)
+        return _SIMPLE[tag](self)
+
+    # values tagged in the high bits
+
+    def read_str(self, tag):
+        size = self.read_size(tag)
+        start = self.pos
+        self.pos = start + size
+        return self.data[start : self.pos].decode("utf-8")
+
+    def read_small_int(self, tag):
+        value = tag & 0x0F
+        if tag & 0x10:
+            value |= self.read_vint() << 4
+        return value if value < 0x80000000 else value - 0x100000000
+
+    def read_small_long(self, tag):
+        value = tag & 0x0F
+        if tag & 0x10:
+            value |= self.read_vint() << 4
+        return value if value < 0x8000000000000000 else value - 0x10000000000000000
+
+    def read_array(self, tag):
+        read_val = self.read_val
+        return [read_val() for _ in range(self.read_size(tag))]
+
+    def read_named_list(self, tag):
+        read_val = self.read_val
+        res = {}
+        for _ in range(self.read_size(tag)):
+            name = read_val()
+            res["" if name is None else name] = read_val()
+        return res
+
+    def read_extern_string(self, tag):
+        index = self.read_size(tag)
+        if index:
+            return self.strings[index - 1]
+        value = self.read_val()
+        self.strings.append(value)
+        return value
+
+    # values tagged in the low bits
+
+    def read_null(self):
+        return None
+
+    def read_true(self):
+        return True
+
+    def read_false(self):
+        return False
+
+    def read_int8(self):
+        self.pos += 1
+        return _unpack_byte(self.data, self.pos - 1)[0]
+
+    def read_int16(self):
+        self.pos += 2
+        return _unpack_short(self.data, self.pos - 2)[0]
+
+    def read_double(self):
+        self.pos += 8
+        return _unpack_double(self.data, self.pos - 8)[0]
+
+    def read_int(self):
+        self.pos += 4
+        return _unpack_int(self.data, self.pos - 4)[0]
+
+    def read_long(self):
+        self.pos += 8
+        return _unpack_long(self.data, self.pos - 8)[0]
+
+    def read_float(self):
+        self.pos += 4
+        return _shortest_float(_unpack_float(self.data, self.pos - 4)[0])
+
+    def read_date(self):
+        return _format_date(self.read_long())
+
+    def read_map(self):
+        read_val = self.read_val
+        res = {}
+        for _ in range(self.read_vint()):
+            key = read_val()
+            res[key] = read_val()
+        return res
+
+    def read_document(self):
+        read_val = self.read_val
+        size = self.read_size(self.read_byte())
+        doc = {}
+        for _ in range(size):
+            name = read_val()
+            if isinstance(name, dict):
+                # a child document
+                doc.setdefault("_childDocuments_", []).append(name)
+                continue
+            doc[name] = read_val()
+        return doc
+
+    def read_document_list(self):
+        meta = self.read_val()
+        res = {"numFound": meta[0], "start": meta[1]}
+        if meta[2] is not None:
+            res["maxScore"] = meta[2]
+        if len(meta) > 3 and meta[3] is not None:
+            res["numFoundExact"] = meta[3]
+        res["docs"] = self.read_val()
+        return res
+
+    def read_byte_array(self):
+        size = self.read_vint()
+        start = self.pos
+        self.pos = start + size
+        return base64.b64encode(self.data[start : self.pos]).decode("ascii")
+
+    def read_iterator(self):
+        read_val = self.read_val
+        res = []
+        while True:
+            value = read_val()
+            if value is _END:
+                return res
+            res.append(value)
+
+    def read_end(self):
+        return _END
+
+    def read_map_entry_iterator(self):
+        read_val = self.read_val
+        res = {}
+        while True:
+            key = read_val()
+            if key is _END:
+                return res
+            res[key] = read_val()
+
+    def read_enum(self):
+        # the ordinal of the value, then its name
+        self.read_val()
+        return self.read_val()
+
+    def read_map_entry(self):
+        key = self.read_val()
+        return {key: self.read_val()}
+
+    def read_uuid(self):
+        self.pos += 16
+        return str(uuid.UUID(bytes=bytes(self.data[self.pos - 16 : self.pos])))
+
+    def read_unknown(self):
+        raise ValueError(
+            "Unsupported javabin tag %d at offset %d"
+            % (self.data[self.pos - 1], self.pos - 1)
+        )
+
+
+_TAGGED = [
+    None,
+    _Decoder.read_str,
+    _Decoder.read_small_int,
+    _Decoder.read_small_long,
+    _Decoder.read_array,
+    _Decoder.read_named_list,
+    _Decoder.read_named_list,
+    _Decoder.read_extern_string,
+]
+
+_SIMPLE = [_Decoder.read_unknown] * 32
+for _tag, _method in (
+    (NULL, _Decoder.read_null),
+    (BOOL_TRUE, _Decoder.read_true),
+    (BOOL_FALSE, _Decoder.read_false),
+    (BYTE, _Decoder.read_int8),
+    (SHORT, _Decoder.read_int16),
+    (DOUBLE, _Decoder.read_double),
+    (INT, _Decoder.read_int),
+    (LONG, _Decoder.read_long),
+    (FLOAT, _Decoder.read_float),
+    (DATE, _Decoder.read_date),
+    (MAP, _Decoder.read_map),
+    (SOLRDOC, _Decoder.read_document),
+    (SOLRDOCLST, _Decoder.read_document_list),
+    (BYTEARR, _Decoder.read_byte_array),
+    (ITERATOR, _Decoder.read_iterator),
+    (END, _Decoder.read_end),
+    (MAP_ENTRY_ITER, _Decoder.read_map_entry_iterator),
+    (ENUM_FIELD_VALUE, _Decoder.read_enum),
+    (MAP_ENTRY, _Decoder.read_map_entry),
+    (UUID, _Decoder.read_uuid),
+):
+    _SIMPLE[_tag] = _method
+
+
+def loads(data):
+    """
+    Decodes a javabin payload
+
+    :param data: the body of a `wt=javabin` response
+    :type data: bytes
+    :return: the decoded response, see the module documentation
+    :rtype: dict
+    :raise: ValueError if `data` is not valid javabin
+    """
+    if not data or bytearray(data[:1])[0] != VERSION:
+        raise ValueError("Not a javabin payload, or an unsupported version")
+    decoder = _Decoder(data)
+    decoder.pos = 1
+    try:
+        return decoder.read_val()
+    except (IndexError, struct.error, UnicodeDecodeError) as e:
+        raise ValueError("Truncated or invalid javabin payload: %s" % e)
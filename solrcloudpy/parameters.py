@@ -2,6 +2,138 @@ from collections import defaultdict
 
 from future.utils import iteritems, iterkeys
 
+try:
+    from urllib.parse import urlencode
+except ImportError:
+    from urllib import urlencode
+
+
+class _ParamSet(set):
+    """
+    The values of one parameter of a :class:`BaseParams`. Changing them in place,
+    e.g. after reading them with `[]`, changes the version of the :class:`_ParamSets` they belong to
+    """
+
+    def __repr__(self):
+        return repr(set(self))
+
+
+def _changing(name):
+    """
+    :param name: the name of a method of `set` that changes the set
+    :type name: str
+    :return: the method, changing the version of the owner of the set first
+    :rtype: function
+    """
+    method = getattr(set, name)
+
+    def wrapper(self, *args):
+        owner = getattr(self, "_owner", None)
+        if owner is not None:
+            owner.version += 1
+        return method(self, *args)
+
+    wrapper.__name__ = name
+    return wrapper
+
+
+for _name in (
+    "add",
+    "clear",
+    "difference_update",
+    "discard",
+    "intersection_update",
+    "pop",
+    "remove",
+    "symmetric_difference_update",
+    "update",
+    "__iand__",
+    "__ior__",
+    "__isub__",
+    "__ixor__",
+):
+    setattr(_ParamSet, _name, _changing(_name))
+
+
+class _ParamSets(defaultdict):
+    """
+    The values of the parameters of a :class:`BaseParams`, by name.
+
+    Its `version` changes whenever the parameters change: when one is added or removed,
+    or when the values of one are changed in place. Reading them does not change it.
+    Encoded forms computed for a version can be reused for as long as it does not change.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(_ParamSets, self).__init__(*args, **kwargs)
+        self.version = 0
+
+    def _own(self, value):
+        """
+        :param value: the values of a parameter
+        :type value: set
+        :return: the values, whose changes now change the version of this object
+        :rtype: set
+        """
+        if isinstance(value, _ParamSet):
+            value._owner = self
+        return value
+
+    def __missing__(self, key):
+        # adding an empty parameter changes the version: a facet parameter
+        # without values still turns faceting on, see `SearchOptions`
+        value = self[key] = _ParamSet()
+        return value
+
+    def __setitem__(self, key, value):
+        self.version += 1
+        super(_ParamSets, self).__setitem__(key, self._own(value))
+
+    def __delitem__(self, key):
+        self.version += 1
+        super(_ParamSets, self).__delitem__(key)
+
+    def pop(self, *args):
+        self.version += 1
+        return super(_ParamSets, self).pop(*args)
+
+    def popitem(self):
+        self.version += 1
+        return super(_ParamSets, self).popitem()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return super(_ParamSets, self).__getitem__(key)
+
+    def update(self, *args, **kwargs):
+        for key, value in iteritems(dict(*args, **kwargs)):
+            self[key] = value
+
+    def clear(self):
+        self.version += 1
+        super(_ParamSets, self).clear()
+
+
+def _canonical(params):
+    """
+    :param params: parameter values by name, as sets or single values
+    :type params: dict
+    :return: the parameters sorted by name, each with its values as strings in sorted order.
+        Parameters without values are left out
+    :rtype: tuple
+    """
+    res = []
+    for key, values in iteritems(params):
+        if hasattr(values, "__iter__") and not isinstance(values, str):
+            values = tuple(sorted(str(v) for v in values))
+        else:
+            values = (str(values),)
+        if values:
+            res.append((key, values))
+    res.sort()
+    return tuple(res)
+
 
 class BaseParams(object):
     def __init__(self, query=None, **kwargs):
@@ -9,7 +141,8 @@ class BaseParams(object):
         :param query: the query to send to solr
         :type query: str
         """
-        self._q = defaultdict(set)
+        self._q = _ParamSets()
+        self._canonical = None
         if query:
             self._q["q"].add(query)
 
@@ -70,6 +203,17 @@ class BaseParams(object):
         """
         return iterkeys(self._q)
 
+    def _canonical_items(self):
+        """
+        :return: the parameters sorted by name, each with its values as strings in sorted order.
+            Computed again only when the parameters have changed
+        :rtype: tuple
+        """
+        version = self._q.version
+        if self._canonical is None or self._canonical[0] != version:
+            self._canonical = (version, _canonical(self._q))
+        return self._canonical[1]
+
     def __len__(self):
         """
         :return: size of the params
@@ -576,6 +720,40 @@ class SearchOptions(object):
             self.facetparams,
             self.mltparams,
         ]
+        self._encoded = None
+
+    def _versions(self):
+        """
+        :return: the versions of the parameter groups, which change whenever a group may have
+        :rtype: tuple
+        """
+        return tuple((id(p._q), p._q.version) for p in self._all)
+
+    def _encode(self):
+        """
+        The canonical form of these options: the parameters sorted by name, each with its values
+        as strings in sorted order, so that equal options give equal items and the same query
+        string whatever the order the parameters were added in
+
+        :return: the canonical parameters, their names and their URL-encoded form,
+            computed again only when a parameter group has changed
+        :rtype: tuple
+        """
+        versions = self._versions()
+        if self._encoded is None or self._encoded[0] != versions:
+            res = {}
+            if len(self.facetparams) > 0:
+                res["facet"] = ("true",)
+            for p in self._all:
+                res.update(p._canonical_items())
+            items = tuple(sorted(iteritems(res)))
+            self._encoded = (
+                versions,
+                items,
+                frozenset(res),
+                urlencode(items, doseq=True),
+            )
+        return self._encoded[1:]
 
     def iteritems(self):
         res = defaultdict(set)
@@ -0,0 +1,159 @@
+"""
+Decide whether and when a failed request is retried.
+
+A :class:`RetryPolicy` is shared by all the requests of a connection:
+
+ - client errors (4xx, except 429) are never retried, since another attempt would fail the same way
+ - connection errors, 429 and 5xx responses are retried after an exponential backoff with full jitter,
+   or after the delay the server asked for in its `Retry-After` header
+ - retries are capped by a budget: each request earns `budget_ratio` retries, so that retries
+   never add more than that fraction to the load of a struggling cluster
+
+    >>> from solrcloudpy import SolrConnection
+    >>> from solrcloudpy.retry import RetryPolicy
+    >>> conn = SolrConnection(retry_policy=RetryPolicy(backoff_base=0.1, budget_ratio=0.1))
+
+"""
+import random
+import threading
+import time
+
+RETRY_AFTER_STATUSES = (429, 503)
+
+
+class RetryBudget(object):
+    """
+    A token bucket limiting retries to a fraction of requests.
+    Each request deposits `ratio` tokens and each retry withdraws one. A small reserve of
+    `min_per_second` tokens per second lets clients with little traffic retry too.
+    """
+
+    def __init__(self, ratio=0.2, min_per_second=1.0, max_balance=100.0):
+        """
+        :param ratio: the number of retries each request earns
+        :type ratio: float
+        :param min_per_second: the number of retries per second allowed regardless of traffic
+        :type min_per_second: float
+        :param max_balance: the maximum number of retries that can be saved up
+        :type max_balance: float
+        """
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_balance = max_balance
+        self.balance = max_balance
+        self._refilled = time.time()
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        """
+        Called once per request
+        """
+        with self._lock:
+            self.balance = min(self.balance + self.ratio, self.max_balance)
+
+    def withdraw(self):
+        """
+        Called before each retry
+
+        :return: whether the retry is allowed
+        :rtype: bool
+        """
+        with self._lock:
+            now = time.time()
+            self.balance = min(
+                self.balance + (now - self._refilled) * self.min_per_second,
+                self.max_balance,
+            )
+            self._refilled = now
+            if self.balance < 1:
+                return False
+            self.balance -= 1
+            return True
+
+
+class RetryPolicy(object):
+    """
+    Retry decisions, backoff delays and retry budget of a connection
+    """
+
+    def __init__(
+        self,
+        backoff_base=0.05,
+        backoff_max=5.0,
+        retry_after_max=30.0,
+        budget_ratio=0.2,
+        budget_min_per_second=1.0,
+    ):
+        """
+        :param backoff_base: number of seconds the first retry waits for at most
+        :type backoff_base: float
+        :param backoff_max: the maximum number of seconds a retry waits for, unless asked otherwise with `Retry-After`
+        :type backoff_max: float
+        :param retry_after_max: the maximum number of seconds honored from a `Retry-After` header
+        :type retry_after_max: float
+        :param budget_ratio: the number of retries each request earns; `None` disables the retry budget
+        :type budget_ratio: float
+        :param budget_min_per_second: the number of retries per second allowed regardless of traffic
+        :type budget_min_per_second: float
+        """
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_after_max = retry_after_max
+        self.budget = None
+        if budget_ratio is not None:
+            self.budget = RetryBudget(budget_ratio, budget_min_per_second)
+
+    def retryable(self, status):
+        """
+        :param status: the HTTP status of the failed attempt, `None` for connection errors
+        :type status: int
+        :return: whether the request can be retried
+        :rtype: bool
+        """
+        return status is None or status == 429 or status >= 500
+
+    def delay(self, attempt, status=None, retry_after=None):
+        """
+        :param attempt: the number of retries made so far for this request
+        :type attempt: int
+        :param status: the HTTP status of the failed attempt, `None` for connection errors
+        :type status: int
+        :param retry_after: the value of the `Retry-After` header of the failed attempt
+        :type retry_after: str
+        :return: number of seconds to wait for before retrying
+        :rtype: float
+        """
+        if status in RETRY_AFTER_STATUSES and retry_after:
+            try:
+                return min(max(float(retry_after), 0), self.retry_after_max)
+            except ValueError:
+                # HTTP dates are not supported, fall back on the backoff
+                pass
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def started(self):
+        """
+        Called once per request, before its first attempt
+        """
+        if self.budget is not None:
+            self.budget.deposit()
+
+    def allow_retry(self):
+        """
+        :return: whether the retry budget allows one more retry
+        :rtype: bool
+        """
+        return self.budget is None or self.budget.withdraw()
+
+
+def get_retry_policy(retry_policy=None):
+    """
+    :param retry_policy: a :class:`RetryPolicy` instance, or `None` for the default policy
+    :type retry_policy: RetryPolicy
+    :return: a retry policy
+    :rtype: RetryPolicy
+    """
+    if retry_policy is None:
+        return RetryPolicy()
+    return retry_policy
@@ -1,16 +1,26 @@
+import gzip
+import itertools
 import json
 import logging
-import random
+import threading
+import time
 import uuid
+import zlib
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 import requests
 from future.utils import iteritems
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
-from requests.exceptions import ConnectionError, HTTPError
+from requests.exceptions import RequestException
+
+from solrcloudpy import javabin
 
 try:
-    from urllib.parse import urljoin
+    from urllib.parse import urlencode, urljoin
 except ImportError:
+    from urllib import urlencode
     from urlparse import urljoin
 try:
     str
@@ -40,10 +50,404 @@ def as_json_bool(value):
     return str(bool(value)).lower()
 
 
+def _idle_pool_class(base, idle_timeout):
+    """
+    :param base: a `urllib3` connection pool class
+    :type base: type
+    :param idle_timeout: number of seconds after which an idle connection is closed
+    :type idle_timeout: float
+    :return: a subclass of `base` closing each pooled connection that was idle for too long
+        when it is checked out, so that it reconnects instead of reusing a stale socket
+    :rtype: type
+    """
+
+    def _get_conn(self, timeout=None):
+        conn = base._get_conn(self, timeout)
+        last_used = getattr(conn, "_solrcloudpy_last_used", None)
+        if last_used is not None and time.time() - last_used > idle_timeout:
+            logger.debug(
+                "Closing a connection to %s idle for %.1fs",
+                self.host,
+                time.time() - last_used,
+            )
+            # a closed urllib3 connection opens a new socket on its next request
+            conn.close()
+        return conn
+
+    def _put_conn(self, conn):
+        if conn is not None:
+            conn._solrcloudpy_last_used = time.time()
+        base._put_conn(self, conn)
+
+    return type(
+        "Idle" + base.__name__,
+        (base,),
+        {"_get_conn": _get_conn, "_put_conn": _put_conn},
+    )
+
+
+class _PooledAdapter(HTTPAdapter):
+
+    """
+    A `requests` transport adapter that keeps connections to each solr node alive
+    between requests.
+
+    Every node gets its own pool of at most `pool_maxsize` connections. Each pooled
+    connection that was idle for more than `idle_timeout` seconds is closed when it is
+    checked out for a request, and reconnects, so that we never reuse a socket the server
+    may have already given up on. Sockets that were dropped by the server are detected by
+    urllib3 when they are checked out of the pool, and replaced with fresh ones.
+    """
+
+    def __init__(self, idle_timeout=None, **kwargs):
+        """
+        :param idle_timeout: number of seconds after which idle connections are closed. `None` keeps them forever
+        :type idle_timeout: float
+        :param kwargs: additional arguments for `requests.adapters.HTTPAdapter`
+        """
+        self.idle_timeout = idle_timeout
+        super(_PooledAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(_PooledAdapter, self).init_poolmanager(*args, **kwargs)
+        if self.idle_timeout is None:
+            return
+        classes = self.poolmanager.pool_classes_by_scheme
+        self.poolmanager.pool_classes_by_scheme = dict(
+            (scheme, _idle_pool_class(cls, self.idle_timeout))
+            for scheme, cls in iteritems(classes)
+        )
+
+
+def _request_headers(method, body=None):
+    """
+    :param method: the request method, e.g. `GET`
+    :type method: str
+    :param body: the request body. A dict is sent form-encoded, anything else as JSON
+    :type body: str
+    :type body: dict
+    :return: the headers to send with a request
+    :rtype: dict
+    """
+    if method.lower() != "get" and not isinstance(body, dict):
+        return {"content-type": "application/json"}
+    return {}
+
+
+class _GzipStream(object):
+    """
+    Gzips a streamed request body as it is sent. Like the body it wraps, it can be sent again
+    """
+
+    def __init__(self, chunks, level):
+        """
+        :param chunks: the body
+        :type chunks: iterable<bytes>
+        :param level: the compression level, from 1 to 9
+        :type level: int
+        """
+        self.chunks = chunks
+        self.level = level
+
+    def __iter__(self):
+        # wbits=31 writes a gzip header and trailer
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        for chunk in self.chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+def _compress_body(connection, body):
+    """
+    Gzips the body of an update request, if the connection is configured to
+
+    :param connection: the solr connection
+    :type connection: SolrConnection
+    :param body: the request body, a json string or an iterable of bytes to stream
+    :type body: str
+    :return: the body to send, and the headers to send it with
+    :rtype: tuple
+    """
+    if not connection.compress_updates:
+        return body, None
+
+    if isinstance(body, (str, bytes)):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if len(body) < connection.compression_min_size:
+            return body, None
+        body = gzip.compress(body, connection.compression_level)
+    else:
+        body = _GzipStream(body, connection.compression_level)
+    return body, {"content-encoding": "gzip"}
+
+
+# https://github.com/solrcloudpy/solrcloudpy/issues/21
+# https://wiki.apache.org/solr/SolJSON
+_DEFAULT_PARAMS = (("wt", "json"), ("omitHeader", "true"), ("json.nl", "map"))
+_DEFAULT_QUERY = urlencode(_DEFAULT_PARAMS)
+
+_FORM_CONTENT_TYPE = "application/x-www-form-urlencoded"
+
+
+def _request_params(params, asynchronous=False):
+    """
+    Merges the parameters of a request with the ones every request sends
+
+    :param params: the parameters of this request, an object that implements `iteritems` or `items`
+    :type params: SearchOptions
+    :type params: dict
+    :param asynchronous: whether to perform the action asynchronously (only for collections API)
+    :type asynchronous: bool
+    :return: the request parameters and the async id of the request, if any. The parameters
+        of a :class:`~solrcloudpy.parameters.SearchOptions` are returned already encoded,
+        as a query string, the others as a dict
+    :rtype: tuple
+    """
+    params = params or {}
+
+    async_id = None
+    if asynchronous:
+        async_id = uuid.uuid4()
+        logger.info("Sending request with async_id %s" % async_id)
+
+    if hasattr(params, "_encode"):
+        # reuse the query string the options keep, which is only built again when they change
+        _, names, query = params._encode()
+        if names.isdisjoint(dict(_DEFAULT_PARAMS)):
+            defaults = _DEFAULT_QUERY
+        else:
+            defaults = urlencode([(k, v) for k, v in _DEFAULT_PARAMS if k not in names])
+        parts = [defaults]
+        if async_id is not None:
+            parts.append(urlencode({"async": async_id}))
+        if query:
+            parts.append(query)
+        return "&".join(p for p in parts if p), async_id
+
+    resparams = dict(_DEFAULT_PARAMS)
+    if async_id is not None:
+        resparams["async"] = async_id
+
+    if hasattr(params, "iteritems") or hasattr(params, "items"):
+        for k, v in iteritems(params):
+            if isinstance(v, (set, frozenset)):
+                # sets have no order of their own, sort them so that equal
+                # parameters always give the same query string
+                v = sorted(v, key=str)
+            resparams[k] = v
+
+    return resparams, async_id
+
+
+def _query_and_body(connection, resparams, method, body):
+    """
+    Encodes the parameters of a request. When their query string is longer than the
+    `max_query_length` of the connection, a `GET` request without body, or a request whose
+    body is a form, is sent as a `POST` with its parameters in a form-encoded body instead
+
+    :param connection: the connection the request is sent with
+    :type connection: SolrConnection
+    :param resparams: the parameters, as returned by `_request_params`
+    :type resparams: dict
+    :type resparams: str
+    :param method: the request method
+    :type method: str
+    :param body: the request body
+    :type body: str
+    :type body: dict
+    :return: the query string, method, body and extra headers to send
+    :rtype: tuple
+    """
+    query = resparams
+    if not isinstance(query, str):
+        query = urlencode(resparams, doseq=True)
+
+    limit = connection.max_query_length
+    if limit is None or len(query) <= limit:
+        return query, method, body, None
+    if isinstance(body, dict):
+        form = urlencode(body, doseq=True)
+        query = "&".join(p for p in (form, query) if p)
+    elif body is not None or method.upper() != "GET":
+        # e.g. a JSON request, whose parameters can't be moved to the body
+        return query, method, body, None
+    logger.debug("Sending a %d-byte query string as a POST body", len(query))
+    return "", "POST", query, {"content-type": _FORM_CONTENT_TYPE}
+
+
+def _with_wt(params, wt):
+    """
+    :param params: the parameters of a request, an object that implements `iteritems` or `items`
+    :type params: SearchOptions
+    :type params: dict
+    :param wt: the response format
+    :type wt: str
+    :return: a copy of the parameters, asking for responses in the `wt` format
+    :rtype: dict
+    """
+    res = dict(iteritems(params)) if params else {}
+    res["wt"] = wt
+    return res
+
+
+def _error_message(response):
+    """
+    :param response: a failed response, as a `requests.Response` or an object with the
+        same `status_code`, `headers`, `content` and `text` attributes
+    :type response: requests.Response
+    :return: the error message of the response, read from its JSON or javabin body
+    :rtype: str
+    """
+    content_type = response.headers.get("Content-Type", "")
+    is_javabin = content_type.startswith(javabin.CONTENT_TYPE)
+    try:
+        if is_javabin:
+            msg = javabin.loads(response.content)["error"]["msg"]
+        else:
+            msg = json.loads(response.text)["error"]["msg"]
+    except (ValueError, KeyError, TypeError):
+        if is_javabin:
+            msg = "%d bytes of javabin" % len(response.content)
+        else:
+            msg = response.text
+    return "Solr returned HTTP %s: %s" % (response.status_code, msg)
+
+
+class _ServerPool(object):
+
+    """
+    The servers a single request can still be sent to.
+    A server that failed more than `request_retries` times is taken out of the pool.
+    Which server is tried next is decided by the balancer of the connection, among
+    the servers its circuit breaker considers healthy. Whether and when a failed
+    attempt is retried is decided by the retry policy of the connection.
+    """
+
+    def __init__(self, connection, servers=None, attempted=None):
+        """
+        :param connection: the solr connection
+        :type connection: SolrConnection
+        :param servers: the servers to send the request to. Defaults to all the servers of the connection
+        :type servers: list
+        :param attempted: a list to append the servers that are tried to, if any
+        :type attempted: list
+        :raise: SolrException
+        """
+        self.connection = connection
+        self.attempted = attempted
+        self.balancer = connection.balancer
+        self.breaker = connection.circuit_breaker
+        self.policy = connection.retry_policy
+        self.policy.started()
+        self.retries = 0
+        self._start = None
+        if servers is None:
+            servers = connection.servers
+        self.retry_states = dict([(server, 0) for server in servers])
+        self.servers = list(self.retry_states.keys())
+
+        if not self.servers:
+            raise SolrException("No servers available")
+
+    def choose(self):
+        """
+        :return: the server to send the next attempt to
+        :rtype: str
+        """
+        candidates = self.servers
+        if self.breaker is not None:
+            # when every server is open, trying them anyway is all we can do
+            candidates = self.breaker.available(self.servers) or self.servers
+        host = self.balancer.choose(candidates)
+        if self.breaker is not None:
+            self.breaker.attempt(host)
+        if self.attempted is not None:
+            self.attempted.append(host)
+        self.balancer.started(host)
+        self._start = time.time()
+        return host
+
+    def finished(self, host, healthy):
+        """
+        Reports the outcome of the last attempt to the balancer and the circuit breaker
+
+        :param host: the server the attempt was sent to
+        :type host: str
+        :param healthy: whether the server answered, even with a client error
+        :type healthy: bool
+        """
+        self.balancer.finished(host, time.time() - self._start, healthy)
+        if self.breaker is not None:
+            if healthy:
+                self.breaker.succeeded(host)
+            else:
+                self.breaker.failed(host)
+
+    def failed(self, host, status=None, retry_after=None, error=None):
+        """
+        Track retries, and take a server with too many retries out of the pool
+
+        :param host: the server the failed attempt was sent to
+        :type host: str
+        :param status: the HTTP status of the failed attempt, `None` for connection errors
+        :type status: int
+        :param retry_after: the `Retry-After` header of the failed attempt, if any
+        :type retry_after: str
+        :param error: the error message of the failed attempt, if any
+        :type error: str
+        :return: number of seconds to wait for before the next attempt
+        :rtype: float
+        :raise: SolrException if the request should not be retried, or no servers are left to try. When the last attempt got an error response, the exception carries its status and message
+        """
+        if not self.policy.retryable(status):
+            raise SolrException(error, status)
+
+        self.retry_states[host] += 1
+        if self.retry_states[host] > self.connection.request_retries:
+            del self.retry_states[host]
+            self.servers = list(self.retry_states.keys())
+
+        if len(self.servers) <= 0:
+            logger.error("No servers left to try")
+            self._give_up("No servers available", status, error)
+
+        if not self.policy.allow_retry():
+            logger.error("Retry budget exhausted, not retrying")
+            self._give_up("Retry budget exhausted", status, error)
+
+        delay = self.policy.delay(self.retries, status, retry_after)
+        self.retries += 1
+        return delay
+
+    @staticmethod
+    def _give_up(reason, status, error):
+        """
+        Raises the error of the last attempt, or `reason` if the server did not answer
+
+        :param reason: why the request is not retried
+        :type reason: str
+        :param status: the HTTP status of the last attempt, `None` for connection errors
+        :type status: int
+        :param error: the error message of the last attempt, if any
+        :type error: str
+        :raise: SolrException
+        """
+        if status is None:
+            raise SolrException(reason)
+        raise SolrException(error, status)
+
+
 class _Request(object):
 
     """
     Issues requests to the collections API
+
+    One instance is created per :class:`~solrcloudpy.connection.SolrConnection` and
+    shared by all the collections, schemas and stats objects derived from it.
+    It is safe to use from several threads at once.
     """
 
     def __init__(self, connection):
@@ -54,6 +458,19 @@ class _Request(object):
         self.connection = connection
         self.client = requests.Session()
         self.timeout = connection.timeout
+        if self.connection.keep_alive:
+            adapter = _PooledAdapter(
+                idle_timeout=self.connection.pool_idle_timeout,
+                pool_connections=max(len(set(self.connection.servers)), 10),
+                pool_maxsize=self.connection.pool_maxsize,
+                pool_block=self.connection.pool_block,
+            )
+            self.client.mount("http://", adapter)
+            self.client.mount("https://", adapter)
+        else:
+            self.client.headers["Connection"] = "close"
+        if not self.connection.accept_compressed:
+            self.client.headers["Accept-Encoding"] = "identity"
         if self.connection.auth:
             self.client.auth = self.connection.auth
         elif self.connection.user:
@@ -61,7 +478,22 @@ class _Request(object):
                 self.connection.user, self.connection.password
             )
 
-    def request(self, path, params=None, method="GET", body=None, asynchronous=False):
+        # thread pools created on first use, see `_get_executor`
+        self._executors = {}
+        self._executor_lock = threading.Lock()
+
+    def request(
+        self,
+        path,
+        params=None,
+        method="GET",
+        body=None,
+        asynchronous=False,
+        servers=None,
+        attempted=None,
+        stream=False,
+        headers=None,
+    ):
         """
         Send a request to a collection
 
@@ -72,77 +504,159 @@ class _Request(object):
         :type params: dict
         :param method: The request method, e.g. `GET`
         :type method: str
-        :param body: The request body, if any -- should be a json string
+        :param body: The request body, if any -- should be a json string, an iterable of bytes to stream, or a dict of form fields
         :type body: str
         :param asynchronous: whether to perform the action asynchronously (only for collections API)
         :type asynchronous: bool
-
-        :returns response: an instance of :class:`~solrcloudpy.utils.SolrResponse`
+        :param servers: the servers this request may be sent to. Defaults to all the servers of the connection
+        :type servers: list
+        :param attempted: a list to append the servers this request is sent to, if any
+        :type attempted: list
+        :param stream: whether to return the response as soon as its headers are received, without reading its body
+        :type stream: bool
+        :param headers: headers to send in addition to the default ones
+        :type headers: dict
+
+        :returns response: an instance of :class:`~solrcloudpy.utils.SolrResponse`, or the `requests.Response` whose body is still to be read when streaming
         :rtype: SolrResponse
         :raise: SolrException
         """
-        headers = {}
-        params = params or {}
-        if method.lower() != "get":
-            headers = {"content-type": "application/json"}
-
-        # https://github.com/solrcloudpy/solrcloudpy/issues/21
-        # https://wiki.apache.org/solr/SolJSON
-        resparams = {"wt": "json", "omitHeader": "true", "json.nl": "map"}
-
-        if asynchronous:
-            async_id = uuid.uuid4()
-            logger.info("Sending request with async_id %s" % async_id)
-            resparams["async"] = async_id
-
-        if hasattr(params, "iteritems") or hasattr(params, "items"):
-            resparams.update(iteritems(params))
-
-        retry_states = dict([(server, 0) for server in self.connection.servers])
-        servers = list(retry_states.keys())
-
-        if not servers:
-            raise SolrException("No servers available")
+        resparams, async_id = _request_params(params, asynchronous)
+        query, method, body, form_headers = _query_and_body(
+            self.connection, resparams, method, body
+        )
+        extra_headers = headers
+        headers = _request_headers(method, body)
+        headers.update(form_headers or {})
+        headers.update(extra_headers or {})
+        servers = _ServerPool(self.connection, servers, attempted)
 
         result = None
         r = None
         while result is None:
-            host = random.choice(servers)
+            host = servers.choose()
             fullpath = urljoin(host, path)
+            r = None
+            success = False
+            healthy = False
             try:
                 r = self.client.request(
                     method,
                     fullpath,
-                    params=resparams,
+                    params=query,
                     data=body,
                     headers=headers,
                     timeout=self.timeout,
+                    stream=stream,
                 )
+                healthy = r.status_code < 500
                 r.raise_for_status()
+                success = True
+            except RequestException as e:
+                logger.exception("Failed to connect to server at %s. e=%s", host, e)
+            finally:
+                servers.finished(host, healthy)
+                # without keep-alive, make sure no socket outlives the request.
+                # A streamed body is still to be read, the caller closes it
+                if (
+                    not self.connection.keep_alive
+                    and not (stream and success)
+                    and r is not None
+                    and r.connection
+                ):
+                    r.connection.close()
 
-                if asynchronous:
-                    result = AsyncResponse(r, async_id)
+            if not success:
+                if r is None:
+                    delay = servers.failed(host)
                 else:
-                    result = SolrResponse(r)
+                    delay = servers.failed(
+                        host,
+                        r.status_code,
+                        r.headers.get("Retry-After"),
+                        _error_message(r),
+                    )
+                time.sleep(delay)
+            elif stream:
+                result = r
+            elif asynchronous:
+                result = AsyncResponse(r, async_id)
+            else:
+                result = SolrResponse(r)
 
-            except (ConnectionError, HTTPError) as e:
-                logger.exception("Failed to connect to server at %s. e=%s", host, e)
+        return result
 
-                # Track retries, and take a server with too many retries out of the pool
-                retry_states[host] += 1
-                if retry_states[host] > self.connection.request_retries:
-                    del retry_states[host]
-                    servers = list(retry_states.keys())
+    def _get_executor(self, purpose="hedge"):
+        """
+        :param purpose: ``"hedge"`` for the requests of `hedged_request`, ``"multi"`` for the searches of `multi_search`. Each has its own pool, since these searches may wait for hedged requests
+        :type purpose: str
+        :return: the thread pool, created on first use
+        :rtype: ThreadPoolExecutor
+        """
+        executor = self._executors.get(purpose)
+        if executor is None:
+            with self._executor_lock:
+                executor = self._executors.get(purpose)
+                if executor is None:
+                    executor = self._executors[purpose] = ThreadPoolExecutor(
+                        max_workers=max(32, 4 * self.connection.pool_maxsize)
+                    )
+        return executor
+
+    def hedged_request(self, path, delay, params=None, method="GET", body=None):
+        """
+        Sends a read-only request, and if it did not complete within `delay` seconds,
+        sends a copy of it to another server. The first response wins; the other
+        request is cancelled if it has not started yet, and ignored otherwise.
+        Copies are only sent if the retry budget of the connection allows it.
 
-                if len(servers) <= 0:
-                    logger.error("No servers left to try")
-                    raise SolrException("No servers available")
-            finally:
-                # avoid requests library's keep alive throw exception in python3
-                if r is not None and r.connection:
-                    r.connection.close()
+        :param path: The relative path of the request
+        :type path: str
+        :param delay: number of seconds to wait for before sending a copy of the request
+        :type delay: float
+        :param params: The parameters of this request
+        :type params: SearchOptions
+        :type params: dict
+        :param method: The request method, e.g. `GET`
+        :type method: str
+        :param body: The request body, if any -- should be a json string
+        :type body: str
 
-        return result
+        :returns response: an instance of :class:`~solrcloudpy.utils.SolrResponse`
+        :rtype: SolrResponse
+        :raise: SolrException
+        """
+        executor = self._get_executor()
+        attempted = []
+        primary = executor.submit(
+            self.request, path, params, method, body, attempted=attempted
+        )
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        others = [s for s in set(self.connection.servers) if s not in attempted]
+        if not others or not self.connection.retry_policy.allow_retry():
+            return primary.result()
+
+        logger.debug("No response after %.3fs, hedging request to %s", delay, path)
+        hedge = executor.submit(
+            self.request, path, params, method, body, servers=others
+        )
+        pending = set([primary, hedge])
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                for other in pending:
+                    other.cancel()
+                return result
+        raise error
 
     def update(self, path, params=None, body=None, asynchronous=False):
         """
@@ -183,6 +697,138 @@ class _Request(object):
         )
 
 
+class LatencyTracker(object):
+
+    """
+    Keeps the most recent response times of a collection, to compute their percentiles
+    """
+
+    def __init__(self, size=1000, min_samples=20, refresh_every=50):
+        """
+        :param size: the number of response times kept
+        :type size: int
+        :param min_samples: the number of response times needed before percentiles are computed
+        :type min_samples: int
+        :param refresh_every: number of new response times after which percentiles are computed again
+        :type refresh_every: int
+        """
+        self.min_samples = min_samples
+        self.refresh_every = refresh_every
+        self._samples = deque(maxlen=size)
+        self._percentiles = {}
+        self._recorded = 0
+        self._lock = threading.Lock()
+
+    def record(self, elapsed):
+        """
+        :param elapsed: a response time, in seconds
+        :type elapsed: float
+        """
+        with self._lock:
+            self._samples.append(elapsed)
+            self._recorded += 1
+            if self._recorded >= self.refresh_every:
+                self._percentiles = {}
+                self._recorded = 0
+
+    def percentile(self, pct):
+        """
+        :param pct: the percentile, between 0 and 100
+        :type pct: float
+        :return: the percentile of recent response times, or `None` if there are too few of them
+        :rtype: float
+        """
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            if pct not in self._percentiles:
+                samples = sorted(self._samples)
+                idx = min(int(len(samples) * pct / 100.0), len(samples) - 1)
+                self._percentiles[pct] = samples[idx]
+            return self._percentiles[pct]
+
+
+def _hedge_delay(setting, tracker):
+    """
+    :param setting: the `hedge_delay` of a connection: `None`, a number of seconds, or a percentile such as `p95`
+    :type setting: float
+    :type setting: str
+    :param tracker: the response times of the collection
+    :type tracker: LatencyTracker
+    :return: number of seconds to wait for before hedging a request, or `None` not to hedge it
+    :rtype: float
+    """
+    if setting is None:
+        return None
+    if isinstance(setting, str) and setting.startswith("p"):
+        return tracker.percentile(float(setting[1:]))
+    return float(setting)
+
+
+def _run_all(executor, calls, max_concurrency, timeout=None):
+    """
+    Runs functions concurrently, at most `max_concurrency` at a time
+
+    :param executor: the thread pool to run the functions in
+    :type executor: ThreadPoolExecutor
+    :param calls: the functions to run, without arguments
+    :type calls: list
+    :param max_concurrency: the maximum number of functions running at the same time
+    :type max_concurrency: int
+    :param timeout: the number of seconds each function may run for, from the moment it starts.
+        ``None`` waits for as long as they take
+    :type timeout: float
+    :return: the result of each function, in order, or the exception it raised.
+        A function that timed out gets a :class:`SolrException`; its result is ignored
+    :rtype: list
+    """
+    results = [None] * len(calls)
+    started = {}
+
+    def run(index):
+        started[index] = time.time()
+        return calls[index]()
+
+    # functions are submitted as others complete, not to take more than
+    # `max_concurrency` threads of a pool shared with other callers
+    queued = iter(range(len(calls)))
+    futures = {}
+    for index in itertools.islice(queued, max(1, max_concurrency)):
+        futures[executor.submit(run, index)] = index
+    pending = set(futures)
+    while pending:
+        wait_for = None
+        if timeout is not None:
+            deadlines = [
+                started[futures[f]] + timeout for f in pending if futures[f] in started
+            ]
+            wait_for = timeout
+            if deadlines:
+                wait_for = max(min(deadlines) - time.time(), 0)
+        done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                results[futures[future]] = e
+        if timeout is not None:
+            now = time.time()
+            for future in list(pending):
+                index = futures[future]
+                if index in started and started[index] + timeout <= now:
+                    # it may still be running, its result is ignored
+                    results[index] = SolrException(
+                        "Timed out after %.3fs" % (now - started[index])
+                    )
+                    pending.discard(future)
+                    done.add(future)
+        for index in itertools.islice(queued, len(done)):
+            future = executor.submit(run, index)
+            futures[future] = index
+            pending.add(future)
+    return results
+
+
 class CollectionBase(object):
 
     """
@@ -198,27 +844,88 @@ class CollectionBase(object):
         """
         self.connection = connection
         self.name = name
-        self.client = _Request(connection)
+        self.client = connection.client
 
 
 class DictObject(object):
-    # XXX TODO: make all dict ops work on this object
+    """
+    A view over a dict, whose keys can be accessed as attributes.
+    Nested dicts are wrapped in an instance of the same class when they are first
+    accessed, so that only the parts of a large response that are used cost anything.
+
+    Instances have no `__dict__` of their own. As in earlier versions, where each key
+    was stored as an attribute, setting or deleting an attribute sets or deletes the key,
+    and `vars()` returns the keys and their values.
+    """
+
+    __slots__ = ("_data", "_wrapped")
 
     def __init__(self, obj):
-        if not obj:
+        # `__setattr__` is for the keys
+        object.__setattr__(self, "_data", obj if obj else {})
+        object.__setattr__(self, "_wrapped", None)
+
+    def _get(self, key):
+        value = self._data[key]
+        if not isinstance(value, dict):
+            return value
+        if self._wrapped is None:
+            self._wrapped = {}
+        wrapped = self._wrapped.get(key)
+        if wrapped is None:
+            # create a new object from this (sub)class,
+            # not necessarily from DictObject
+            wrapped = self._wrapped[key] = self.__class__(value)
+        return wrapped
+
+    def __getattr__(self, name):
+        if name in DictObject.__slots__:
+            # not initialized yet, e.g. while unpickling
+            raise AttributeError(name)
+        try:
+            return self._get(name)
+        except KeyError:
+            raise AttributeError(name)
+
+    def __getitem__(self, val):
+        return self._get(val)
+
+    def __setattr__(self, name, value):
+        if name in DictObject.__slots__:
+            object.__setattr__(self, name, value)
             return
+        self._data[name] = value
+        if self._wrapped is not None:
+            self._wrapped.pop(name, None)
 
-        for k, v in iteritems(obj):
-            k = encodeUnicode(k).decode("utf-8")
-            if isinstance(v, dict):
-                # create a new object from this (sub)class,
-                # not necessarily from DictObject
-                setattr(self, k, self.__class__(v))
-            else:
-                setattr(self, k, v)
+    def __delattr__(self, name):
+        try:
+            del self._data[name]
+        except KeyError:
+            raise AttributeError(name)
+        if self._wrapped is not None:
+            self._wrapped.pop(name, None)
 
-    def __getitem__(self, val):
-        return self.__dict__[val]
+    @property
+    def __dict__(self):
+        """
+        :return: the keys and their values, nested dicts being wrapped. A new dict: changing it changes nothing
+        :rtype: dict
+        """
+        return dict((key, self._get(key)) for key in self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __dir__(self):
+        return sorted(set(dir(self.__class__)) | set(self._data))
+
+    def __getstate__(self):
+        return self._data
+
+    def __setstate__(self, state):
+        object.__setattr__(self, "_data", state)
+        object.__setattr__(self, "_wrapped", None)
 
 
 class SolrResult(DictObject):
@@ -240,25 +947,24 @@ class SolrResult(DictObject):
 
     """
 
+    __slots__ = ()
+
     def __repr__(self):
-        value = SolrResponseJSONEncoder(indent=4).encode(self.__dict__)
+        value = SolrResponseJSONEncoder(indent=4).encode(
+            dict((k, self._get(k)) for k in self._data)
+        )
         return value
 
     @property
     def dict(self):
         """
-        Convert this result into a python `dict` for easier manipulation
+        The parsed response this result is a view of. It is not a copy:
+        changes made to it are visible through this result
 
         :return: a dict
         :rtype: dict
         """
-        res = {}
-        for (k, v) in iteritems(self.__dict__):
-            if isinstance(v, SolrResult):
-                res[k] = v.dict
-            else:
-                res[k] = v
-        return res
+        return self._data
 
 
 class SolrResponse(object):
@@ -278,7 +984,11 @@ class SolrResponse(object):
         # try to parse the content of this response as json
         # if that fails, try to save the text
         try:
-            result = response_obj.json()
+            content_type = response_obj.headers.get("Content-Type", "")
+            if content_type.startswith(javabin.CONTENT_TYPE):
+                result = javabin.loads(response_obj.content)
+            else:
+                result = response_obj.json()
         except ValueError:
             result = {"error": response_obj.text}
 
@@ -314,7 +1024,11 @@ class AsyncResponse(SolrResponse):
         # try to parse the content of this response as json
         # if that fails, try to save the text
         try:
-            result = response_obj.json()
+            content_type = response_obj.headers.get("Content-Type", "")
+            if content_type.startswith(javabin.CONTENT_TYPE):
+                result = javabin.loads(response_obj.content)
+            else:
+                result = response_obj.json()
         except ValueError:
             result = {"error": response_obj.text}
 
@@ -326,7 +1040,7 @@ class AsyncResponse(SolrResponse):
 class SolrResponseJSONEncoder(json.JSONEncoder):
     def default(self, o):
         if isinstance(o, SolrResult):
-            val = str(o.__dict__)
+            val = str(o.dict)
             if len(val) > 200:
                 s = val[:100] + " ... "
             else:
@@ -338,4 +1052,12 @@ class SolrResponseJSONEncoder(json.JSONEncoder):
 
 
 class SolrException(Exception):
-    pass
+    def __init__(self, message=None, status=None):
+        """
+        :param message: the error message
+        :type message: str
+        :param status: the HTTP status of the response that failed, if any
+        :type status: int
+        """
+        super(SolrException, self).__init__(message)
+        self.status = status
@@ -0,0 +1,78 @@
+import asyncio
+import os
+import time
+import unittest
+
+from solr_instance import SolrInstance
+from solrcloudpy import SearchOptions
+from solrcloudpy.aio import AsyncSolrCollection, AsyncSolrConnection
+
+solrprocess = None
+
+
+class TestAsyncCollection(unittest.TestCase):
+    def setUp(self):
+        self.collparams = {}
+        confname = os.getenv("SOLR_CONFNAME", "")
+        if confname != "":
+            self.collparams["collection_config_name"] = confname
+
+    def run_async(self, coro_func):
+        async def wrapper():
+            async with AsyncSolrConnection(
+                version=os.getenv("SOLR_VERSION", "6.1.0")
+            ) as conn:
+                return await coro_func(conn)
+
+        return asyncio.run(wrapper())
+
+    def test_create_collection(self):
+        async def test(conn):
+            coll = await conn.create_collection("coll_async", **self.collparams)
+            self.assertTrue(isinstance(coll, AsyncSolrCollection))
+            self.assertTrue("coll_async" in await conn.list())
+            await coll.drop()
+
+        self.run_async(test)
+
+    def test_add_search_delete(self):
+        async def test(conn):
+            coll = await conn.create_collection("coll_async", **self.collparams)
+            docs = [{"id": str(_id), "includes": "silly text"} for _id in range(5)]
+            await coll.add(docs)
+            await coll.commit()
+
+            so = SearchOptions()
+            so.commonparams.q("id:1")
+            responses = await asyncio.gather(*[coll.search(so) for _ in range(20)])
+            for response in responses:
+                self.assertEqual(len(response.result.response.docs), 1)
+
+            await coll.delete({"q": "id:1"})
+            res = (await coll.search({"q": "id:1"})).result
+            self.assertEqual(len(res.response.docs), 0)
+            await coll.drop()
+
+        self.run_async(test)
+
+
+def setUpModule():
+    if os.getenv("SKIP_STARTUP", False):
+        return
+    # start solr
+    solrprocess = SolrInstance("solr2")
+    solrprocess.start()
+    solrprocess.wait_ready()
+    time.sleep(3)
+
+
+def tearDownModule():
+    if os.getenv("SKIP_STARTUP", False):
+        return
+    if solrprocess:
+        solrprocess.terminate()
+
+
+if __name__ == "__main__":
+    # run tests
+    unittest.main()
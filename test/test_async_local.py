@@ -0,0 +1,280 @@
+"""
+Tests of the asyncio client against a local stand-in for Solr, which don't need a Solr cluster
+"""
+import asyncio
+import json
+import unittest
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from solrcloudpy.aio import AsyncSolrConnection
+from solrcloudpy.utils import SolrException
+
+
+def cluster_status(address):
+    """
+    :param address: the address of the stand-in server
+    :type address: str
+    :return: a CLUSTERSTATUS response with a collection of two shards, both led from `address`
+    :rtype: dict
+    """
+    base_url = "http://%s/solr" % address
+    shards = {}
+    for name, hash_range in (("shard1", "80000000-ffffffff"), ("shard2", "0-7fffffff")):
+        core = "coll_%s_replica_n1" % name
+        shards[name] = {
+            "range": hash_range,
+            "state": "active",
+            "replicas": {
+                "core_node_%s" % name: {
+                    "core": core,
+                    "base_url": base_url,
+                    "state": "active",
+                    "leader": "true",
+                }
+            },
+        }
+    return {
+        "cluster": {
+            "collections": {
+                "coll": {"shards": shards, "router": {"name": "compositeId"}}
+            },
+            "aliases": {"alias": "coll"},
+            "live_nodes": [address],
+        }
+    }
+
+
+class StandInSolr(object):
+    """
+    A local HTTP server answering like Solr, with a `handler` coroutine tests can replace
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.peers = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.handler = self.ok
+        self.server = None
+        self.address = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_route("*", "/{path:.*}", self._handle)
+        self.server = TestServer(app, host="127.0.0.1")
+        await self.server.start_server()
+        self.address = "127.0.0.1:%d" % self.server.port
+
+    async def close(self):
+        await self.server.close()
+
+    async def ok(self, request, body):
+        if request.query.get("action") == "CLUSTERSTATUS":
+            return web.json_response(cluster_status(self.address))
+        if request.path.endswith("/schema/uniquekey"):
+            return web.json_response({"uniqueKey": "id"})
+        return web.json_response(
+            {"responseHeader": {"status": 0}, "response": {"numFound": 0, "docs": []}}
+        )
+
+    async def _handle(self, request):
+        body = await request.read()
+        self.requests.append((request.method, request.path, dict(request.query), body))
+        self.peers.add(request.transport.get_extra_info("peername")[1])
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return await self.handler(request, body)
+        finally:
+            self.in_flight -= 1
+
+
+class TestAsyncLocal(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.solr = StandInSolr()
+        await self.solr.start()
+        self.other = StandInSolr()
+        await self.other.start()
+
+    async def asyncTearDown(self):
+        await self.solr.close()
+        await self.other.close()
+
+    def connect(self, servers=None, **kwargs):
+        kwargs.setdefault("circuit_breaker", None)
+        return AsyncSolrConnection(servers or self.solr.address, **kwargs)
+
+    async def test_concurrency_and_reuse(self):
+        async def slow(request, body):
+            await asyncio.sleep(0.02)
+            return await self.solr.ok(request, body)
+
+        self.solr.handler = slow
+        async with self.connect(max_concurrency=4, get_batch_window=None) as conn:
+            await asyncio.gather(*[conn.coll.search({"q": "*:*"}) for _ in range(20)])
+            await asyncio.gather(*[conn.coll.search({"q": "*:*"}) for _ in range(20)])
+
+        self.assertEqual(len(self.solr.requests), 40)
+        self.assertGreater(self.solr.max_in_flight, 1)
+        self.assertLessEqual(self.solr.max_in_flight, 4)
+        # the second round reuses the connections of the first one
+        self.assertLessEqual(len(self.solr.peers), 4)
+
+    async def test_failover(self):
+        async def unavailable(request, body):
+            return web.json_response({"error": {"msg": "overloaded"}}, status=503)
+
+        self.other.handler = unavailable
+        servers = [self.other.address, self.solr.address]
+        async with self.connect(servers) as conn:
+            for _ in range(5):
+                response = await conn.coll.search({"q": "*:*"})
+                self.assertEqual(response.result.response.numFound, 0)
+        self.assertEqual(len(self.solr.requests), 5)
+
+    async def test_last_error_raised(self):
+        async def unavailable(request, body):
+            return web.json_response({"error": {"msg": "overloaded"}}, status=503)
+
+        self.solr.handler = self.other.handler = unavailable
+        servers = [self.solr.address, self.other.address]
+        async with self.connect(servers, request_retries=0) as conn:
+            with self.assertRaises(SolrException) as ctx:
+                await conn.coll.search({"q": "*:*"})
+        self.assertEqual(ctx.exception.status, 503)
+        self.assertIn("overloaded", str(ctx.exception))
+        self.assertEqual(len(self.solr.requests) + len(self.other.requests), 2)
+
+    async def test_client_error_not_retried(self):
+        async def bad_request(request, body):
+            return web.json_response({"error": {"msg": "undefined field"}}, status=400)
+
+        self.solr.handler = self.other.handler = bad_request
+        async with self.connect([self.solr.address, self.other.address]) as conn:
+            with self.assertRaises(SolrException) as ctx:
+                await conn.coll.search({"q": "no_such_field:1"})
+        self.assertEqual(ctx.exception.status, 400)
+        self.assertIn("undefined field", str(ctx.exception))
+        self.assertEqual(len(self.solr.requests) + len(self.other.requests), 1)
+
+    async def test_body_read_timeout_retried(self):
+        async def stalled(request, body):
+            # the headers arrive, the body never completes
+            response = web.StreamResponse(status=200)
+            response.content_type = "application/json"
+            await response.prepare(request)
+            await response.write(b'{"response": ')
+            await asyncio.sleep(2)
+            return response
+
+        self.other.handler = stalled
+        servers = [self.other.address, self.solr.address]
+        async with self.connect(servers, timeout=0.3, request_retries=0) as conn:
+            for _ in range(2):
+                response = await conn.coll.search({"q": "*:*"})
+                self.assertEqual(response.result.response.numFound, 0)
+        self.assertEqual(len(self.solr.requests), 2)
+
+    async def test_cluster_state(self):
+        async with self.connect(cluster_state_ttl=60) as conn:
+            self.assertTrue(await conn.coll.exists())
+            self.assertFalse(await conn.nothere.exists())
+            self.assertTrue(await conn.alias.is_alias())
+            self.assertIn("warn", await conn.alias.state())
+            self.assertIn("shard1", (await conn.coll.state())["shards"])
+            # answered from the cached cluster state
+            self.assertEqual(len(self.solr.requests), 1)
+
+            await conn.coll.reload()
+            await conn.coll.exists()
+            self.assertEqual(len(self.solr.requests), 3)
+
+    async def test_routed_add(self):
+        docs = [{"id": str(i)} for i in range(50)]
+        async with self.connect(route_updates=True) as conn:
+            await conn.coll.add(docs)
+
+        updates = {}
+        for method, path, query, body in self.solr.requests:
+            if path.endswith("/update/json"):
+                updates[path] = json.loads(body)
+        self.assertEqual(
+            sorted(updates),
+            [
+                "/solr/coll_shard1_replica_n1/update/json",
+                "/solr/coll_shard2_replica_n1/update/json",
+            ],
+        )
+        routed = [doc for shard_docs in updates.values() for doc in shard_docs]
+        self.assertEqual(sorted(routed, key=lambda doc: int(doc["id"])), docs)
+
+    async def test_routed_add_failed_shard(self):
+        async def reject_shard2(request, body):
+            if "shard2" in request.path:
+                return web.json_response({"error": {"msg": "bad document"}}, status=400)
+            return await self.solr.ok(request, body)
+
+        self.solr.handler = reject_shard2
+        async with self.connect(route_updates=True) as conn:
+            with self.assertRaises(SolrException) as ctx:
+                await conn.coll.add([{"id": str(i)} for i in range(50)])
+        self.assertEqual(ctx.exception.status, 400)
+        self.assertIn("shard shard2", str(ctx.exception))
+        paths = [path for _, path, _, _ in self.solr.requests]
+        self.assertIn("/solr/coll_shard1_replica_n1/update/json", paths)
+
+    async def test_routed_streamed_add(self):
+        failures = []
+
+        async def fail_once(request, body):
+            if request.path.endswith("/update/json") and not failures:
+                failures.append(request.path)
+                return web.json_response({"error": {"msg": "overloaded"}}, status=503)
+            return await self.solr.ok(request, body)
+
+        self.solr.handler = fail_once
+        docs = [{"id": str(i)} for i in range(2500)]
+        async with self.connect(route_updates=True) as conn:
+            await conn.coll.add(doc for doc in docs)
+
+        # routed 1000 documents at a time, and the failed request sent again
+        updates = [
+            (path, json.loads(body))
+            for _, path, _, body in self.solr.requests
+            if path.endswith("/update/json")
+        ]
+        self.assertEqual(len(updates), 7)
+        self.assertIn((failures[0], updates[0][1]), updates[1:])
+        routed = [doc for _, shard_docs in updates[1:] for doc in shard_docs]
+        self.assertEqual(sorted(routed, key=lambda doc: int(doc["id"])), docs)
+        for path, shard_docs in updates:
+            self.assertLessEqual(len(shard_docs), 1000)
+
+    async def test_streamed_add(self):
+        docs = [{"id": str(i), "text": "x" * 100} for i in range(1000)]
+        async with self.connect() as conn:
+            await conn.coll.add(doc for doc in docs)
+            await conn.coll.add(docs, stream=True)
+
+        bodies = [body for _, path, _, body in self.solr.requests]
+        self.assertEqual([json.loads(body) for body in bodies], [docs, docs])
+
+    async def test_streamed_add_not_replayed(self):
+        async def unavailable(request, body):
+            return web.json_response({"error": {"msg": "overloaded"}}, status=503)
+
+        self.solr.handler = unavailable
+        async with self.connect(request_retries=2) as conn:
+            # a list can be sent again
+            with self.assertRaises(SolrException):
+                await conn.coll.add([{"id": "1"}], stream=True)
+            self.assertEqual(len(self.solr.requests), 3)
+            with self.assertRaises(SolrException) as ctx:
+                await conn.coll.add({"id": str(i)} for i in range(10))
+            self.assertIn("one-shot iterable", str(ctx.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
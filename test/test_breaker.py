@@ -0,0 +1,85 @@
+import unittest
+
+from solrcloudpy.breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    get_circuit_breaker,
+)
+
+A = "http://a:8983/solr/"
+B = "http://b:8983/solr/"
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker(
+            failure_threshold=2, cooldown=10, max_cooldown=25, backoff_factor=2
+        )
+
+    def cool_down(self, server):
+        # as if the cool-down of the server had elapsed
+        self.breaker._servers[server].opened_at -= 1000
+
+    def test_open(self):
+        self.breaker.failed(A)
+        self.assertEqual(self.breaker.state(A), CLOSED)
+        self.assertEqual(self.breaker.available([A, B]), [A, B])
+        self.breaker.failed(A)
+        self.assertEqual(self.breaker.state(A), OPEN)
+        self.assertEqual(self.breaker.available([A, B]), [B])
+        self.assertEqual(self.breaker.states(), {A: OPEN, B: CLOSED})
+
+    def test_success_resets_failures(self):
+        self.breaker.failed(A)
+        self.breaker.succeeded(A)
+        self.breaker.failed(A)
+        self.assertEqual(self.breaker.state(A), CLOSED)
+
+    def test_probe_succeeded(self):
+        self.breaker.failed(A)
+        self.breaker.failed(A)
+        self.cool_down(A)
+        self.assertEqual(self.breaker.available([A, B]), [A, B])
+        self.assertEqual(self.breaker.state(A), HALF_OPEN)
+
+        # a single probe is sent to a half-open server
+        self.breaker.attempt(A)
+        self.assertEqual(self.breaker.available([A, B]), [B])
+        self.breaker.succeeded(A)
+        self.assertEqual(self.breaker.state(A), CLOSED)
+        self.assertEqual(self.breaker.available([A, B]), [A, B])
+
+    def test_probe_failed(self):
+        self.breaker.failed(A)
+        self.breaker.failed(A)
+        cooldowns = []
+        for _ in range(3):
+            self.cool_down(A)
+            self.breaker.available([A])
+            self.breaker.attempt(A)
+            self.breaker.failed(A)
+            self.assertEqual(self.breaker.state(A), OPEN)
+            self.assertEqual(self.breaker.available([A]), [])
+            cooldowns.append(self.breaker._servers[A].cooldown)
+        self.assertEqual(cooldowns, [20, 25, 25])
+
+        # once closed, a server starts over from the initial cool-down
+        self.cool_down(A)
+        self.breaker.available([A])
+        self.breaker.attempt(A)
+        self.breaker.succeeded(A)
+        self.breaker.failed(A)
+        self.breaker.failed(A)
+        self.assertEqual(self.breaker._servers[A].cooldown, 10)
+
+    def test_get_circuit_breaker(self):
+        self.assertIsInstance(get_circuit_breaker(True), CircuitBreaker)
+        self.assertIs(get_circuit_breaker(self.breaker), self.breaker)
+        self.assertIsNone(get_circuit_breaker(False))
+        self.assertIsNone(get_circuit_breaker(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import json
+import unittest
+
+import requests
+
+from solrcloudpy.cache import (
+    CachedResponse,
+    ResultCache,
+    _freeze_response,
+    _thaw_response,
+    cache_key,
+)
+from solrcloudpy.parameters import SearchOptions
+from solrcloudpy.utils import SolrResponse
+
+
+def make_response(data):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers["Content-Type"] = "application/json"
+    response._content = json.dumps(data).encode("utf-8")
+    return SolrResponse(response)
+
+
+class TestResultCache(unittest.TestCase):
+    def test_lru(self):
+        cache = ResultCache(max_entries=2)
+        cache.put(("coll", "a"), "A", 1)
+        cache.put(("coll", "b"), "B", 1)
+        # "a" becomes the most recently used entry
+        self.assertEqual(cache.get(("coll", "a")), "A")
+        cache.put(("coll", "c"), "C", 1)
+        self.assertIsNone(cache.get(("coll", "b")))
+        self.assertEqual(cache.get(("coll", "a")), "A")
+        self.assertEqual(cache.get(("coll", "c")), "C")
+        self.assertEqual(
+            cache.stats(),
+            {"entries": 2, "bytes": 2, "hits": 3, "misses": 1, "evictions": 1},
+        )
+
+    def test_ttl(self):
+        cache = ResultCache(ttl=0)
+        cache.put(("coll", "a"), "A", 1)
+        self.assertIsNone(cache.get(("coll", "a")))
+        self.assertEqual(cache.stats()["entries"], 0)
+        cache.put(("coll", "a"), "A", 1, ttl=60)
+        self.assertEqual(cache.get(("coll", "a")), "A")
+
+    def test_max_bytes(self):
+        cache = ResultCache(max_bytes=10)
+        cache.put(("coll", "big"), "X", 11)
+        self.assertIsNone(cache.get(("coll", "big")))
+        cache.put(("coll", "a"), "A", 6)
+        cache.put(("coll", "b"), "B", 6)
+        self.assertIsNone(cache.get(("coll", "a")))
+        self.assertEqual(cache.get(("coll", "b")), "B")
+        self.assertEqual(cache.stats()["bytes"], 6)
+        # replacing an entry does not count its old size
+        cache.put(("coll", "b"), "B", 4)
+        self.assertEqual(cache.stats()["bytes"], 4)
+
+    def test_generation(self):
+        cache = ResultCache()
+        generation = cache.generation("coll")
+        cache.put(("coll", "a"), "A", 1, generation=generation)
+        cache.put(("other", "a"), "A", 1)
+        cache.invalidate("coll")
+        self.assertIsNone(cache.get(("coll", "a")))
+        self.assertEqual(cache.get(("other", "a")), "A")
+
+        # a response requested before the update is not cached after it
+        cache.put(("coll", "a"), "A", 1, generation=generation)
+        self.assertIsNone(cache.get(("coll", "a")))
+        cache.put(("coll", "a"), "A", 1, generation=cache.generation("coll"))
+        self.assertEqual(cache.get(("coll", "a")), "A")
+
+        generation = cache.generation("other")
+        cache.invalidate()
+        self.assertEqual(cache.stats()["entries"], 0)
+        self.assertNotEqual(cache.generation("other"), generation)
+
+    def test_cache_key(self):
+        self.assertEqual(
+            cache_key("coll", "select", {"q": "*:*", "rows": 10}, "get", None),
+            cache_key("coll", "select", [("rows", "10"), ("q", "*:*")], "GET", None),
+        )
+        first = SearchOptions()
+        first.commonparams.q("*:*").fq("a:1").fq("b:2")
+        second = SearchOptions()
+        second.commonparams.fq("b:2").fq("a:1").q("*:*")
+        self.assertEqual(
+            cache_key("coll", "select", first, "GET", None),
+            cache_key("coll", "select", second, "GET", None),
+        )
+
+    def test_frozen_response(self):
+        response = make_response({"response": {"numFound": 1, "docs": [{"id": "1"}]}})
+        data = _freeze_response(response)
+        self.assertIsInstance(data, bytes)
+
+        hit = _thaw_response(data)
+        self.assertIsInstance(hit, CachedResponse)
+        self.assertEqual(hit.code, 200)
+        self.assertEqual(hit.result.dict, response.result.dict)
+
+        # each hit has its own copy of the result
+        hit.result.response.docs.append({"id": "2"})
+        hit.result.dict["response"]["numFound"] = 2
+        other = _thaw_response(data)
+        self.assertEqual(other.result.response.numFound, 1)
+        self.assertEqual(len(other.result.response.docs), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -99,6 +99,18 @@ class TestCollectionAdmin(unittest.TestCase):
         self.assertTrue(result.success)
         coll2.drop()
 
+    def test_cluster_state_cache(self):
+        conn = SolrConnection(
+            version=os.getenv("SOLR_VERSION", "6.1.0"), cluster_state_ttl=60
+        )
+        coll2 = conn.create_collection("coll2", **self.collparams)
+        # creating the collection dropped the cached cluster state
+        self.assertTrue(coll2.exists())
+        self.assertFalse(coll2.is_alias())
+        self.assertTrue("shards" in coll2.state)
+        coll2.drop()
+        self.assertFalse(coll2.exists())
+
 
 def setUpModule():
     if os.getenv("SKIP_STARTUP", False):
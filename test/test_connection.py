@@ -4,6 +4,8 @@ import unittest
 
 from solr_instance import SolrInstance
 from solrcloudpy import SolrCollection, SolrConnection
+from solrcloudpy.breaker import CircuitBreaker
+from solrcloudpy.connection import MAX_CACHED_COLLECTIONS
 
 solrprocess = None
 
@@ -44,6 +46,61 @@ class TestConnection(unittest.TestCase):
         test_conn = SolrConnection(server="localhost")
         self.assertTrue(test_conn.url_template.startswith("http:"))
 
+    def test_keep_alive(self):
+        conn = SolrConnection(
+            version=os.getenv("SOLR_VERSION", "6.1.0"),
+            pool_maxsize=2,
+            pool_idle_timeout=1,
+        )
+        first = conn.list()
+        self.assertEqual(conn.list(), first)
+        time.sleep(2)
+        # idle connections were evicted, the next request opens a new one
+        self.assertEqual(conn.list(), first)
+        conn = SolrConnection(
+            version=os.getenv("SOLR_VERSION", "6.1.0"), keep_alive=False
+        )
+        self.assertEqual(conn.list(), first)
+
+    def test_shared_transport(self):
+        coll = self.conn["foo"]
+        self.assertTrue(coll is self.conn.foo)
+        self.assertTrue(coll.client is self.conn.client)
+        self.assertTrue(coll.schema.client is self.conn.client)
+        self.assertTrue(coll.stats.client is self.conn.client)
+
+    def test_collection_cache(self):
+        # probes for special attributes are not taken for collections
+        self.assertFalse(hasattr(self.conn, "_repr_html_"))
+        self.assertTrue(isinstance(self.conn["_foo"], SolrCollection))
+        first = self.conn["foo"]
+        for _id in range(2 * MAX_CACHED_COLLECTIONS):
+            self.conn["coll%d" % _id]
+        self.assertEqual(len(self.conn._collections), MAX_CACHED_COLLECTIONS)
+        self.assertFalse(self.conn["foo"] is first)
+        self.assertTrue(self.conn["foo"] is self.conn.foo)
+
+    def test_balancers(self):
+        expected = self.conn.list()
+        for balancer in ["random", "least_outstanding", "ewma", "p2c"]:
+            conn = SolrConnection(
+                version=os.getenv("SOLR_VERSION", "6.1.0"), balancer=balancer
+            )
+            self.assertEqual(conn.list(), expected)
+        self.assertRaises(ValueError, SolrConnection, balancer="unknown")
+
+    def test_circuit_breaker(self):
+        dead = "http://localhost:1/solr/"
+        conn = SolrConnection(
+            ["localhost:8983", "localhost:1"],
+            version=os.getenv("SOLR_VERSION", "6.1.0"),
+            circuit_breaker=CircuitBreaker(failure_threshold=1, cooldown=60),
+        )
+        expected = self.conn.list()
+        for _ in range(10):
+            self.assertEqual(conn.list(), expected)
+        self.assertEqual(conn.circuit_breaker.state(dead), "open")
+
 
 def setUpModule():
     if os.getenv("SKIP_STARTUP", False):
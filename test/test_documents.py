@@ -0,0 +1,59 @@
+import json
+import unittest
+
+import requests
+
+from solrcloudpy.collection import documents
+from solrcloudpy.collection.documents import (
+    SolrDocument,
+    compact_response,
+    record_class,
+)
+from solrcloudpy.utils import SolrResponse
+
+
+def make_response(data):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers["Content-Type"] = "application/json"
+    response._content = json.dumps(data).encode("utf-8")
+    return SolrResponse(response)
+
+
+class TestCompactResponse(unittest.TestCase):
+    def test_compact(self):
+        docs = [{"id": "1", "title": "a"}, {"id": "2"}]
+        response = make_response({"response": {"numFound": 2, "docs": docs}})
+        compacted = compact_response(response, {"fl": "id,title"})
+
+        result = compacted.result.response
+        self.assertEqual(result.numFound, 2)
+        self.assertTrue(all(isinstance(doc, SolrDocument) for doc in result.docs))
+        self.assertEqual(result.docs[0].title, "a")
+        self.assertEqual(result.docs, docs)
+        self.assertEqual(compacted.code, 200)
+        # the response itself is left as it is
+        self.assertEqual(response.result.response.docs, docs)
+        self.assertIsInstance(response.result.dict["response"]["docs"][0], dict)
+
+    def test_no_docs(self):
+        response = make_response({"response": {"numFound": 0, "docs": []}})
+        self.assertIs(compact_response(response), response)
+
+
+class TestRecordClass(unittest.TestCase):
+    def test_lru(self):
+        documents._classes.clear()
+        first = record_class(["f0"])
+        for i in range(1, documents._MAX_CLASSES):
+            record_class(["f%d" % i])
+        # `f0` becomes the most recently used class
+        self.assertIs(record_class(["f0"]), first)
+        record_class(["new"])
+        self.assertEqual(len(documents._classes), documents._MAX_CLASSES)
+        self.assertIs(record_class(["f0"]), first)
+        self.assertNotIn(("f1",), documents._classes)
+
+
+if __name__ == "__main__":
+    unittest.main()
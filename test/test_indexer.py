@@ -0,0 +1,72 @@
+import threading
+import time
+import unittest
+
+from solrcloudpy.collection.indexer import SolrBatchAdder
+from solrcloudpy.utils import SolrException
+
+
+class StubCollection(object):
+    """
+    Stands in for a collection: records the batches it gets, and how many were
+    being sent at the same time
+    """
+
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def add(self, docs):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if self.fail:
+                raise SolrException("Solr returned HTTP 400: bad document")
+            with self.lock:
+                self.batches.append(list(docs))
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def commit(self):
+        pass
+
+
+class TestSolrBatchAdder(unittest.TestCase):
+    def test_concurrent_flush(self):
+        solr = StubCollection(delay=0.05)
+        with SolrBatchAdder(solr, batch_size=10, workers=4) as adder:
+            adder.add_multi({"id": str(_id)} for _id in range(100))
+        self.assertEqual(len(solr.batches), 10)
+        ids = sorted(int(d["id"]) for batch in solr.batches for d in batch)
+        self.assertEqual(ids, list(range(100)))
+        self.assertGreater(solr.max_in_flight, 1)
+        self.assertLessEqual(solr.max_in_flight, 4)
+
+    def test_backpressure(self):
+        solr = StubCollection(delay=0.1)
+        adder = SolrBatchAdder(solr, batch_size=1, workers=1, queue_size=1)
+        start = time.time()
+        # one batch being sent, one waiting in the queue: the next ones block
+        adder.add_multi({"id": str(_id)} for _id in range(5))
+        self.assertGreaterEqual(time.time() - start, 0.2)
+        self.assertLessEqual(adder._queue.qsize(), 1)
+        adder.close()
+        self.assertEqual(len(solr.batches), 5)
+
+    def test_error_reaches_close(self):
+        solr = StubCollection(fail=True)
+        adder = SolrBatchAdder(solr, batch_size=5, workers=2)
+        adder.add_multi({"id": str(_id)} for _id in range(20))
+        self.assertRaises(SolrException, adder.close)
+        self.assertEqual(adder._threads, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import json
+import unittest
+
+import requests
+
+from solrcloudpy import javabin
+from solrcloudpy.utils import _error_message
+
+# a search response, as Solr encodes it in javabin
+SEARCH_PAYLOAD = b"".join(
+    [
+        b"\x02",  # version
+        b"\xc2",  # named list of 2 entries
+        b"\xe0\x2eresponseHeader",  # new extern string #1
+        b"\xc2",
+        b"\xe0\x26status",  # #2
+        b"\x40",  # small int 0
+        b"\xe0\x25QTime",  # #3
+        b"\x43",  # small int 3
+        b"\xe0\x28response",  # #4
+        b"\x0c",  # document list
+        b"\x83\x62\x60\x08\x3f\x80\x00\x00",  # [numFound=2L, start=0L, maxScore=1.0f]
+        b"\x82",  # array of 2 documents
+        b"\x0b\xa5",  # document of 5 fields
+        b"\xe0\x22id",  # #5
+        b"\x211",
+        b"\xe0\x25price",  # #6
+        b"\x08\x3f\xc0\x00\x00",  # float 1.5
+        b"\xe0\x24tags",  # #7
+        b"\x82\x21a\x21b",
+        b"\xe0\x2dlast_modified",  # #8
+        b"\x09\x00\x00\x01\x6f\xfb\x78\xde\x00",  # date 1580472000000
+        b"\xe0\x28in_stock",  # #9
+        b"\x01",  # true
+        b"\x0b\xa3",  # document of 3 fields, names already seen
+        b"\xe5\x212",
+        b"\xe6\x08\x3d\xcc\xcc\xcd",  # float 0.1
+        b"\xe7\x80",  # empty array
+    ]
+)
+
+# the body of a failed request, as Solr encodes it in javabin
+ERROR_PAYLOAD = b"".join(
+    [
+        b"\x02",
+        b"\xc1",  # named list of 1 entry
+        b"\xe0\x25error",
+        b"\xc2",
+        b"\xe0\x23msg",
+        b"\x3dundefined field no_such_field",  # string of 29 bytes
+        b"\xe0\x24code",
+        b"\x50\x19",  # small int 400
+    ]
+)
+
+# the same response, as Solr writes it with `wt=json&json.nl=map`
+SEARCH_JSON = """
+{
+  "responseHeader": {"status": 0, "QTime": 3},
+  "response": {
+    "numFound": 2,
+    "start": 0,
+    "maxScore": 1.0,
+    "docs": [
+      {
+        "id": "1",
+        "price": 1.5,
+        "tags": ["a", "b"],
+        "last_modified": "2020-01-31T12:00:00Z",
+        "in_stock": true
+      },
+      {"id": "2", "price": 0.1, "tags": []}
+    ]
+  }
+}
+"""
+
+
+class TestJavabin(unittest.TestCase):
+    def test_search_response(self):
+        self.assertEqual(javabin.loads(SEARCH_PAYLOAD), json.loads(SEARCH_JSON))
+
+    def test_values(self):
+        cases = [
+            (b"\x02\x00", None),
+            (b"\x02\x02", False),
+            (b"\x02\x03\xff", -1),  # byte
+            (b"\x02\x04\x01\x00", 256),  # short
+            (b"\x02\x06\xff\xff\xff\xfe", -2),  # int
+            (b"\x02\x50\x80\x01", 2 ** 11),  # small int with a vint
+            (b"\x02\x07\x00\x00\x00\x02\x00\x00\x00\x00", 2 ** 33),  # long
+            (b"\x02\x05\x3f\xb9\x99\x99\x99\x99\x99\x9a", 0.1),  # double
+            (b"\x02\x0d\x03abc", "YWJj"),  # byte array, as base64
+            (b"\x02\x0e\x21a\x41\x0f", ["a", 1]),  # iterator
+            (b"\x02\x0a\x01\x21k\x21v", {"k": "v"}),  # map
+        ]
+        for payload, value in cases:
+            self.assertEqual(javabin.loads(payload), value, payload)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, javabin.loads, b"")
+        self.assertRaises(ValueError, javabin.loads, b"\x01\x00")
+        # truncated in the middle of the second document
+        self.assertRaises(ValueError, javabin.loads, SEARCH_PAYLOAD[:-6])
+        self.assertRaises(ValueError, javabin.loads, b"\x02\x1f")
+
+    def test_error_message(self):
+        response = requests.Response()
+        response.status_code = 400
+        response.headers["Content-Type"] = "application/octet-stream"
+        response._content = ERROR_PAYLOAD
+        self.assertEqual(
+            _error_message(response),
+            "Solr returned HTTP 400: undefined field no_such_field",
+        )
+        # a body that is not valid javabin is not quoted
+        response._content = ERROR_PAYLOAD[:-8]
+        self.assertEqual(
+            _error_message(response),
+            "Solr returned HTTP 400: %d bytes of javabin" % (len(ERROR_PAYLOAD) - 8),
+        )
+        response.headers["Content-Type"] = "application/json"
+        response._content = b'{"error": {"msg": "undefined field", "code": 400}}'
+        self.assertEqual(
+            _error_message(response), "Solr returned HTTP 400: undefined field"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import copy
+import pickle
+import unittest
+
+from solrcloudpy import SearchOptions
+
+
+def make_options(*fqs):
+    so = SearchOptions()
+    so.commonparams.q("*:*").rows(10)
+    for fq in fqs:
+        so.commonparams.fq(fq)
+    return so
+
+
+class TestSearchOptions(unittest.TestCase):
+    def test_iteritems(self):
+        so = make_options("b:1", "a:1")
+        so.facetparams.field("tag_s")
+        self.assertEqual(
+            dict(so.iteritems()),
+            {
+                "q": {"*:*"},
+                "rows": {10},
+                "fq": {"a:1", "b:1"},
+                "facet": "true",
+                "facet.field": {"tag_s"},
+            },
+        )
+
+    def test_canonical_order(self):
+        first = make_options("b:1", "a:1")
+        second = SearchOptions()
+        second.commonparams.fq("a:1").rows(10).fq("b:1").q("*:*")
+        self.assertEqual(first._encode(), second._encode())
+        items, names, query = first._encode()
+        self.assertEqual(
+            items, (("fq", ("a:1", "b:1")), ("q", ("*:*",)), ("rows", ("10",)))
+        )
+        self.assertEqual(names, frozenset(["fq", "q", "rows"]))
+        self.assertEqual(query, "fq=a%3A1&fq=b%3A1&q=%2A%3A%2A&rows=10")
+
+    def test_memo(self):
+        so = make_options("a:1")
+        so._encode()
+        memo = so._encoded
+        # reading parameters does not invalidate the encoded form
+        so.commonparams["fq"]
+        list(so.iteritems())
+        repr(so)
+        so._encode()
+        self.assertIs(so._encoded, memo)
+
+        so.commonparams.fq("b:1")
+        self.assertIn("fq=b%3A1", so._encode()[2])
+        so.commonparams.remove_param("fq")
+        self.assertNotIn("fq=", so._encode()[2])
+        so.facetparams.field("tag_s")
+        self.assertIn("facet=true", so._encode()[2])
+
+    def test_memo_changed_in_place(self):
+        so = make_options("a:1")
+        fq = so.commonparams["fq"]
+        so._encode()
+        # a set read before the encoding was memoized, and changed after
+        fq.add("b:1")
+        self.assertIn("fq=b%3A1", so._encode()[2])
+        fq.discard("a:1")
+        self.assertNotIn("fq=a%3A1", so._encode()[2])
+        fq |= {"c:1"}
+        self.assertIn("fq=c%3A1", so._encode()[2])
+        fq.clear()
+        self.assertNotIn("fq=", so._encode()[2])
+
+    def test_copies(self):
+        so = make_options("a:1")
+        so._encode()
+        for other in (copy.deepcopy(so), pickle.loads(pickle.dumps(so))):
+            other.commonparams["fq"].add("b:1")
+            self.assertIn("fq=b%3A1", other._encode()[2])
+        self.assertNotIn("fq=b%3A1", so._encode()[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import asyncio
+import gc
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from solrcloudpy.collection.realtime import AsyncGetBatcher, GetBatcher
+from solrcloudpy.utils import SolrException
+
+
+class Fetcher(object):
+    """
+    Stands in for a real-time get request, recording the ids of each request
+    """
+
+    def __init__(self, delay=0.0, error=None):
+        """
+        :param delay: number of seconds each request takes
+        :param error: the message of the error each request fails with, if any
+        """
+        self.delay = delay
+        self.error = error
+        self.requests = []
+
+    def fetch(self, ids):
+        self.requests.append(ids)
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise SolrException(self.error, 503)
+        return dict((str(doc_id), {"id": doc_id}) for doc_id in ids)
+
+    async def async_fetch(self, ids):
+        self.requests.append(ids)
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise SolrException(self.error, 503)
+        return dict((str(doc_id), {"id": doc_id}) for doc_id in ids)
+
+
+class TestGetBatcher(unittest.TestCase):
+    def test_single_lookup_not_delayed(self):
+        fetcher = Fetcher()
+        batcher = GetBatcher(fetcher.fetch, window=1.0)
+        start = time.time()
+        self.assertEqual(batcher.load("1"), {"id": "1"})
+        self.assertEqual(batcher.load("2"), {"id": "2"})
+        self.assertLess(time.time() - start, 0.5)
+        self.assertEqual(fetcher.requests, [["1"], ["2"]])
+
+    def test_concurrent_lookups_batched(self):
+        fetcher = Fetcher(delay=0.1)
+        batcher = GetBatcher(fetcher.fetch, window=0.05)
+        ids = [str(i) for i in range(20)]
+        with ThreadPoolExecutor(20) as pool:
+            docs = list(pool.map(batcher.load, ids))
+        self.assertEqual(docs, [{"id": doc_id} for doc_id in ids])
+        # the first lookup is sent at once, the others while it is on its way
+        self.assertLess(len(fetcher.requests), 5)
+        self.assertEqual(sorted(sum(fetcher.requests, [])), sorted(ids))
+        self.assertEqual(batcher._pending, 0)
+
+    def test_max_size(self):
+        fetcher = Fetcher(delay=0.1)
+        batcher = GetBatcher(fetcher.fetch, window=10, max_size=3)
+        first = threading.Thread(target=batcher.load, args=("0",))
+        first.start()
+        time.sleep(0.02)
+        start = time.time()
+        with ThreadPoolExecutor(3) as pool:
+            list(pool.map(batcher.load, ["1", "2", "3"]))
+        self.assertLess(time.time() - start, 5)
+        first.join()
+        self.assertEqual(sorted(fetcher.requests[1]), ["1", "2", "3"])
+
+    def test_error(self):
+        batcher = GetBatcher(Fetcher(error="down").fetch)
+        self.assertRaises(SolrException, batcher.load, "1")
+        self.assertEqual(batcher._pending, 0)
+
+
+class TestAsyncGetBatcher(unittest.IsolatedAsyncioTestCase):
+    async def test_single_lookup_not_delayed(self):
+        fetcher = Fetcher()
+        batcher = AsyncGetBatcher(fetcher.async_fetch, window=1.0)
+        start = time.time()
+        self.assertEqual(await batcher.load("1"), {"id": "1"})
+        self.assertEqual(await batcher.load("2"), {"id": "2"})
+        self.assertLess(time.time() - start, 0.5)
+        self.assertEqual(fetcher.requests, [["1"], ["2"]])
+
+    async def test_concurrent_lookups_batched(self):
+        fetcher = Fetcher(delay=0.05)
+        batcher = AsyncGetBatcher(fetcher.async_fetch, window=0.01)
+        ids = [str(i) for i in range(20)]
+        docs = await asyncio.gather(*[batcher.load(doc_id) for doc_id in ids])
+        self.assertEqual(docs, [{"id": doc_id} for doc_id in ids])
+        self.assertEqual(fetcher.requests, [["0"], ids[1:]])
+        self.assertEqual(batcher._pending, 0)
+
+    async def test_cancelled_lookups(self):
+        errors = []
+        loop = asyncio.get_running_loop()
+        loop.set_exception_handler(lambda loop, context: errors.append(context))
+        fetcher = Fetcher(delay=0.05, error="down")
+        batcher = AsyncGetBatcher(fetcher.async_fetch)
+        lookup = asyncio.ensure_future(batcher.load("1"))
+        await asyncio.sleep(0.01)
+        lookup.cancel()
+        await asyncio.wait([lookup])
+        self.assertTrue(lookup.cancelled())
+        # the request goes on, and its error is not reported as never retrieved
+        await asyncio.sleep(0.1)
+        del lookup
+        gc.collect()
+        self.assertEqual(errors, [])
+        self.assertEqual(batcher._pending, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+
+from solrcloudpy import SolrConnection
+from solrcloudpy.retry import RetryBudget, RetryPolicy
+from solrcloudpy.utils import SolrException, _ServerPool
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_retryable(self):
+        policy = RetryPolicy()
+        for status in (None, 429, 500, 503):
+            self.assertTrue(policy.retryable(status), status)
+        for status in (400, 404, 409):
+            self.assertFalse(policy.retryable(status), status)
+
+    def test_delay(self):
+        policy = RetryPolicy(backoff_base=0.1, backoff_max=1.0)
+        for attempt, ceiling in ((0, 0.1), (1, 0.2), (3, 0.8), (4, 1.0), (30, 1.0)):
+            delays = [policy.delay(attempt, 503) for _ in range(200)]
+            self.assertTrue(all(0 <= delay <= ceiling for delay in delays), attempt)
+            # full jitter spreads the retries over the whole interval
+            self.assertGreater(max(delays) - min(delays), ceiling / 2)
+
+    def test_retry_after(self):
+        policy = RetryPolicy(backoff_base=0.1, retry_after_max=30.0)
+        self.assertEqual(policy.delay(0, 503, "2"), 2.0)
+        self.assertEqual(policy.delay(0, 429, "0.5"), 0.5)
+        self.assertEqual(policy.delay(0, 503, "3600"), 30.0)
+        self.assertEqual(policy.delay(0, 503, "-1"), 0)
+        # only honored for the statuses that define it
+        self.assertLessEqual(policy.delay(0, 500, "2"), 0.1)
+        # HTTP dates fall back on the backoff
+        date = "Wed, 21 Oct 2026 07:28:00 GMT"
+        self.assertLessEqual(policy.delay(0, 503, date), 0.1)
+
+
+class TestRetryBudget(unittest.TestCase):
+    def test_budget(self):
+        budget = RetryBudget(ratio=0.5, min_per_second=0, max_balance=2)
+        self.assertTrue(budget.withdraw())
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+        # each request earns half a retry
+        budget.deposit()
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        self.assertTrue(budget.withdraw())
+        for _ in range(10):
+            budget.deposit()
+        self.assertEqual(budget.balance, 2)
+
+    def test_min_per_second(self):
+        budget = RetryBudget(ratio=0, min_per_second=1, max_balance=10)
+        budget.balance = 0
+        self.assertFalse(budget.withdraw())
+        # as if two seconds went by
+        budget._refilled -= 2
+        self.assertTrue(budget.withdraw())
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+
+    def test_disabled(self):
+        policy = RetryPolicy(budget_ratio=None)
+        self.assertIsNone(policy.budget)
+        self.assertTrue(all(policy.allow_retry() for _ in range(1000)))
+
+
+class TestServerPool(unittest.TestCase):
+    def connect(self, **kwargs):
+        return SolrConnection(["a:8983", "b:8983"], circuit_breaker=False, **kwargs)
+
+    def test_client_error(self):
+        servers = _ServerPool(self.connect())
+        with self.assertRaises(SolrException) as ctx:
+            servers.failed(servers.servers[0], 400, None, "bad request")
+        self.assertEqual(ctx.exception.status, 400)
+
+    def test_last_error_raised(self):
+        servers = _ServerPool(self.connect(request_retries=0))
+        first, second = servers.servers
+        self.assertGreaterEqual(servers.failed(first, 503, None, "overloaded"), 0)
+        with self.assertRaises(SolrException) as ctx:
+            servers.failed(second, 503, None, "Solr returned HTTP 503: overloaded")
+        self.assertEqual(ctx.exception.status, 503)
+        self.assertEqual(str(ctx.exception), "Solr returned HTTP 503: overloaded")
+
+    def test_no_response(self):
+        servers = _ServerPool(self.connect(request_retries=0))
+        first, second = servers.servers
+        servers.failed(first)
+        with self.assertRaises(SolrException) as ctx:
+            servers.failed(second)
+        self.assertIsNone(ctx.exception.status)
+        self.assertEqual(str(ctx.exception), "No servers available")
+
+    def test_budget_exhausted(self):
+        policy = RetryPolicy(budget_ratio=0, budget_min_per_second=0)
+        policy.budget.balance = 1
+        servers = _ServerPool(self.connect(retry_policy=policy, request_retries=5))
+        host = servers.servers[0]
+        servers.failed(host, 503, None, "overloaded")
+        with self.assertRaises(SolrException) as ctx:
+            servers.failed(host, 500, None, "Solr returned HTTP 500: broken")
+        self.assertEqual(ctx.exception.status, 500)
+        self.assertEqual(str(ctx.exception), "Solr returned HTTP 500: broken")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+
+from solrcloudpy.collection.routing import (
+    _partition,
+    _routing_table,
+    composite_id_hash,
+    murmurhash3_x86_32,
+)
+from solrcloudpy.collection.search import _SearchBase
+from solrcloudpy.utils import SolrException
+
+
+def unsigned(value):
+    return value & 0xFFFFFFFF
+
+
+def cluster_state(**shard_ranges):
+    shards = {}
+    for name, hash_range in shard_ranges.items():
+        shards[name] = {
+            "range": hash_range,
+            "state": "active",
+            "replicas": {
+                "core_node1": {
+                    "core": "coll_%s_replica_n1" % name,
+                    "base_url": "http://%s:8983/solr" % name,
+                    "state": "active",
+                    "leader": "true",
+                }
+            },
+        }
+    return {
+        "collections": {"coll": {"shards": shards, "router": {"name": "compositeId"}}}
+    }
+
+
+class TestMurmurHash(unittest.TestCase):
+    def test_reference_vectors(self):
+        # the vectors of the reference implementation, which Solr's `Hash` class ports
+        cases = [
+            (b"", 0, 0),
+            (b"", 1, 0x514E28B7),
+            (b"", 0xFFFFFFFF, 0x81F16F39),
+            (b"\0\0\0\0", 0, 0x2362F9DE),
+            (b"aaaa", 0x9747B28C, 0x5A97808A),
+            (b"Hello, world!", 0x9747B28C, 0x24884CBA),
+            (b"The quick brown fox jumps over the lazy dog", 0x9747B28C, 0x2FA826CD),
+        ]
+        for data, seed, expected in cases:
+            self.assertEqual(unsigned(murmurhash3_x86_32(data, seed)), expected, data)
+
+    def test_ids(self):
+        # strings are hashed as UTF-8, and the hash is a signed 32-bit integer
+        self.assertEqual(murmurhash3_x86_32("foo"), -156908512)
+        self.assertEqual(murmurhash3_x86_32("hello"), 613153351)
+        self.assertEqual(murmurhash3_x86_32("a"), 0x3C2569B2)
+        self.assertEqual(unsigned(murmurhash3_x86_32("b")), 0x95DE7E03)
+        self.assertEqual(
+            murmurhash3_x86_32(u"été"), murmurhash3_x86_32(b"\xc3\xa9t\xc3\xa9")
+        )
+
+
+class TestCompositeIdHash(unittest.TestCase):
+    def test_plain_id(self):
+        self.assertEqual(composite_id_hash("foo"), murmurhash3_x86_32("foo"))
+
+    def test_shard_key(self):
+        # the upper 16 bits come from the shard key, the lower 16 from the id
+        self.assertEqual(unsigned(composite_id_hash("a!b")), 0x3C257E03)
+
+    def test_shard_key_bits(self):
+        # `/2` gives the upper 2 bits of the hash to the shard key
+        self.assertEqual(unsigned(composite_id_hash("a/2!b")), 0x15DE7E03)
+        self.assertEqual(unsigned(composite_id_hash("a/0!b")), 0x95DE7E03)
+
+    def test_tri_level(self):
+        # 8 bits from each of the first two parts, 16 from the id
+        low = unsigned(murmurhash3_x86_32("c")) & 0xFFFF
+        self.assertEqual(unsigned(composite_id_hash("a!b!c")), 0x3CDE0000 | low)
+
+
+class TestRouting(unittest.TestCase):
+    def test_partition(self):
+        state = cluster_state(shard1="80000000-ffffffff", shard2="0-7fffffff")
+        table = _routing_table(state, "coll")
+        docs = [{"id": "a"}, {"id": "b"}, {"id": "a!b"}]
+        batches = _partition(docs, table, "id")
+        self.assertEqual(
+            batches,
+            {
+                # 0x95de7e03 is negative
+                ("shard1", "http://shard1:8983/solr/", "coll_shard1_replica_n1"): [
+                    {"id": "b"}
+                ],
+                ("shard2", "http://shard2:8983/solr/", "coll_shard2_replica_n1"): [
+                    {"id": "a"},
+                    {"id": "a!b"},
+                ],
+            },
+        )
+        self.assertIsNone(_routing_table(state, "other"))
+        self.assertRaises(SolrException, _partition, [{"title": "x"}], table, "id")
+
+    def test_routed_result(self):
+        leaders = [("shard1", "http://a/", "c1"), ("shard2", "http://b/", "c2")]
+        self.assertEqual(_SearchBase._routed_result(leaders, ["r1", "r2"]), "r1")
+
+        error = SolrException("Solr returned HTTP 400: bad document", 400)
+        with self.assertRaises(SolrException) as ctx:
+            _SearchBase._routed_result(leaders, ["r1", error])
+        self.assertEqual(ctx.exception.status, 400)
+        self.assertIn("1 of 2 shards", str(ctx.exception))
+        self.assertIn("shard shard2: Solr returned HTTP 400", str(ctx.exception))
+
+        self.assertRaises(
+            ValueError, _SearchBase._routed_result, leaders, ["r1", ValueError()]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,33 @@
 import os
+import socket
 import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 
 from solr_instance import SolrInstance
 from solrcloudpy import SearchOptions, SolrConnection
+from solrcloudpy.balancer import Balancer
+from solrcloudpy.collection import streaming as se
+from solrcloudpy.collection.indexer import SolrBatchAdder
+from solrcloudpy.collection.updates import AtomicUpdate
+from solrcloudpy.utils import SolrException
 
 solrprocess = None
 
 
+class FirstServerBalancer(Balancer):
+    """
+    Always picks the first server it can, and records the servers it picked
+    """
+
+    def __init__(self):
+        self.chosen = []
+
+    def choose(self, servers):
+        self.chosen.append(servers[0])
+        return servers[0]
+
+
 class TestCollectionSearch(unittest.TestCase):
     def setUp(self):
         self.conn = SolrConnection(version=os.getenv("SOLR_VERSION", "6.1.0"))
@@ -70,6 +90,235 @@ class TestCollectionSearch(unittest.TestCase):
         self.assertTrue(len(res.response.docs) == 1)
         coll2.drop()
 
+    def test_routed_add(self):
+        conn = SolrConnection(
+            version=os.getenv("SOLR_VERSION", "6.1.0"), route_updates=True
+        )
+        coll2 = conn.create_collection("coll2", num_shards=2, **self.collparams)
+        docs = [{"id": str(_id), "includes": "silly text"} for _id in range(20)]
+
+        coll2.add(docs)
+        coll2.commit()
+        res = coll2.search({"q": "*:*"}).result
+        self.assertEqual(res.response.numFound, 20)
+        coll2.drop()
+
+    def test_streamed_add(self):
+        coll2 = self.conn.create_collection("coll2", **self.collparams)
+        coll2.add({"id": str(_id), "includes": "silly text"} for _id in range(50))
+        coll2.commit()
+        res = coll2.search({"q": "*:*"}).result
+        self.assertEqual(res.response.numFound, 50)
+        coll2.drop()
+
+    def test_javabin_search(self):
+        conn = SolrConnection(
+            version=os.getenv("SOLR_VERSION", "6.1.0"), response_format="javabin"
+        )
+        coll2 = conn.create_collection("coll2", **self.collparams)
+        coll2.add([{"id": str(_id), "includes": "silly text"} for _id in range(5)])
+        coll2.commit()
+        params = {"q": "*:*", "sort": "id asc", "fl": "id,includes,score"}
+        res = coll2.search(params).result
+        self.assertEqual(res.response.numFound, 5)
+        self.assertEqual(res.dict, self.conn["coll2"].search(params).result.dict)
+        coll2.drop()
+
+    def test_compact_search(self):
+        coll2 = self.conn.create_collection("coll2", **self.collparams)
+        coll2.add([{"id": str(_id), "includes": "silly text"} for _id in range(5)])
+        coll2.commit()
+        params = {"q": "*:*", "sort": "id asc", "fl": "id,includes"}
+        docs = coll2.search(params, compact=True).result.response.docs
+        self.assertEqual(len(docs), 5)
+        self.assertEqual(docs[0].id, "0")
+        self.assertEqual(docs[0]["id"], "0")
+        self.assertEqual(docs, coll2.search(params).result.response.docs)
+        coll2.drop()
+
+    def test_scan(self):
+        coll2 = self.conn.create_collection("coll2", **self.collparams)
+        coll2.add([{"id": str(_id), "includes": "silly text"} for _id in range(25)])
+        coll2.commit()
+        ids = [doc["id"] for doc in coll2.scan({"q": "*:*"}, rows=10)]
+        self.assertEqual(sorted(ids), sorted(str(_id) for _id in range(25)))
+        docs = list(coll2.scan({"q": "*:*", "sort": "id desc"}, rows=7, prefetch=True))
+        self.assertEqual(len(docs), 25)
+        coll2.drop()
+
+    def test_stream(self):
+        coll2 = self.conn.create_collection("coll2", **self.collparams)
+        coll2.add([{"id": str(_id), "includes": "silly text"} for _id in range(5)])
+        coll2.commit()
+        expr = se.search("coll2", fl="id", sort="id asc")
+        ids = [row["id"] for row in coll2.stream(expr)]
+        self.assertEqual(ids, [str(_id) for _id in range(5)])
+        self.assertRaises(SolrException, list, coll2.stream("nosuchstream(coll2)"))
+        coll2.drop()
+
+    def test_export(self):
+        coll2 = self.conn.create_collection("coll2", **self.collparams)
+        coll2.add([{"id": str(_id), "includes": "silly text"} for _id in range(25)])
+        coll2.commit()
+        params = {"q": "*:*", "fl": "id", "sort": "id asc"}
+        ids = [doc["id"] for doc in coll2.export(params)]
+        self.assertEqual(ids, sorted(str(_id) for _id in range(25)))
+        params["sort"] = "no_such_field asc"
+        self.assertRaises(SolrException, list, coll2.export(params))
+        coll2.drop()
+
+    def test_compressed_add(self):
+        conn = SolrConnection(
+            version=os.getenv("SOLR_VERSION", "6.1.0"),
+            compress_updates=True,
+            compression_min_size=0,
+        )
+        coll2 = conn.create_collection("coll2", **self.collparams)
+        coll2.add([{"id": str(_id), "includes": "silly text"} for _id in range(5)])
+        coll2.commit()
+        self.assertEqual(coll2.search({"q": "*:*"}).result.response.numFound, 5)
+        coll2.drop()
+
+    def test_result_cache(self):
+        conn = SolrConnection(
+            version=os.getenv("SOLR_VERSION", "6.1.0"), result_cache=True
+        )
+        coll2 = conn.create_collection("coll2", **self.collparams)
+        coll2.add([{"id": "1"}])
+        coll2.commit()
+        first = coll2.search({"q": "*:*", "rows": 5})
+        self.assertIs(coll2.search({"rows": 5, "q": "*:*"}), first)
+        self.assertEqual(conn.result_cache.stats()["hits"], 1)
+        # updates from this connection invalidate the cache
+        coll2.add([{"id": "2"}])
+        coll2.commit()
+        res = coll2.search({"q": "*:*", "rows": 5}).result
+        self.assertEqual(res.response.numFound, 2)
+        coll2.drop()
+
+    def test_canonical_params(self):
+        coll2 = self.conn.create_collection("coll2", **self.collparams)
+        coll2.add([{"id": str(_id)} for _id in range(5)])
+        coll2.commit()
+        first = SearchOptions()
+        first.commonparams.q("*:*").fq("id:[0 TO 3]").fq("id:[2 TO 4]")
+        second = SearchOptions()
+        second.commonparams.fq("id:[2 TO 4]").fq("id:[0 TO 3]").q("*:*")
+        self.assertEqual(first._encode(), second._encode())
+        self.assertEqual(coll2.search(first).result.response.numFound, 2)
+        # the encoded form follows changes to the options
+        second.commonparams.remove_param("fq")
+        self.assertNotEqual(first._encode(), second._encode())
+        self.assertEqual(coll2.search(second).result.response.numFound, 5)
+        coll2.drop()
+
+    def test_long_query(self):
+        coll2 = self.conn.create_collection("coll2", **self.collparams)
+        coll2.add([{"id": str(_id)} for _id in range(5)])
+        coll2.commit()
+        # too long for a URL, sent as a form-encoded POST
+        ids = " OR ".join(str(_id) for _id in range(2, 5000))
+        res = coll2.search({"q": "*:*", "fq": "id:(%s)" % ids}).result
+        self.assertEqual(res.response.numFound, 3)
+        coll2.drop()
+
+    def test_multi_search(self):
+        coll2 = self.conn.create_collection("coll2", **self.collparams)
+        coll2.add([{"id": str(_id)} for _id in range(5)])
+        coll2.commit()
+        res = self.conn.multi_search(
+            [
+                ("coll2", {"q": "id:1"}),
+                ("coll2", {"q": "*:*", "sort": "no_such_field asc"}),
+                ("coll2", {"q": "*:*"}),
+            ],
+            max_concurrency=2,
+        )
+        self.assertEqual(res[0].result.response.numFound, 1)
+        # a failed search does not fail the others
+        self.assertIsInstance(res[1], SolrException)
+        self.assertEqual(res[2].result.response.numFound, 5)
+        res = coll2.multi_search([{"q": "id:%d" % _id} for _id in range(5)])
+        self.assertEqual([r.result.response.numFound for r in res], [1] * 5)
+        coll2.drop()
+
+    def test_realtime_get(self):
+        coll2 = self.conn.create_collection("coll2", **self.collparams)
+        coll2.add([{"id": str(_id)} for _id in range(5)])
+        # real-time get sees documents that are not committed yet
+        res = coll2.get(["1", "3", "missing"]).result
+        self.assertEqual(sorted(d["id"] for d in res.response.docs), ["1", "3"])
+        with ThreadPoolExecutor(8) as pool:
+            docs = list(pool.map(coll2.lookup, ["0", "2", "4", "missing"]))
+        self.assertEqual([d and d["id"] for d in docs], ["0", "2", "4", None])
+        coll2.drop()
+
+    def test_delete_ids(self):
+        coll2 = self.conn.create_collection("coll2", **self.collparams)
+        coll2.add([{"id": str(_id)} for _id in range(10)])
+        coll2.delete_ids([str(_id) for _id in range(5)], chunk_size=2)
+        with SolrBatchAdder(coll2, batch_size=3) as adder:
+            adder.delete_one("5")
+            adder.add_one({"id": "10"})
+            adder.delete_multi(["6", "10"])
+        coll2.commit()
+        res = coll2.search({"q": "*:*", "sort": "id asc"}).result
+        self.assertEqual([d["id"] for d in res.response.docs], ["7", "8", "9"])
+        coll2.drop()
+
+    def test_atomic_update(self):
+        coll2 = self.conn.create_collection("coll2", **self.collparams)
+        coll2.add([{"id": "1", "views_i": 1, "tags_ss": ["a", "b"]}])
+        coll2.commit()
+        update = AtomicUpdate("1").inc("views_i", 2).remove("tags_ss", "a")
+        coll2.update_fields([update])
+        with SolrBatchAdder(coll2, batch_size=2) as adder:
+            adder.update_one(AtomicUpdate("1").add("tags_ss", "c"))
+        coll2.commit()
+        doc = coll2.search({"q": "id:1"}).result.response.docs[0]
+        self.assertEqual(doc["views_i"], 3)
+        self.assertEqual(doc["tags_ss"], ["b", "c"])
+        # a stale version is rejected
+        self.assertRaises(
+            SolrException,
+            coll2.update_fields,
+            [AtomicUpdate("1", version=1234).set("views_i", 0)],
+        )
+        coll2.drop()
+
+    def test_client_error(self):
+        coll2 = self.conn.create_collection("coll2", **self.collparams)
+        # a bad request fails right away, instead of being retried on every server
+        self.assertRaises(
+            SolrException, coll2.search, {"q": "*:*", "sort": "no_such_field asc"}
+        )
+        coll2.drop()
+
+    def test_hedged_search(self):
+        # a server that accepts connections but never answers
+        blackhole = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        blackhole.bind(("127.0.0.1", 0))
+        blackhole.listen(8)
+        balancer = FirstServerBalancer()
+        conn = SolrConnection(
+            ["127.0.0.1:%d" % blackhole.getsockname()[1], "localhost:8983"],
+            version=os.getenv("SOLR_VERSION", "6.1.0"),
+            hedge_delay=0.05,
+            timeout=2,
+            balancer=balancer,
+        )
+        coll2 = self.conn.create_collection("coll2", **self.collparams)
+        coll2.add([{"id": str(_id)} for _id in range(5)])
+        coll2.commit()
+        start = time.time()
+        res = conn["coll2"].search({"q": "*:*"}).result
+        self.assertEqual(res.response.numFound, 5)
+        self.assertLess(time.time() - start, 1)
+        # the request went to the first server, then a copy of it to the second one
+        self.assertEqual(balancer.chosen[:2], conn.servers)
+        blackhole.close()
+        coll2.drop()
+
 
 def setUpModule():
     if os.getenv("SKIP_STARTUP", False):
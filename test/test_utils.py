@@ -0,0 +1,133 @@
+import copy
+import json
+import pickle
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from solrcloudpy.utils import DictObject, SolrException, SolrResult, _run_all
+
+
+def make_result():
+    return SolrResult(
+        {
+            "responseHeader": {"status": 0, "params": {"q": "*:*"}},
+            "response": {"numFound": 2, "start": 0, "docs": [{"id": "1"}, {"id": "2"}]},
+        }
+    )
+
+
+class TestSolrResult(unittest.TestCase):
+    def test_nested_access(self):
+        res = make_result()
+        self.assertEqual(res.response.numFound, 2)
+        self.assertEqual(res["response"]["numFound"], 2)
+        self.assertEqual(res.responseHeader.params.q, "*:*")
+        self.assertEqual(res["responseHeader"].params["q"], "*:*")
+        # nested dicts are wrapped once, in the class of the result
+        self.assertIsInstance(res.response, SolrResult)
+        self.assertIs(res.response, res["response"])
+        # lists are returned as they are
+        self.assertEqual(res.response.docs[0]["id"], "1")
+        self.assertIn("response", res)
+        self.assertNotIn("facet_counts", res)
+        self.assertRaises(AttributeError, getattr, res, "facet_counts")
+        self.assertRaises(KeyError, res.__getitem__, "facet_counts")
+        self.assertFalse(hasattr(res.response, "_repr_html_"))
+
+    def test_dict(self):
+        data = {"response": {"numFound": 0, "docs": []}}
+        res = SolrResult(data)
+        # the underlying dict itself, not a copy
+        self.assertIs(res.dict, data)
+        self.assertIs(res.response.dict, data["response"])
+        data["response"]["numFound"] = 3
+        self.assertEqual(res.response.numFound, 3)
+        self.assertEqual(SolrResult(None).dict, {})
+
+    def test_repr(self):
+        res = make_result()
+        value = json.loads(repr(res))
+        self.assertEqual(sorted(value), ["response", "responseHeader"])
+        self.assertTrue(value["response"].startswith("SolrResult << "))
+        self.assertIn("'numFound': 2", value["response"])
+
+    def test_pickle(self):
+        res = make_result()
+        res.response  # wrap a nested dict before pickling
+        for other in (pickle.loads(pickle.dumps(res)), copy.deepcopy(res)):
+            self.assertIsInstance(other, SolrResult)
+            self.assertEqual(other.dict, res.dict)
+            self.assertIsNot(other.dict, res.dict)
+            self.assertEqual(other.response.docs[1]["id"], "2")
+            self.assertEqual(other.responseHeader.params.q, "*:*")
+
+    def test_attributes(self):
+        res = make_result()
+        res.response
+        self.assertEqual(
+            vars(res), {"responseHeader": res.responseHeader, "response": res.response}
+        )
+        # attributes are the keys of the response, as when they were stored in `__dict__`
+        res.extra = 1
+        self.assertEqual(res["extra"], 1)
+        self.assertEqual(res.dict["extra"], 1)
+        res.response = {"numFound": 0}
+        self.assertEqual(res.response.numFound, 0)
+        del res.extra
+        self.assertNotIn("extra", res)
+        self.assertRaises(AttributeError, delattr, res, "extra")
+
+    def test_dict_object(self):
+        obj = DictObject({"a": {"b": 1}})
+        self.assertIsInstance(obj.a, DictObject)
+        self.assertEqual(obj.a.b, 1)
+        self.assertEqual(pickle.loads(pickle.dumps(obj)).a.b, 1)
+        self.assertIn("a", dir(obj))
+
+
+class TestRunAll(unittest.TestCase):
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=8)
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def tearDown(self):
+        self.executor.shutdown(wait=True)
+
+    def call(self, value, delay=0.02):
+        def run():
+            with self.lock:
+                self.running += 1
+                self.max_running = max(self.max_running, self.running)
+            time.sleep(delay)
+            with self.lock:
+                self.running -= 1
+            if isinstance(value, Exception):
+                raise value
+            return value
+
+        return run
+
+    def test_results(self):
+        error = ValueError("failed")
+        calls = [self.call(i) for i in range(10)] + [self.call(error)]
+        results = _run_all(self.executor, calls, 3)
+        self.assertEqual(results, list(range(10)) + [error])
+        # the pool has more threads, but no more than 3 are used
+        self.assertEqual(self.max_running, 3)
+        self.assertEqual(_run_all(self.executor, [], 3), [])
+
+    def test_timeout(self):
+        calls = [self.call("slow", 1.0)] + [self.call(i) for i in range(4)]
+        start = time.time()
+        results = _run_all(self.executor, calls, 2, timeout=0.2)
+        self.assertLess(time.time() - start, 0.9)
+        self.assertIsInstance(results[0], SolrException)
+        self.assertEqual(results[1:], list(range(4)))
+
+
+if __name__ == "__main__":
+    unittest.main()